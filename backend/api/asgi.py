@@ -3,6 +3,10 @@ ASGI config for api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Sob ASGI o login (view assíncrona apps.accounts.login_async.login_view)
+calcula o hash da senha em pool próprio sem prender o event loop.
+Ex: uvicorn api.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,208 @@
+"""
+Schema OpenAPI pré-gerado e servido da memória
+
+O SpectacularAPIView gera o schema inteiro a cada GET em /api/schema/.
+Aqui o schema é gerado uma vez (no build, pelo comando
+build_openapi_schema, ou no primeiro request) e cada formato (YAML/JSON)
+fica renderizado em memória, já comprimido em gzip e com ETag.
+
+O schema só é regenerado quando a impressão digital do URLconf muda
+(rotas, views, SPECTACULAR_SETTINGS e o código-fonte dos módulos do projeto
+que definem as views e seus serializers).
+"""
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from pathlib import Path
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_lock = threading.Lock()
+_cache = {
+    'resolver': None,  # resolver para o qual a impressão digital foi calculada
+    'fingerprint': None,
+    'schema': None,
+    'renders': {},  # formato -> CachedRender
+}
+
+
+def get_schema_cache_config():
+    config = getattr(settings, 'OPENAPI_SCHEMA_CACHE', {})
+    return {
+        'enabled': config.get('ENABLED', True),
+        'file': Path(config.get('FILE', Path(settings.BASE_DIR) / 'build' / 'openapi-schema.json')),
+    }
+
+
+def _iter_urlconf(patterns, prefixo=''):
+    for pattern in patterns:
+        rota = prefixo + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _iter_urlconf(pattern.url_patterns, rota)
+        elif isinstance(pattern, URLPattern):
+            callback = pattern.callback
+            view = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None) or callback
+            actions = getattr(callback, 'actions', None) or {}
+            yield rota, view, sorted(actions.items())
+
+
+def _arquivos_fonte(views):
+    """
+    Arquivos .py do projeto que alimentam o schema: os diretórios dos módulos
+    das views, das suas classes base e dos serializer_class (views.py,
+    serializers.py, filtros e extensões do schema ficam lado a lado no app).
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    diretorios = set()
+    for view in views:
+        classes = list(getattr(view, '__mro__', [view]))
+        serializer = getattr(view, 'serializer_class', None)
+        if isinstance(serializer, type):
+            classes.extend(serializer.__mro__)
+        for cls in classes:
+            arquivo = getattr(sys.modules.get(cls.__module__), '__file__', None)
+            if not arquivo:
+                continue
+            diretorio = Path(arquivo).resolve().parent
+            if diretorio.is_relative_to(base_dir):
+                diretorios.add(diretorio)
+    return sorted(arquivo for diretorio in diretorios for arquivo in diretorio.glob('*.py'))
+
+
+def urlconf_fingerprint(resolver=None):
+    """
+    Hash das rotas/views do URLconf, das configurações do Spectacular e do
+    código-fonte das views/serializers (mudar um campo de serializer sem
+    mexer nas rotas também invalida o schema)
+    """
+    resolver = resolver or get_resolver()
+    digest = hashlib.sha256()
+    views = set()
+    for rota, view, actions in _iter_urlconf(resolver.url_patterns):
+        views.add(view)
+        digest.update(f"{rota} {view.__module__}.{view.__qualname__} {actions}".encode())
+        digest.update(b'\n')
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for arquivo in _arquivos_fonte(views):
+        digest.update(str(arquivo.relative_to(base_dir)).encode())
+        digest.update(hashlib.sha256(arquivo.read_bytes()).digest())
+    digest.update(repr(sorted(
+        (chave, repr(valor)) for chave, valor in getattr(settings, 'SPECTACULAR_SETTINGS', {}).items()
+    )).encode())
+    digest.update(drf_spectacular.__version__.encode())
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """Gerar o schema (dict) como o SpectacularAPIView faria"""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+
+
+def write_schema_file(path, schema, fingerprint):
+    """Gravar schema + impressão digital (usado no build)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conteudo = {'fingerprint': fingerprint, 'schema': schema}
+    temporario = path.with_suffix('.tmp')
+    temporario.write_bytes(OpenApiJsonRenderer().render(conteudo))
+    temporario.replace(path)
+
+
+def read_schema_file(path, fingerprint):
+    """Schema do arquivo de build, se existir e corresponder ao URLconf atual"""
+    try:
+        conteudo = json.loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if conteudo.get('fingerprint') != fingerprint:
+        return None
+    return conteudo.get('schema')
+
+
+class CachedRender:
+    """Bytes renderizados de um formato, versão gzip e ETag"""
+
+    def __init__(self, content):
+        self.content = content
+        self.gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        self.etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def get_cached_schema():
+    """Schema atual, regenerado só se a impressão digital do URLconf mudou"""
+    resolver = get_resolver()
+    if _cache['resolver'] is resolver and _cache['schema'] is not None:
+        return _cache['schema']
+
+    with _lock:
+        if _cache['resolver'] is resolver and _cache['schema'] is not None:
+            return _cache['schema']
+        fingerprint = urlconf_fingerprint(resolver)
+        if fingerprint != _cache['fingerprint'] or _cache['schema'] is None:
+            schema = read_schema_file(get_schema_cache_config()['file'], fingerprint)
+            if schema is None:
+                schema = generate_schema()
+            _cache['schema'] = schema
+            _cache['renders'] = {}
+            _cache['fingerprint'] = fingerprint
+        _cache['resolver'] = resolver
+        return _cache['schema']
+
+
+def get_cached_render(formato):
+    schema = get_cached_schema()
+    render = _cache['renders'].get(formato)
+    if render is None:
+        render = CachedRender(RENDERERS[formato]().render(schema, renderer_context={}))
+        _cache['renders'][formato] = render
+    return render
+
+
+def clear_schema_cache():
+    with _lock:
+        _cache.update(resolver=None, fingerprint=None, schema=None, renders={})
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """SpectacularAPIView servindo o schema pré-renderizado (ETag + gzip)"""
+
+    def get(self, request, *args, **kwargs):
+        # Idioma/versão específicos ou cache desligado: geração normal
+        if (not get_schema_cache_config()['enabled'] or request.GET.get('lang')
+                or request.GET.get('version') or self.urlconf or self.custom_settings):
+            return super().get(request, *args, **kwargs)
+
+        renderer, media_type = self.perform_content_negotiation(request)
+        formato = 'json' if renderer.format == 'json' else 'yaml'
+        render = get_cached_render(formato)
+
+        if render.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(render.gzipped, content_type=media_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(render.content, content_type=media_type)
+
+        response['ETag'] = render.etag
+        response['Cache-Control'] = 'no-cache'  # sempre revalidar via ETag
+        response['Content-Disposition'] = (
+            f'inline; filename="{spectacular_settings.TITLE or "schema"}.{renderer.format}"'
+        )
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
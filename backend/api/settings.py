@@ -63,11 +63,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.controle_acesso.middleware.AuditContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -164,17 +167,95 @@ SIMPLE_JWT = {
     'UPDATE_LAST_LOGIN': True,
 }
 
+# Bloom filter da blacklist de refresh tokens (apps.accounts.token_blacklist)
+TOKEN_BLACKLIST_FILTER = {
+    'ENABLED': config('TOKEN_BLACKLIST_FILTER_ENABLED', default=True, cast=bool),
+    # Precisa de CACHES['default'] compartilhado entre os workers: com locmem o
+    # filtro fica desligado (toda checagem no banco). Com cache compartilhado a
+    # versão é lida a cada checagem e um token na blacklist vale em todos os
+    # workers a partir da checagem seguinte ao commit
+    'REQUIRE_SHARED_CACHE': True,
+    'CAPACITY': 100000,  # JTIs previstos por processo (dobra se passar)
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,  # releitura sem aviso na versão (chave perdida no cache)
+    'REBUILD_INTERVAL': 3600,
+}
+
+# Refreshes concorrentes do mesmo token devolvem o mesmo par (apps.accounts.refresh)
+REFRESH_COALESCING = {
+    'ENABLED': config('REFRESH_COALESCING_ENABLED', default=True, cast=bool),
+    'GRACE_SECONDS': config('REFRESH_GRACE_SECONDS', default=10, cast=int),
+    'WAIT_SECONDS': 5,
+    # Lock e par precisam valer entre os workers: com o cache locmem (por
+    # processo) o coalescing fica desligado
+    'REQUIRE_SHARED_CACHE': True,
+}
+
+# request.user a partir do token + snapshot em cache (apps.accounts.authentication)
+AUTH_SNAPSHOT = {
+    'ENABLED': config('AUTH_SNAPSHOT_ENABLED', default=True, cast=bool),
+    'TIMEOUT': 120,  # segundos; mudanças de ACL/usuário invalidam antes
+    # A invalidação precisa chegar a todos os workers: com o cache locmem
+    # (por processo) o snapshot fica desligado e o usuário vem do banco
+    'REQUIRE_SHARED_CACHE': True,
+}
+
+# Login sob ASGI com o hash de senha em pool próprio (apps.accounts.login_async)
+LOGIN_ASYNC = {
+    'ENABLED': config('LOGIN_ASYNC_ENABLED', default=True, cast=bool),
+    'EXECUTOR': config('LOGIN_HASH_EXECUTOR', default='thread'),  # 'thread' ou 'process'
+    'WORKERS': config('LOGIN_HASH_WORKERS', default=4, cast=int),  # por processo web, separado dos workers
+    'MAX_PENDING': config('LOGIN_HASH_MAX_PENDING', default=64, cast=int),  # acima disso: 503
+    'QUEUE_TIMEOUT': 2.0,
+}
+
+# Rate limit de login/refresh por janela deslizante (apps.accounts.throttling)
+LOGIN_THROTTLE = {
+    'ENABLED': config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool),
+    'CACHE': 'default',  # precisa ser compartilhado (Redis/Memcached) para valer entre workers
+    'RATES': {
+        'login_email': config('LOGIN_THROTTLE_EMAIL_RATE', default='5/min'),
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+        'refresh_ip': config('REFRESH_THROTTLE_IP_RATE', default='120/min'),
+    },
+}
+
+# ETag/Last-Modified em list/retrieve das ViewSets (core.conditional)
+CONDITIONAL_GET = {
+    'ENABLED': config('CONDITIONAL_GET_ENABLED', default=True, cast=bool),
+}
+
+# Feed /changes/ de usuários, grupos e permissões (core.change_feed)
+CHANGE_FEED = {
+    'PAGE_SIZE': 200,
+    'MAX_PAGE_SIZE': 1000,
+    'SAFETY_LAG': 1.0,  # segundos; alterações mais novas ficam para a próxima chamada
+    'TOMBSTONE_RETENTION_DAYS': config('CHANGE_FEED_TOMBSTONE_RETENTION_DAYS', default=90, cast=int),
+}
+
+# Renderer/parser JSON da API (core.renderers)
+JSON_RENDERER = {
+    'BACKEND': config('JSON_BACKEND', default='orjson'),  # 'json' volta ao json da biblioteca padrão
+    'CHUNK_THRESHOLD': 500,  # listas a partir daqui são codificadas em pedaços
+    'CHUNK_SIZE': 200,
+}
+
 # Configuração do DRF
 REST_FRAMEWORK = {
     # Configuração de autenticação e permissão
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.SnapshotJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     # Configuração de paginação
     'DEFAULT_PAGINATION_CLASS': 'core.pagination.CustomPagination',
@@ -185,10 +266,37 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'ORDERING_PARAM': 'ordering',
+    # Proxies reversos confiáveis na frente da API: o IP dos throttles vem do
+    # X-Forwarded-For só com NUM_PROXIES > 0 (0 = REMOTE_ADDR, header ignorado)
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
     # Configuração de documentação OpenAPI
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Orçamento de queries por view (core.query_budget)
+QUERY_BUDGET = {
+    'ENABLED': True,
+    'MODE': 'warn',  # produção: warning estruturado no logger 'query_budget'
+    'DEFAULT': None,  # views sem orçamento declarado não são limitadas
+    'HEADERS': DEBUG,  # X-Query-Count / X-Query-Time-Ms nas respostas
+}
+
+# Métricas Prometheus em /metrics (core.metrics)
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+    # gunicorn: diretório compartilhado para somar todos os workers
+    'MULTIPROCESS_DIR': config('METRICS_MULTIPROCESS_DIR', default=''),
+    'FLUSH_INTERVAL': 5,
+    # Acesso: Bearer METRICS_TOKEN, IP/rede liberado (REMOTE_ADDR) ou usuário
+    # staff; sem token nem IPs configurados só staff lê /metrics
+    'TOKEN': config('METRICS_TOKEN', default=''),
+    'ALLOWED_IPS': [ip.strip() for ip in config('METRICS_ALLOWED_IPS', default='').split(',') if ip.strip()],
+    # Snapshot sem gravação há mais de MAX_AGE segundos = processo encerrado
+    # (em qualquer host): somado ao metrics-archive.json e apagado. Os vivos
+    # regravam a cada FLUSH_INTERVAL; 0 = nunca arquivar
+    'MAX_AGE': config('METRICS_MAX_AGE', default=300, cast=int),
+}
+
 # Configuração do DRF Spectacular
 SPECTACULAR_SETTINGS = {
     'TITLE': 'DX Suporte API',
@@ -263,6 +371,23 @@ SPECTACULAR_SETTINGS = {
 # Configurações da API
 API_VERSION = 'v1' 
 
+# Schema OpenAPI pré-gerado (comando build_openapi_schema, servido por api.schema)
+OPENAPI_SCHEMA_CACHE = {
+    'ENABLED': True,
+    'FILE': BASE_DIR / 'build' / 'openapi-schema.json',
+}
+
+# Importação em massa de usuários (comando import_usuarios e /usuarios/importar/)
+IMPORTACAO_USUARIOS = {
+    'WORKERS': config('IMPORTACAO_WORKERS', default=0, cast=int),  # comando import_usuarios; 0 = nº de CPUs
+    'API_WORKERS': config('IMPORTACAO_API_WORKERS', default=2, cast=int),  # threads de hash no endpoint
+    'BATCH_SIZE': 1000,  # usuários por bulk_create
+    'LOOKUP_BATCH_SIZE': 5000,  # emails/usernames por consulta de unicidade
+    # Cada linha é um PBKDF2 (~1M iterações) nas API_WORKERS threads: o limite
+    # mantém a requisição dentro do timeout do worker; acima disso, o comando
+    'MAX_LINHAS_API': config('IMPORTACAO_MAX_LINHAS_API', default=100, cast=int),
+}
+
 # Configurações do controle de acesso
 CONTROLE_ACESSO = {
     # Apps que devem ser ignorados na geração automática de permissões
@@ -290,16 +415,47 @@ CONTROLE_ACESSO = {
     # Cache settings
     'CACHE_TIMEOUT': 300,  # 5 minutos
     'USE_CACHE': True,
+
+    # Auditoria automática de Group.permissions, Usuario.groups e Usuario.user_permissions
+    'AUDIT_M2M_CHANGES': True,
+
+    # Respostas de list/retrieve do catálogo de permissões em cache
+    # (apps.controle_acesso.catalog_cache; invalidadas ao salvar/excluir permissão)
+    'CATALOG_RESPONSE_CACHE': config('CATALOG_RESPONSE_CACHE', default=True, cast=bool),
+    'CATALOG_CACHE_TIMEOUT': 3600,
+    # A versão do catálogo precisa valer para todos os workers: com o cache
+    # locmem (por processo) o cache de respostas fica desligado
+    'CATALOG_CACHE_REQUIRE_SHARED': True,
+
+    # Retenção do log de auditoria (management command archive_audit_logs)
+    'AUDIT_RETENTION_DAYS': config('AUDIT_RETENTION_DAYS', default=365, cast=int),
+    'AUDIT_ARCHIVE_DIR': config('AUDIT_ARCHIVE_DIR', default=str(BASE_DIR / 'archives' / 'audit_logs')),
+    'AUDIT_ARCHIVE_CHUNK_SIZE': 2000,
+    'AUDIT_DELETE_BATCH_SIZE': 1000,
 }
 
 # Configuração para debug de permissões em testes
 DEBUG_PERMISSIONS = config('DEBUG_PERMISSIONS', default=False, cast=bool)
 
 # Em testes, ativar debug E desativar auto-sync
-if 'test' in sys.argv:
+# (manage.py test ou pytest: o runner do pytest já está importado ao carregar os settings)
+TESTING = 'test' in sys.argv or 'pytest' in sys.modules
+
+if TESTING:
     DEBUG_PERMISSIONS = True
     # CRÍTICO: Desativar auto-sync em testes para evitar conflitos
     CONTROLE_ACESSO['AUTO_SYNC_AFTER_MIGRATE'] = False
+    # Estourar orçamento de queries falha o teste
+    QUERY_BUDGET['MODE'] = 'raise'
+    # Todos os testes logam do mesmo IP; os testes do throttle o reativam
+    LOGIN_THROTTLE['ENABLED'] = False
+    # O rollback entre testes não passa pelos signals: respostas do catálogo
+    # ficariam no cache de um teste para o outro (os testes do cache o reativam)
+    CONTROLE_ACESSO['CATALOG_RESPONSE_CACHE'] = False
+    # Testes rodam em um processo só: o locmem vale como cache compartilhado
+    # (os testes do cache por processo reativam a exigência)
+    AUTH_SNAPSHOT['REQUIRE_SHARED_CACHE'] = False
+    REFRESH_COALESCING['REQUIRE_SHARED_CACHE'] = False
 
 
 # CONFIGURAÇÕES CORS - ADICIONAR no final do arquivo
@@ -320,6 +476,9 @@ CORS_ALLOWED_HEADERS = list(default_headers) + [
     'x-requested-with',
 ]
 
+# Validadores legíveis pelo frontend (GET condicional)
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
@@ -1,18 +1,19 @@
 from django.contrib import admin
 from django.urls import path, include
+from core.metrics import metrics_view
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularSwaggerView,
     SpectacularRedocView
 )
+from api.schema import CachedSpectacularAPIView
 
 urlpatterns = [
     # Admin Interface
     path('admin/', admin.site.urls),
     
     # API Documentation
-    # OpenAPI schema generation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # OpenAPI schema (pré-gerado, servido da memória com ETag/gzip)
+    path('api/schema/', CachedSpectacularAPIView.as_view(), name='schema'),
     # Swagger UI
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     # ReDoc
@@ -20,4 +21,7 @@ urlpatterns = [
     
     # APIs
     path('api/v1/', include('endpoints.v1.urls')),
+    
+    # Métricas (formato Prometheus)
+    path('metrics', metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -4,3 +4,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
     label = 'accounts'
+
+    def ready(self):
+        """Conectar signals do snapshot de autenticação e do filtro da blacklist"""
+        from . import authentication, token_blacklist  # noqa: F401
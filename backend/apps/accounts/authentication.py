@@ -0,0 +1,195 @@
+"""
+Autenticação JWT sem leitura do usuário a cada request
+
+O JWTAuthentication padrão busca a linha de sis_usuarios em todo request só
+para checar is_active e montar request.user; depois a camada de permissões
+busca grupos e permissões de novo. Aqui o request.user é um UsuarioSnapshot:
+
+- montado a partir do user_id do token + um snapshot em cache (id, flags,
+  ids de grupos, permissões efetivas e versão das ACLs);
+- o model real só é carregado (uma query) quando a view acessa um campo ou
+  método fora do snapshot, ou grava algo no usuário;
+- o snapshot é descartado quando o usuário é salvo (ex: inativação no
+  perform_destroy ou edição de is_active) ou quando a versão global das
+  ACLs muda (grupos, permissões e vínculos).
+
+A invalidação só vale para todos os workers com o cache do Django
+compartilhado (Redis/Memcached): com o locmem um usuário inativado em um
+processo continuaria autenticando nos demais até o TIMEOUT. Nesses
+backends o snapshot fica desligado (JWTAuthentication padrão, usuário lido
+do banco a cada request), salvo REQUIRE_SHARED_CACHE=False.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.accounts.models import Usuario
+from apps.accounts.token_blacklist import cache_local_recusado
+from apps.controle_acesso.utils import get_acl_version
+from core.metrics import record_cache_access
+
+CACHE_KEY_USER_SNAPSHOT = 'user_snapshot_{user_id}'
+
+# Campos do model que o snapshot responde sem ir ao banco
+CAMPOS_SNAPSHOT = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser']
+
+
+def _config():
+    config = {'ENABLED': True, 'TIMEOUT': 120, 'REQUIRE_SHARED_CACHE': True}
+    config.update(getattr(settings, 'AUTH_SNAPSHOT', {}))
+    return config
+
+
+def snapshot_ativo():
+    """Snapshot habilitado e com cache compartilhado (senão o usuário vem do banco)"""
+    config = _config()
+    return config['ENABLED'] and not cache_local_recusado('AUTH_SNAPSHOT', config)
+
+
+def build_user_snapshot(user_id):
+    """Montar o snapshot do banco (None se o usuário não existe)"""
+    versao = get_acl_version()  # lida antes das queries: mudança no meio invalida
+    dados = Usuario.objects.filter(pk=user_id).values(*CAMPOS_SNAPSHOT).first()
+    if dados is None:
+        return None
+
+    dados['group_ids'] = sorted(
+        Usuario.groups.through.objects.filter(usuario_id=user_id).values_list('group_id', flat=True)
+    )
+    permissoes = set()
+    if dados['is_active'] and not dados['is_superuser']:
+        # Mesmo conjunto do ModelBackend.get_all_permissions (diretas + grupos)
+        permissoes = set(
+            Permission.objects.filter(Q(user=user_id) | Q(group__in=dados['group_ids']))
+            .values_list('content_type__app_label', 'codename')
+        )
+    dados['permissoes'] = sorted(f"{app_label}.{codename}" for app_label, codename in permissoes)
+    dados['acl_version'] = versao
+    return dados
+
+
+def get_user_snapshot(user_id):
+    """Snapshot do cache, remontado se ausente ou de outra versão das ACLs"""
+    cache_key = CACHE_KEY_USER_SNAPSHOT.format(user_id=user_id)
+    snapshot = cache.get(cache_key)
+    valido = snapshot is not None and snapshot['acl_version'] == get_acl_version()
+    record_cache_access('user_snapshot', valido)
+
+    if not valido:
+        snapshot = build_user_snapshot(user_id)
+        if snapshot is not None:
+            cache.set(cache_key, snapshot, _config()['TIMEOUT'])
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    """Descartar o snapshot de um usuário"""
+    cache.delete(CACHE_KEY_USER_SNAPSHOT.format(user_id=user_id))
+
+
+class UsuarioSnapshot(LazyObject):
+    """
+    request.user leve: responde pelo snapshot e carrega o Usuario real sob
+    demanda (qualquer atributo fora do snapshot, gravação ou isinstance).
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, snapshot):
+        self.__dict__['_snapshot'] = snapshot
+        super().__init__()
+
+    def _setup(self):
+        self._wrapped = Usuario.objects.get(pk=self._snapshot['id'])
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            if name == 'pk':
+                return self._snapshot['id']
+            if name in self._snapshot:
+                return self._snapshot[name]
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True  # `request.user and ...` (IsAuthenticated) não carrega o model
+
+    def __hash__(self):
+        return hash(self._snapshot['id'])  # igual ao Model.__hash__ (pk)
+
+    def __repr__(self):
+        if self._wrapped is empty:
+            return f"<UsuarioSnapshot: {self._snapshot['id']}>"
+        return super().__repr__()
+
+    # Permissões sem tocar o banco (mesma regra de PermissionsMixin)
+    def get_all_permissions(self, obj=None):
+        if obj is not None or self._wrapped is not empty:
+            return self._load().get_all_permissions(obj)
+        if not self._snapshot['is_active']:
+            return set()
+        if self._snapshot['is_superuser']:
+            return {
+                f"{app_label}.{codename}"
+                for app_label, codename in Permission.objects.values_list('content_type__app_label', 'codename')
+            }
+        return set(self._snapshot['permissoes'])
+
+    def has_perm(self, perm, obj=None):
+        if obj is not None or self._wrapped is not empty:
+            return self._load().has_perm(perm, obj)
+        if self._snapshot['is_active'] and self._snapshot['is_superuser']:
+            return True
+        return self._snapshot['is_active'] and perm in self._snapshot['permissoes']
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def _load(self):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped
+
+
+class SnapshotJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que devolve um UsuarioSnapshot em vez do model"""
+
+    def get_user(self, validated_token):
+        if not snapshot_ativo() or api_settings.CHECK_REVOKE_TOKEN:
+            # Revogação por troca de senha exige o hash: caminho padrão
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshot = get_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return UsuarioSnapshot(snapshot)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidate_snapshot_usuario_salvo(sender, instance, update_fields=None, **kwargs):
+    """Usuário salvo (inativação, edição de flags...): descartar snapshot"""
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_SNAPSHOT):
+        return  # ex: set_online/set_offline não mudam o snapshot
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=Usuario)
+def invalidate_snapshot_usuario_removido(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk)
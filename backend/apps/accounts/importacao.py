@@ -0,0 +1,301 @@
+"""
+Importação em massa de usuários (CSV/JSON)
+
+Fluxo em uma passada:
+1. Validação de todas as linhas (campos, formato, duplicidade no arquivo)
+2. Unicidade de email/username contra o banco com lookups em set
+   (uma query por lote de linhas, não uma por usuário)
+3. Hash das senhas (PBKDF2) em paralelo: pool de processos no comando
+   import_usuarios; no endpoint, poucas threads (API_WORKERS), sem criar
+   processos a partir do worker web (o PBKDF2 do hashlib libera o GIL)
+4. Inserção com bulk_create em lotes
+
+Erros são reportados por linha, sem abortar a importação das demais.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import Usuario
+
+CAMPOS_IMPORTACAO = ['username', 'email', 'password', 'first_name', 'last_name', 'telefone']
+CAMPOS_OBRIGATORIOS = ['username', 'email', 'password']
+TAMANHO_MAXIMO = {
+    'username': 150,
+    'email': 254,
+    'first_name': 150,
+    'last_name': 150,
+    'telefone': 15,
+}
+SENHA_MIN_LENGTH = 8  # Mesmo mínimo do UsuarioCreateSerializer
+
+
+def get_import_config():
+    """Configurações da importação (IMPORTACAO_USUARIOS)"""
+    config = getattr(settings, 'IMPORTACAO_USUARIOS', {})
+    return {
+        'workers': config.get('WORKERS') or os.cpu_count() or 1,
+        'api_workers': config.get('API_WORKERS', 2),
+        'batch_size': config.get('BATCH_SIZE', 1000),
+        'lookup_batch_size': config.get('LOOKUP_BATCH_SIZE', 5000),
+        'max_linhas_api': config.get('MAX_LINHAS_API', 100),
+    }
+
+
+# ============================================================
+# Leitura do arquivo
+# ============================================================
+
+def ler_arquivo(conteudo, formato):
+    """
+    Converter o conteúdo (str ou bytes) em lista de dicts.
+
+    CSV: cabeçalho com os nomes dos campos. JSON: lista de objetos
+    (ou objeto com a chave "usuarios").
+    """
+    if isinstance(conteudo, bytes):
+        conteudo = conteudo.decode('utf-8-sig')
+
+    if formato == 'csv':
+        return list(csv.DictReader(io.StringIO(conteudo)))
+
+    if formato == 'json':
+        dados = json.loads(conteudo)
+        if isinstance(dados, dict):
+            dados = dados.get('usuarios', [])
+        if not isinstance(dados, list):
+            raise ValueError('JSON deve ser uma lista de usuários.')
+        return dados
+
+    raise ValueError(f"Formato inválido: {formato}. Use csv ou json.")
+
+
+def detectar_formato(nome_arquivo):
+    return 'json' if str(nome_arquivo).lower().endswith('.json') else 'csv'
+
+
+# ============================================================
+# Validação
+# ============================================================
+
+def _normalizar_linha(row):
+    if not isinstance(row, dict):
+        return None
+    return {
+        campo: str(row.get(campo) or '').strip() if campo != 'password' else str(row.get(campo) or '')
+        for campo in CAMPOS_IMPORTACAO
+    }
+
+
+def _validar_campos(dados):
+    """Validações que não dependem do banco"""
+    erros = {}
+    for campo in CAMPOS_OBRIGATORIOS:
+        if not dados[campo]:
+            erros[campo] = 'Este campo é obrigatório.'
+
+    for campo, limite in TAMANHO_MAXIMO.items():
+        if len(dados[campo]) > limite:
+            erros[campo] = f'Máximo de {limite} caracteres.'
+
+    if dados['email'] and 'email' not in erros:
+        try:
+            validate_email(dados['email'])
+        except ValidationError:
+            erros['email'] = 'Email inválido.'
+
+    if dados['username'] and 'username' not in erros:
+        try:
+            UnicodeUsernameValidator()(dados['username'])
+        except ValidationError:
+            erros['username'] = 'Username inválido.'
+
+    if dados['password'] and len(dados['password']) < SENHA_MIN_LENGTH:
+        erros['password'] = f'A senha deve ter pelo menos {SENHA_MIN_LENGTH} caracteres.'
+
+    return erros
+
+
+def _existentes_no_banco(emails, usernames, lookup_batch_size):
+    """Emails (minúsculos) e usernames já cadastrados, em lotes de IN (...)"""
+    emails = list(emails)
+    usernames = list(usernames)
+    emails_existentes = set()
+    usernames_existentes = set()
+    total = max(len(emails), len(usernames))
+    for inicio in range(0, total, lookup_batch_size):
+        lote_emails = emails[inicio:inicio + lookup_batch_size]
+        lote_usernames = usernames[inicio:inicio + lookup_batch_size]
+        for email, username in Usuario.objects.filter(
+            Q(email__in=lote_emails) | Q(username__in=lote_usernames)
+        ).values_list('email', 'username'):
+            emails_existentes.add(email.lower())
+            usernames_existentes.add(username)
+    return emails_existentes, usernames_existentes
+
+
+def validar_linhas(rows, lookup_batch_size=5000):
+    """
+    Validar todas as linhas em uma passada.
+
+    Retorna (validas, erros): validas é lista de (número da linha, dados)
+    e erros é lista de {'linha': n, 'erros': {...}}. A numeração começa
+    em 1 (primeira linha de dados).
+    """
+    normalizadas = []
+    erros = []
+    for numero, row in enumerate(rows, start=1):
+        dados = _normalizar_linha(row)
+        if dados is None:
+            erros.append({'linha': numero, 'erros': {'detail': 'Linha inválida.'}})
+            continue
+        dados['email'] = Usuario.objects.normalize_email(dados['email'])
+        erros_linha = _validar_campos(dados)
+        if erros_linha:
+            erros.append({'linha': numero, 'erros': erros_linha})
+            continue
+        normalizadas.append((numero, dados))
+
+    # Unicidade contra o banco: um lookup em set por linha
+    emails_banco, usernames_banco = _existentes_no_banco(
+        {dados['email'] for _, dados in normalizadas},
+        {dados['username'] for _, dados in normalizadas},
+        lookup_batch_size,
+    )
+
+    validas = []
+    emails_vistos = set()
+    usernames_vistos = set()
+    for numero, dados in normalizadas:
+        email = dados['email'].lower()
+        erros_linha = {}
+        if email in emails_banco:
+            erros_linha['email'] = 'Já existe um usuário com este email.'
+        elif email in emails_vistos:
+            erros_linha['email'] = 'Email duplicado no arquivo.'
+        if dados['username'] in usernames_banco:
+            erros_linha['username'] = 'Já existe um usuário com este username.'
+        elif dados['username'] in usernames_vistos:
+            erros_linha['username'] = 'Username duplicado no arquivo.'
+
+        emails_vistos.add(email)
+        usernames_vistos.add(dados['username'])
+
+        if erros_linha:
+            erros.append({'linha': numero, 'erros': erros_linha})
+        else:
+            validas.append((numero, dados))
+
+    erros.sort(key=lambda erro: erro['linha'])
+    return validas, erros
+
+
+# ============================================================
+# Hash das senhas e inserção
+# ============================================================
+
+def _inicializar_worker():
+    """Garantir Django configurado nos processos (start method spawn)"""
+    import django
+    from django.apps import apps as django_apps
+    if not django_apps.ready:
+        django.setup()
+
+
+def hash_senhas(senhas, workers=1, processos=True):
+    """
+    Gerar hashes (make_password) em paralelo, preservando a ordem.
+
+    processos=False usa threads (endpoint da API): nada de fork do worker web.
+    """
+    if workers <= 1 or len(senhas) < 2:
+        return [make_password(senha) for senha in senhas]
+
+    workers = min(workers, len(senhas))
+    if not processos:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(make_password, senhas))
+
+    chunksize = max(1, len(senhas) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker) as executor:
+        return list(executor.map(make_password, senhas, chunksize=chunksize))
+
+
+def _inserir_lote(lote):
+    """
+    Inserir um lote com bulk_create.
+
+    Se o lote falhar (ex: usuário criado por outro processo no meio da
+    importação), insere linha a linha para isolar as linhas com erro.
+    """
+    try:
+        with transaction.atomic():
+            Usuario.objects.bulk_create([usuario for _, usuario in lote])
+        return len(lote), []
+    except IntegrityError:
+        pass
+
+    criados = 0
+    erros = []
+    for numero, usuario in lote:
+        try:
+            with transaction.atomic():
+                usuario.save(force_insert=True)
+            criados += 1
+        except IntegrityError:
+            erros.append({'linha': numero, 'erros': {'detail': 'Usuário já existe (email ou username).'}})
+    return criados, erros
+
+
+def importar_usuarios(rows, workers=None, batch_size=None, dry_run=False, processos=True):
+    """
+    Importar usuários a partir de uma lista de dicts.
+
+    processos=False: hash em threads (ver hash_senhas).
+    Retorna {'total', 'validos', 'criados', 'erros'}.
+    """
+    config = get_import_config()
+    workers = config['workers'] if workers is None else workers
+    batch_size = batch_size or config['batch_size']
+
+    rows = list(rows)
+    validas, erros = validar_linhas(rows, lookup_batch_size=config['lookup_batch_size'])
+    resultado = {
+        'total': len(rows),
+        'validos': len(validas),
+        'criados': 0,
+        'erros': erros,
+    }
+    if dry_run or not validas:
+        return resultado
+
+    hashes = hash_senhas([dados['password'] for _, dados in validas], workers=workers, processos=processos)
+
+    usuarios = []
+    for (numero, dados), senha_hash in zip(validas, hashes):
+        usuarios.append((numero, Usuario(
+            username=dados['username'],
+            email=dados['email'],
+            password=senha_hash,
+            first_name=dados['first_name'],
+            last_name=dados['last_name'],
+            telefone=dados['telefone'] or None,
+        )))
+
+    for inicio in range(0, len(usuarios), batch_size):
+        criados, erros_lote = _inserir_lote(usuarios[inicio:inicio + batch_size])
+        resultado['criados'] += criados
+        resultado['erros'].extend(erros_lote)
+
+    resultado['erros'].sort(key=lambda erro: erro['linha'])
+    return resultado
@@ -0,0 +1,266 @@
+"""
+Login assíncrono com o hash da senha fora do event loop
+
+O PBKDF2 do authenticate() é CPU puro: no pico de login da manhã cada hash
+prende um worker web por centenas de ms e os demais requests esperam. Sob
+ASGI o POST /api/v1/auth/login/ é atendido pela view assíncrona login_view:
+
+- leitura do usuário e emissão dos tokens: ORM via sync_to_async (rápido);
+- check_password: em um pool próprio (threads ou processos, WORKERS),
+  dimensionado separado dos workers web; o hashlib libera o GIL durante o
+  PBKDF2, então o pool de threads já paraleliza o hash;
+- rate limit por email/IP (throttles da view síncrona, accounts.throttling)
+  antes do pool: 429 sem hash;
+- limite de concorrência: acima de MAX_PENDING hashes na fila/executando, o
+  login é recusado na hora com 503 + Retry-After; um hash que esperou mais
+  que QUEUE_TIMEOUT na fila nem é calculado (o cliente já desistiu);
+- métricas: login_hash_queue_seconds (espera na fila), login_hash_seconds
+  (duração do hash) e login_async_total{result}.
+
+A login_view é a view do URLconf: passa pelos middlewares como qualquer
+outra e reaproveita o dispatch do CustomTokenObtainPairView (parsers,
+throttles, erros do serializer, renderer), então a resposta é a mesma da
+view síncrona (refresh, access, user). GET, LOGIN_ASYNC['ENABLED']=False
+e requests WSGI (runserver, gunicorn sync) seguem direto para a view
+síncrona; o pool só atua sob ASGI (uvicorn/daphne).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, AuthenticationFailed, ParseError, Throttled
+from rest_framework.response import Response
+
+from core.metrics import inc, observe
+
+from .models import Usuario
+from .serializers import CustomTokenObtainPairSerializer
+from .views import CustomTokenObtainPairView
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'EXECUTOR': 'thread',  # 'thread' ou 'process'
+    'WORKERS': 4,  # hashes simultâneos por processo web
+    'MAX_PENDING': 64,  # hashes na fila + executando antes de recusar com 503
+    'QUEUE_TIMEOUT': 2.0,  # segundos máximos de espera na fila
+    'RETRY_AFTER': 1,  # segundos sugeridos no Retry-After do 503
+    'MAX_BODY': 4096,  # bytes aceitos no corpo do login
+}
+
+
+def get_login_async_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'LOGIN_ASYNC', {}))
+    return config
+
+
+# ============================================================
+# Pool de hash
+# ============================================================
+
+def _inicializar_processo():
+    # Workers do ProcessPoolExecutor precisam dos PASSWORD_HASHERS
+    import django
+    django.setup()
+
+
+def verificar_senha(senha, encoded, enviado_em, queue_timeout):
+    """
+    Executado no pool: (ok, precisa_rehash, espera, duracao) ou None se a
+    espera na fila passou de queue_timeout. encoded=None roda um hash
+    descartável, como o ModelBackend, para não revelar se o email existe.
+    """
+    inicio = time.time()
+    espera = max(inicio - enviado_em, 0.0)
+    if espera > queue_timeout:
+        return None
+
+    precisa_rehash = False
+    if encoded is None:
+        make_password(senha)
+        ok = False
+    else:
+        ok = check_password(senha, encoded)
+        if ok:
+            # Mesma regra do check_password com setter (troca de hasher/iterações)
+            preferido = get_hasher('default')
+            precisa_rehash = (
+                identify_hasher(encoded).algorithm != preferido.algorithm
+                or preferido.must_update(encoded)
+            )
+    return ok, precisa_rehash, espera, time.time() - inicio
+
+
+class PoolHash:
+    """Executor limitado do hash de senha (um por processo web)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pendentes = 0
+
+    @property
+    def pendentes(self):
+        return self._pendentes
+
+    def _get_executor(self, config):
+        with self._lock:
+            if self._executor is None:
+                if config['EXECUTOR'] == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=config['WORKERS'], initializer=_inicializar_processo
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=config['WORKERS'], thread_name_prefix='login-hash'
+                    )
+            return self._executor
+
+    def reservar(self, config):
+        """Reservar uma vaga (False = fila cheia)"""
+        with self._lock:
+            if self._pendentes >= config['MAX_PENDING']:
+                return False
+            self._pendentes += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self._pendentes -= 1
+
+    async def verificar(self, senha, encoded, config):
+        """Rodar verificar_senha no pool sem bloquear o event loop"""
+        executor = self._get_executor(config)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, verificar_senha, senha, encoded, time.time(), config['QUEUE_TIMEOUT']
+        )
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pendentes = 0
+
+
+pool_hash = PoolHash()
+
+
+# ============================================================
+# View assíncrona
+# ============================================================
+
+class LoginIndisponivel(APIException):
+    """Pool de hash cheio ou espera na fila acima de QUEUE_TIMEOUT (503 + Retry-After)"""
+    status_code = 503
+    default_detail = 'Muitos logins simultâneos. Tente novamente em instantes.'
+    default_code = 'login_indisponivel'
+
+    def __init__(self, resultado, wait):
+        super().__init__()
+        self.resultado = resultado
+        self.wait = wait
+
+
+def _buscar_usuario(email):
+    try:
+        return Usuario._default_manager.get_by_natural_key(email)
+    except Usuario.DoesNotExist:
+        return None
+
+
+def _concluir_login(usuario, senha, precisa_rehash):
+    if precisa_rehash:
+        # Mesmo comportamento do check_password do model (upgrade do hasher)
+        usuario.set_password(senha)
+        usuario.save(update_fields=['password'])
+    return CustomTokenObtainPairSerializer.dados_login(usuario)
+
+
+def _resultado(exc):
+    """Label result do login_async_total para uma exceção da view"""
+    if isinstance(exc, LoginIndisponivel):
+        return exc.resultado
+    if isinstance(exc, Throttled):
+        return 'throttled'
+    if isinstance(exc, AuthenticationFailed):
+        return 'invalid'
+    return 'bad_request'
+
+
+async def _autenticar(view, request, config):
+    """Credenciais validadas pelo serializer do login, com o hash no pool"""
+    serializer = view.get_serializer(data=request.data)
+    # Só os campos (mesmos erros 400): o validate() chamaria o authenticate() síncrono
+    attrs = serializer.to_internal_value(request.data)
+
+    if not pool_hash.reservar(config):
+        raise LoginIndisponivel('rejected', config['RETRY_AFTER'])
+    try:
+        email, senha = attrs[serializer.username_field], attrs['password']
+        usuario = await sync_to_async(_buscar_usuario)(email)
+        resultado = await pool_hash.verificar(senha, usuario.password if usuario else None, config)
+    finally:
+        pool_hash.liberar()
+
+    if resultado is None:
+        # Esperou demais na fila: o hash nem foi calculado
+        observe('login_hash_queue_seconds', config['QUEUE_TIMEOUT'])
+        raise LoginIndisponivel('timeout', config['RETRY_AFTER'])
+
+    ok, precisa_rehash, espera, duracao = resultado
+    observe('login_hash_queue_seconds', espera)
+    observe('login_hash_seconds', duracao)
+
+    # Mesma regra do ModelBackend.user_can_authenticate e mesmo erro do serializer
+    if not ok or not usuario.is_active:
+        raise AuthenticationFailed(
+            serializer.error_messages['no_active_account'], 'no_active_account'
+        )
+    return await sync_to_async(_concluir_login)(usuario, senha, precisa_rehash)
+
+
+login_sincrono = CustomTokenObtainPairView.as_view()
+
+
+@csrf_exempt
+async def login_view(request, *args, **kwargs):
+    """
+    POST /api/v1/auth/login/ (mesmo contrato do CustomTokenObtainPairView).
+
+    Segue o APIView.dispatch da view síncrona: parsers, negociação,
+    throttles (429 antes do pool de hash), handle_exception e renderer são
+    os dela; só o authenticate() é trocado pelo hash no pool.
+    """
+    config = get_login_async_config()
+    if request.method != 'POST' or not config['ENABLED'] or not isinstance(request, ASGIRequest):
+        # Sob WSGI o worker já está preso ao request: o pool não ajuda
+        return await sync_to_async(login_sincrono)(request, *args, **kwargs)
+
+    view = CustomTokenObtainPairView()
+    view.setup(request, *args, **kwargs)
+    request = view.initialize_request(request, *args, **kwargs)
+    view.request = request
+    view.headers = view.default_response_headers
+    try:
+        if len(request.body) > config['MAX_BODY']:
+            raise ParseError('Corpo da requisição muito grande.')
+        view.initial(request, *args, **kwargs)
+        response = Response(await _autenticar(view, request, config), status=200)
+        inc('login_async_total', (('result', 'success'),))
+    except Exception as exc:
+        inc('login_async_total', (('result', _resultado(exc)),))
+        response = view.handle_exception(exc)
+    return view.finalize_response(request, response, *args, **kwargs)
+
+
+# Schema (drf-spectacular) e orçamento de queries lidos da view síncrona
+login_view.cls = CustomTokenObtainPairView
+login_view.initkwargs = {}
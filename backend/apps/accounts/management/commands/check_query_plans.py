@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.views import UsuarioViewSet
+from core.query_plans import explicar
+
+# Filtros do UsuarioFilter combinados com cada ordenação da listagem
+FILTROS = {
+    'ativos': {},
+    'online': {'is_online': 'true'},
+    'periodo': {'created_after': '2024-01-01', 'created_before': '2024-12-31'},
+    'online+periodo': {'is_online': 'true', 'created_after': '2024-01-01', 'created_before': '2024-12-31'},
+}
+
+
+def querysets_listagem(page_size):
+    """(nome, queryset) da página e do count de cada combinação filtro/ordenação"""
+    factory = APIRequestFactory()
+    for nome_filtro, params in FILTROS.items():
+        queryset = None
+        for ordenacao in UsuarioViewSet.ordering_fields:
+            request = Request(factory.get('/', {**params, 'ordering': ordenacao}))
+            view = UsuarioViewSet(request=request, format_kwarg=None, action='list', args=(), kwargs={})
+            queryset = view.filter_queryset(view.get_queryset())
+            yield f'{nome_filtro} ordering={ordenacao}', queryset[:page_size]
+        # COUNT(*) da paginação: mesmo WHERE, sem ORDER BY
+        yield f'{nome_filtro} count', queryset.order_by().values('pk')
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN das combinações de filtro/ordenação da listagem de usuários (acusa varreduras completas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=10, help='LIMIT da página (padrão: 10)')
+        parser.add_argument('--strict', action='store_true', help='Falhar também com ORDER BY fora de índice')
+        parser.add_argument('--show-plans', action='store_true', help='Imprimir o plano de cada consulta')
+        parser.add_argument('--output', type=str, default=None, help='Salvar o resultado em JSON')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔎 Conferindo planos da listagem de usuários (sis_usuarios)...')
+        resultados = []
+        for nome, queryset in querysets_listagem(options['page_size']):
+            analise = explicar(queryset)
+            resultados.append({'consulta': nome, **analise})
+
+            if analise['varreduras']:
+                icone = '❌'
+            elif analise['ordenacao']:
+                icone = '⚠️ '
+            else:
+                icone = '✅'
+            detalhes = ', '.join(analise['indices']) or '-'
+            if analise['varreduras']:
+                detalhes += f" | varredura completa: {', '.join(analise['varreduras'])}"
+            if analise['ordenacao']:
+                detalhes += ' | ORDER BY fora de índice'
+            self.stdout.write(f"{icone} {nome:<36} {detalhes}")
+            if options['show_plans']:
+                self.stdout.write(analise['plano'])
+
+        if options['output']:
+            Path(options['output']).parent.mkdir(parents=True, exist_ok=True)
+            Path(options['output']).write_text(
+                json.dumps({'resultados': resultados}, ensure_ascii=False, indent=2), encoding='utf-8'
+            )
+            self.stdout.write(f"💾 Resultado salvo em {options['output']}")
+
+        varreduras = [item for item in resultados if item['varreduras']]
+        ordenacoes = [item for item in resultados if item['ordenacao']]
+        self.stdout.write('')
+        self.stdout.write(
+            f"📊 {len(resultados)} consultas: {len(varreduras)} com varredura completa, "
+            f"{len(ordenacoes)} com ORDER BY fora de índice"
+        )
+        if varreduras or (options['strict'] and ordenacoes):
+            raise CommandError('Consultas sem índice adequado (ver acima)')
@@ -0,0 +1,63 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from apps.accounts import importacao
+
+class Command(BaseCommand):
+    help = 'Importar usuários em massa a partir de arquivo CSV ou JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', type=str, help='Caminho do arquivo CSV ou JSON')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'json'],
+            help='Formato do arquivo (padrão: pela extensão)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Processos para hash de senhas (padrão: IMPORTACAO_USUARIOS["WORKERS"] ou nº de CPUs)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Usuários por bulk_create',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas validar o arquivo, sem criar usuários',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['arquivo'])
+        if not path.exists():
+            raise CommandError(f"Arquivo não encontrado: {path}")
+
+        formato = options['formato'] or importacao.detectar_formato(path.name)
+        try:
+            rows = importacao.ler_arquivo(path.read_bytes(), formato)
+        except ValueError as e:
+            raise CommandError(f"Erro ao ler arquivo: {e}")
+
+        self.stdout.write(f"📥 Importando {len(rows)} usuários de {path.name}...")
+
+        resultado = importacao.importar_usuarios(
+            rows,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+
+        for erro in resultado['erros']:
+            detalhes = '; '.join(f"{campo}: {msg}" for campo, msg in erro['erros'].items())
+            self.stdout.write(self.style.WARNING(f"  ⚠️  Linha {erro['linha']}: {detalhes}"))
+
+        if options['dry_run']:
+            self.stdout.write(f"🔍 {resultado['validos']} usuários válidos seriam criados (DRY-RUN)")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"""✅ Importação concluída!
+   • {resultado['total']} linhas processadas
+   • {resultado['criados']} usuários criados
+   • {len(resultado['erros'])} linhas com erro""")
+        )
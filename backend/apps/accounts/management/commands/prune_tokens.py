@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from apps.accounts import token_blacklist
+
+class Command(BaseCommand):
+    help = 'Remover em lotes os refresh tokens expirados (OutstandingToken + BlacklistedToken)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens removidos por lote (padrão: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Pausa em segundos entre lotes (padrão: 0.1)')
+        parser.add_argument('--max-batches', type=int, default=None, help='Parar após N lotes por passada')
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Rodar continuamente (job em background), uma passada a cada --interval segundos',
+        )
+        parser.add_argument('--interval', type=float, default=300, help='Segundos entre passadas no modo --loop')
+        parser.add_argument(
+            '--nice',
+            type=int,
+            default=0,
+            help='Incremento de nice do processo (ex: 10 = baixa prioridade de CPU)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Apenas contar os tokens expirados')
+
+    def handle(self, *args, **options):
+        if options['nice']:
+            os.nice(options['nice'])
+
+        if options['dry_run']:
+            count = OutstandingToken.objects.filter(expires_at__lt=timezone.now()).count()
+            self.stdout.write(f"🔍 {count} tokens expirados seriam removidos (DRY-RUN)")
+            return
+
+        while True:
+            self.passada(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def passada(self, options):
+        self.stdout.write(f"🧹 Removendo tokens expirados em lotes de {options['batch_size']}...")
+        inicio = time.perf_counter()
+        outstanding = blacklisted = 0
+        for lote in token_blacklist.prune_expired_tokens(
+            batch_size=options['batch_size'], sleep=options['sleep'], max_lotes=options['max_batches']
+        ):
+            outstanding += lote['outstanding']
+            blacklisted += lote['blacklisted']
+            self.stdout.write(
+                f"  🗑️  Lote {lote['lote']}: {lote['outstanding']} outstanding, "
+                f"{lote['blacklisted']} blacklisted (até pk {lote['ultimo_pk']})"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Limpeza concluída em {time.perf_counter() - inicio:.1f}s! "
+            f"{outstanding} outstanding e {blacklisted} blacklisted removidos."
+        ))
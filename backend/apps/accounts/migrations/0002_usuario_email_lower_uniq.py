@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:58
+
+import apps.accounts.models
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import Lower
+
+
+def normalizar_emails(apps, schema_editor):
+    """Emails existentes em minúsculas (falha se dois só diferem na caixa)"""
+    Usuario = apps.get_model('accounts', 'Usuario')
+    duplicados = list(
+        Usuario.objects.annotate(email_normalizado=Lower('email'))
+        .values('email_normalizado').annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('email_normalizado', flat=True)[:20]
+    )
+    if duplicados:
+        raise RuntimeError(
+            'Emails que só diferem em maiúsculas/minúsculas precisam ser resolvidos '
+            f'antes desta migração: {", ".join(duplicados)}'
+        )
+    Usuario.objects.annotate(email_normalizado=Lower('email')).exclude(
+        email=F('email_normalizado')
+    ).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='usuario',
+            managers=[
+                ('objects', apps.accounts.models.UsuarioManager()),
+            ],
+        ),
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usuario',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='sis_usuarios_email_lower_uniq'),
+        ),
+    ]
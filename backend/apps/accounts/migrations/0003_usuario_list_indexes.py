@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_usuario_email_lower_uniq'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'username'], name='usuario_ativo_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'email'], name='usuario_ativo_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'first_name'], name='usuario_ativo_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'last_name'], name='usuario_ativo_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'date_joined'], name='usuario_ativo_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'last_login'], name='usuario_ativo_login_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'is_online', 'username'], name='usuario_ativo_online_idx'),
+        ),
+    ]
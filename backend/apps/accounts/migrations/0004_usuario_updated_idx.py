@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_usuario_list_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_active', 'updated_at'], name='usuario_ativo_updated_idx'),
+        ),
+    ]
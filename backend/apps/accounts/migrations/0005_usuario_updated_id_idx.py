@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_usuario_updated_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['updated_at', 'id'], name='usuario_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 20:20
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_usuario_updated_id_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='usuario',
+            name='sis_usuarios_email_lower_uniq',
+        ),
+        migrations.AddConstraint(
+            model_name='usuario',
+            constraint=models.CheckConstraint(condition=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='sis_usuarios_email_minusculo'),
+        ),
+    ]
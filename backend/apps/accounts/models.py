@@ -1,7 +1,27 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+
+def normalizar_email(email):
+    """Email em minúsculas: chave do login e da unicidade case-insensitive"""
+    return email.strip().lower() if email else email
+
+
+class UsuarioManager(UserManager):
+    """Manager com email normalizado na criação e no login"""
+
+    @classmethod
+    def normalize_email(cls, email):
+        # O padrão só baixa o domínio; aqui o email inteiro (ver Usuario.Meta)
+        return normalizar_email(super().normalize_email(email))
+
+    def get_by_natural_key(self, email):
+        # Emails gravados em minúsculas (ver Usuario.Meta): uma busca no índice único de email
+        return self.get(email=normalizar_email(email))
+
+
 class Usuario(AbstractUser):
     # Campos adicionais
     email = models.EmailField(unique=True)
@@ -19,26 +39,71 @@ class Usuario(AbstractUser):
     USERNAME_FIELD = 'email'  # Login por email
     REQUIRED_FIELDS = ['username']
     
+    objects = UsuarioManager()
+    
     class Meta:
         db_table = 'sis_usuarios'
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
+        constraints = [
+            # Email só em minúsculas: com isso o índice único de email (unique=True,
+            # exigido pelo USERNAME_FIELD) já não diferencia maiúsculas, sem um
+            # segundo índice único em LOWER(email)
+            models.CheckConstraint(condition=models.Q(email=Lower('email')), name='sis_usuarios_email_minusculo'),
+        ]
+        # Listagem (UsuarioViewSet): sempre is_active=True + uma ordenação
+        # do ordering_fields. Compostos em vez de parciais (WHERE is_active)
+        # porque o MySQL não tem índice parcial; conferir com
+        # `manage.py check_query_plans`.
+        indexes = [
+            models.Index(fields=['is_active', 'username'], name='usuario_ativo_username_idx'),
+            models.Index(fields=['is_active', 'email'], name='usuario_ativo_email_idx'),
+            models.Index(fields=['is_active', 'first_name'], name='usuario_ativo_first_name_idx'),
+            models.Index(fields=['is_active', 'last_name'], name='usuario_ativo_last_name_idx'),
+            models.Index(fields=['is_active', 'date_joined'], name='usuario_ativo_joined_idx'),
+            models.Index(fields=['is_active', 'last_login'], name='usuario_ativo_login_idx'),
+            models.Index(fields=['is_active', 'is_online', 'username'], name='usuario_ativo_online_idx'),
+            # MAX(updated_at) + COUNT dos validadores do GET condicional
+            models.Index(fields=['is_active', 'updated_at'], name='usuario_ativo_updated_idx'),
+            # Feed /changes/ por (updated_at, id), ativos e inativos
+            models.Index(fields=['updated_at', 'id'], name='usuario_updated_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
     
+    def clean(self):
+        super().clean()
+        self.email = normalizar_email(self.email)
+    
+    def save(self, *args, **kwargs):
+        self.email = normalizar_email(self.email)
+        super().save(*args, **kwargs)
+    
     def set_online(self):
         """Marca usuário como online"""
         self.is_online = True
         self.last_activity = timezone.now()
         self.logout_time = None
-        self.save(update_fields=['is_online', 'last_activity', 'logout_time'])
+        self.save(update_fields=['is_online', 'last_activity', 'logout_time', 'updated_at'])
+    
+    def registrar_login(self, atualizar_last_login=True):
+        """Login: presença + last_login em um único UPDATE"""
+        agora = timezone.now()
+        campos = ['is_online', 'last_activity', 'logout_time', 'updated_at']
+        self.is_online = True
+        self.last_activity = agora
+        self.logout_time = None
+        if atualizar_last_login:
+            self.last_login = agora
+            campos.append('last_login')
+        self.save(update_fields=campos)
     
     def set_offline(self):
         """Marca usuário como offline"""
         self.is_online = False
         self.logout_time = timezone.now()
-        self.save(update_fields=['is_online', 'logout_time'])
+        self.save(update_fields=['is_online', 'logout_time', 'updated_at'])
     
     def tempo_offline(self):
         """Retorna tempo que está offline"""
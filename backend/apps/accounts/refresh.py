@@ -0,0 +1,127 @@
+"""
+Refresh concorrente do mesmo token (single-flight com janela de graça)
+
+Quando o access token expira, o SPA dispara vários requests e cada um chama
+/auth/refresh/ com o mesmo refresh token. Com rotação + blacklist o primeiro
+invalida o token e os demais recebem 401 (novo login, tempestade de retries).
+
+Aqui os refreshes do mesmo token são coalescidos:
+- o primeiro (dono do lock no cache) rotaciona normalmente e guarda o novo
+  par por GRACE_SECONDS;
+- os concorrentes esperam até WAIT_SECONDS pelo resultado do primeiro, e
+  param assim que o lock some sem resultado (o primeiro falhou: token na
+  blacklist/inválido) para seguir pelo caminho normal e falhar na hora;
+- dentro da janela de graça o mesmo token devolve o mesmo par, em vez de
+  cunhar e colocar tokens na blacklist a cada chamada.
+
+A chave é o SHA-256 do token completo: só quem tem o token recebe o par.
+Assinatura, expiração e tipo são verificados antes do lock (verificar):
+string qualquer não segura worker esperando. O par guardado só é devolvido
+se o refresh novo não estiver na blacklist (validar_par: logout com o
+token novo encerra a janela), e o logout descarta o par do token que
+coloca na blacklist.
+Fora da janela vale a rotação normal (token na blacklist = 401). O
+coalescing só vale entre workers com cache compartilhado: com o cache
+locmem (por processo) fica desligado, salvo REQUIRE_SHARED_CACHE=False.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.accounts.token_blacklist import cache_local_recusado
+from core.metrics import inc
+
+CACHE_KEY_REFRESH_RESULT = 'refresh_result_{digest}'
+CACHE_KEY_REFRESH_LOCK = 'refresh_lock_{digest}'
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'GRACE_SECONDS': 10,  # por quanto tempo o mesmo token devolve o mesmo par
+    'WAIT_SECONDS': 5,  # espera máxima dos concorrentes pelo primeiro refresh
+    'POLL_INTERVAL': 0.05,
+    'REQUIRE_SHARED_CACHE': True,  # desligar com cache por processo (locmem)
+}
+
+
+def get_refresh_coalescing_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'REFRESH_COALESCING', {}))
+    return config
+
+
+def refresh_coalescing_ativo():
+    """Coalescing habilitado e com cache compartilhado entre os workers"""
+    config = get_refresh_coalescing_config()
+    return config['ENABLED'] and not cache_local_recusado('REFRESH_COALESCING', config)
+
+
+def chaves_refresh(token):
+    """(chave do resultado, chave do lock) do refresh token"""
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    return CACHE_KEY_REFRESH_RESULT.format(digest=digest), CACHE_KEY_REFRESH_LOCK.format(digest=digest)
+
+
+def _aguardar_resultado(chave_resultado, chave_lock, espera, intervalo):
+    """Resultado do dono do lock; None se o lock sumiu sem resultado ou o tempo acabou"""
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        time.sleep(intervalo)
+        valores = cache.get_many([chave_resultado, chave_lock])
+        if valores.get(chave_resultado) is not None:
+            return valores[chave_resultado]
+        if chave_lock not in valores:
+            # Dono terminou sem guardar o par (falhou)
+            return None
+    return None
+
+
+def descartar_resultado(token):
+    """Encerrar a janela de graça do token (logout)"""
+    cache.delete(chaves_refresh(token)[0])
+
+
+def refresh_coalescido(token, gerar, verificar=None, validar_par=None):
+    """
+    Executar gerar() (rotação) uma vez por token dentro da janela de graça.
+
+    verificar() (assinatura/tipo do token) roda antes de entrar na fila do
+    lock; validar_par(par) roda antes de devolver um par já guardado e
+    levanta exceção se ele não vale mais (refresh novo na blacklist).
+    Retorna o dict {'access', 'refresh'} gerado pelo primeiro request.
+    Exceções de gerar() (token inválido/na blacklist) não são guardadas.
+    """
+    config = get_refresh_coalescing_config()
+    chave_resultado, chave_lock = chaves_refresh(token)
+
+    def coalescido(resultado):
+        if validar_par is not None:
+            validar_par(resultado)
+        inc('token_refresh_total', (('result', 'coalesced'),))
+        return dict(resultado)
+
+    resultado = cache.get(chave_resultado)
+    if resultado is not None:
+        return coalescido(resultado)
+
+    if verificar is not None:
+        verificar()
+
+    dono = cache.add(chave_lock, 1, config['WAIT_SECONDS'] + config['GRACE_SECONDS'])
+    if not dono:
+        resultado = _aguardar_resultado(
+            chave_resultado, chave_lock, config['WAIT_SECONDS'], config['POLL_INTERVAL']
+        )
+        if resultado is not None:
+            return coalescido(resultado)
+        # Primeiro refresh falhou ou demorou demais: seguir pelo caminho normal
+
+    try:
+        resultado = gerar()
+        cache.set(chave_resultado, resultado, config['GRACE_SECONDS'])
+        inc('token_refresh_total', (('result', 'rotated'),))
+        return resultado
+    finally:
+        if dono:
+            cache.delete(chave_lock)
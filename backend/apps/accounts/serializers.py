@@ -1,10 +1,34 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import check_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Usuario
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from .models import Usuario, normalizar_email
+from .refresh import refresh_coalescido, refresh_coalescing_ativo
+from .token_blacklist import FilteredRefreshToken
 from .validators import ValidacaoCompleta
 
+class EmailNormalizadoField(serializers.EmailField):
+    """Email em minúsculas antes do UniqueValidator (mesma chave do login)"""
+    
+    def to_internal_value(self, data):
+        return normalizar_email(super().to_internal_value(data))
+
+
+# ModelSerializers que gravam email: gera EmailNormalizadoField para models.EmailField
+MAPEAMENTO_EMAIL_NORMALIZADO = {
+    **serializers.ModelSerializer.serializer_field_mapping,
+    models.EmailField: EmailNormalizadoField,
+}
+
 class UsuarioBasicoSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagem de usuários"""
     class Meta:
@@ -73,6 +97,7 @@ class UsuarioDetalhadoSerializer(serializers.ModelSerializer):
 
 class UsuarioCreateSerializer(serializers.ModelSerializer):
     """Serializer para criação de usuários"""
+    serializer_field_mapping = MAPEAMENTO_EMAIL_NORMALIZADO
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
     
@@ -109,6 +134,7 @@ class UsuarioCreateSerializer(serializers.ModelSerializer):
 
 class UsuarioSerializer(serializers.ModelSerializer):
     """Serializer para edição de usuários com validações de segurança"""
+    serializer_field_mapping = MAPEAMENTO_EMAIL_NORMALIZADO
     password = serializers.CharField(write_only=True, required=False)
     password_atual = serializers.CharField(write_only=True, required=False)
     
@@ -172,17 +198,47 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = 'email'
     
     def validate(self, attrs):
-        data = super().validate(attrs)
+        # authenticate(): única leitura do usuário
+        data = TokenObtainSerializer.validate(self, attrs)
+        data.update(self.dados_login(self.user))
+        return data
+    
+    @classmethod
+    def dados_login(cls, user):
+        """Tokens + dados do usuário já autenticado (também usado pelo login assíncrono)"""
+        refresh = cls.get_token(user)  # INSERT do OutstandingToken
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
         
-        # Marcar usuário como online
-        if hasattr(self.user, 'set_online'):
-            self.user.set_online()
-        else:
-            self.user.is_online = True
-            self.user.save()
+        # Online + last_login (UPDATE_LAST_LOGIN) em um único UPDATE
+        user.registrar_login(atualizar_last_login=jwt_settings.UPDATE_LAST_LOGIN)
         
         # ADICIONAR dados do usuário na resposta
-        from .serializers import UsuarioBasicoSerializer
-        data['user'] = UsuarioBasicoSerializer(self.user).data
-        
-        return data
\ No newline at end of file
+        data['user'] = UsuarioBasicoSerializer(user).data
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh com checagem da blacklist via Bloom filter (ver token_blacklist.py)
+    e refreshes concorrentes do mesmo token coalescidos (ver refresh.py)
+    """
+    token_class = FilteredRefreshToken
+
+    def verificar_token(self, token):
+        """Assinatura, expiração e tipo, sem a blacklist: o token já rotacionado
+        ainda recebe o par da janela de graça"""
+        payload = UntypedToken(token)
+        if payload.get(jwt_settings.TOKEN_TYPE_CLAIM) != self.token_class.token_type:
+            raise TokenError(_('Token has wrong type'))
+
+    def validate(self, attrs):
+        if not (jwt_settings.ROTATE_REFRESH_TOKENS and refresh_coalescing_ativo()):
+            return super().validate(attrs)
+        rotacionar = super().validate
+        return refresh_coalescido(
+            attrs['refresh'],
+            lambda: rotacionar(attrs),
+            verificar=lambda: self.verificar_token(attrs['refresh']),
+            # Par da janela de graça só se o refresh novo não foi para a blacklist
+            validar_par=lambda par: self.token_class(par['refresh']),
+        )
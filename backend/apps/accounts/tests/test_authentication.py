@@ -1,10 +1,18 @@
+from unittest import mock
+
 import pytest
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts import token_blacklist
 from apps.accounts.models import Usuario
+from apps.accounts.authentication import UsuarioSnapshot, get_user_snapshot
 
 
 class TestAutenticacao(TestCase):
@@ -41,6 +49,27 @@ class TestAutenticacao(TestCase):
         self.assertTrue(self.usuario.is_online)
         self.assertIsNotNone(self.usuario.last_activity)  # ✅ Campo que existe
     
+    def test_login_le_usuario_uma_vez_e_grava_uma_vez(self):
+        """Teste: login = SELECT do usuário + INSERT do token + um UPDATE"""
+        data = {
+            'email': 'test@example.com',
+            'password': 'senha123'
+        }
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.login_url, data)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sqls = [q['sql'] for q in queries.captured_queries]
+        self.assertEqual(len([sql for sql in sqls if sql.startswith('SELECT') and 'sis_usuarios' in sql]), 1)
+        self.assertEqual(len([sql for sql in sqls if sql.startswith('UPDATE')]), 1)
+        self.assertEqual(len([sql for sql in sqls if sql.startswith('INSERT')]), 1)
+        
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.is_online)
+        self.assertIsNotNone(self.usuario.last_login)
+        self.assertIsNone(self.usuario.logout_time)
+    
     def test_login_credenciais_invalidas(self):
         """Teste: Login com credenciais inválidas"""
         data = {
@@ -159,4 +188,99 @@ class TestAutenticacao(TestCase):
         # Acessar endpoint protegido (pode dar 403 por falta de permissão, mas não 401)
         response = self.client.get('/api/v1/auth/usuarios/')
         
-        self.assertNotEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertNotEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestAutenticacaoSnapshot(TestCase):
+    """Testes do request.user montado a partir do snapshot em cache"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(
+            username='snapshot', email='snapshot@example.com', password='senha123', telefone='11999990000'
+        )
+        self.admin = Usuario.objects.create_superuser(
+            username='admin_snapshot', email='admin_snapshot@example.com', password='senha123'
+        )
+        self.permissao = Permission.objects.create(
+            codename='accounts_snapshot', name='Snapshot',
+            content_type=ContentType.objects.get_for_model(Usuario),
+        )
+        self.grupo = Group.objects.create(name='grupo_snapshot')
+        self.usuario.groups.add(self.grupo)
+
+    def autenticar(self, usuario):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+
+    def test_request_com_snapshot_nao_le_usuario(self):
+        """Teste: com o snapshot em cache, o request não consulta sis_usuarios"""
+        self.autenticar(self.usuario)
+        self.client.get('/api/v1/auth/minhas-permissoes/')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/auth/minhas-permissoes/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['usuario'], 'snapshot')
+        self.assertFalse([q for q in queries.captured_queries if 'sis_usuarios' in q['sql']])
+
+    def test_campo_fora_do_snapshot_carrega_model(self):
+        """Teste: atributo fora do snapshot carrega o usuário real sob demanda"""
+        usuario = UsuarioSnapshot(get_user_snapshot(self.usuario.pk))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(usuario.username, 'snapshot')
+            self.assertTrue(usuario.is_active)
+            self.assertEqual(usuario.group_ids, [self.grupo.pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(usuario.telefone, '11999990000')
+        self.assertIsInstance(usuario, Usuario)
+        self.assertEqual(usuario, self.usuario)
+
+    def test_permissao_de_grupo_invalida_snapshot(self):
+        """Teste: alterar permissões do grupo muda has_perm no próximo snapshot"""
+        self.assertFalse(UsuarioSnapshot(get_user_snapshot(self.usuario.pk)).has_perm('accounts.accounts_snapshot'))
+
+        self.grupo.permissions.add(self.permissao)
+        self.assertTrue(UsuarioSnapshot(get_user_snapshot(self.usuario.pk)).has_perm('accounts.accounts_snapshot'))
+
+        self.usuario.groups.remove(self.grupo)
+        self.assertFalse(UsuarioSnapshot(get_user_snapshot(self.usuario.pk)).has_perm('accounts.accounts_snapshot'))
+
+    def test_inativacao_invalida_snapshot(self):
+        """Teste: usuário inativado (perform_destroy) perde o acesso imediatamente"""
+        self.autenticar(self.usuario)
+        self.assertEqual(self.client.get('/api/v1/auth/minhas-permissoes/').status_code, status.HTTP_200_OK)
+
+        self.autenticar(self.admin)
+        response = self.client.delete(f'/api/v1/auth/usuarios/{self.usuario.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.autenticar(self.usuario)
+        response = self.client.get('/api/v1/auth/minhas-permissoes/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_edicao_is_active_invalida_snapshot(self):
+        """Teste: is_active editado fora da API também invalida o snapshot"""
+        self.assertTrue(get_user_snapshot(self.usuario.pk)['is_active'])
+
+        self.usuario.is_active = False
+        self.usuario.save(update_fields=['is_active'])
+
+        self.assertFalse(get_user_snapshot(self.usuario.pk)['is_active'])
+
+    @override_settings(AUTH_SNAPSHOT={'REQUIRE_SHARED_CACHE': True})
+    @mock.patch.object(token_blacklist, '_avisos_cache_local', set())
+    def test_cache_por_processo_le_usuario_do_banco(self):
+        """Teste: com o locmem (invalidação não chega aos outros workers) o usuário vem do banco"""
+        self.autenticar(self.usuario)
+        with self.assertLogs('apps.accounts.token_blacklist', 'WARNING'):
+            self.assertEqual(self.client.get('/api/v1/auth/minhas-permissoes/').status_code, status.HTTP_200_OK)
+
+        # Inativação sem passar pelos signals (outro processo): vale no request seguinte
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/auth/minhas-permissoes/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue([q for q in queries.captured_queries if 'sis_usuarios' in q['sql']])
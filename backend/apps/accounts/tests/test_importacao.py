@@ -0,0 +1,198 @@
+import json
+import os
+import tempfile
+from unittest import mock
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Usuario
+from apps.accounts import importacao
+
+HASHER_RAPIDO = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=HASHER_RAPIDO)
+class TestImportacaoUsuarios(TestCase):
+    """Testes para importação em massa de usuários"""
+    
+    def setUp(self):
+        Usuario.objects.create_user(
+            username='existente',
+            email='existente@test.com',
+            password='senha12345'
+        )
+    
+    def linha(self, i, **extra):
+        dados = {
+            'username': f'importado_{i}',
+            'email': f'importado_{i}@test.com',
+            'password': 'senhaforte123',
+            'first_name': f'Nome {i}',
+        }
+        dados.update(extra)
+        return dados
+    
+    def test_importa_linhas_validas(self):
+        """Teste: Linhas válidas são criadas com senha utilizável"""
+        resultado = importacao.importar_usuarios([self.linha(i) for i in range(5)], workers=1)
+        
+        self.assertEqual(resultado['criados'], 5)
+        self.assertEqual(resultado['erros'], [])
+        usuario = Usuario.objects.get(username='importado_3')
+        self.assertTrue(usuario.check_password('senhaforte123'))
+        self.assertEqual(usuario.first_name, 'Nome 3')
+    
+    def test_erros_por_linha_nao_abortam(self):
+        """Teste: Erros são reportados por linha e as demais linhas são importadas"""
+        rows = [
+            self.linha(0),
+            self.linha(1, email='existente@TEST.com'),  # já existe no banco
+            self.linha(2, username='importado_0'),  # duplicado no arquivo
+            self.linha(3, password='curta'),
+            self.linha(4, email='invalido'),
+            self.linha(5),
+        ]
+        
+        resultado = importacao.importar_usuarios(rows, workers=1)
+        
+        self.assertEqual(resultado['criados'], 2)
+        self.assertEqual([erro['linha'] for erro in resultado['erros']], [2, 3, 4, 5])
+        self.assertIn('email', resultado['erros'][0]['erros'])
+        self.assertIn('username', resultado['erros'][1]['erros'])
+        self.assertIn('password', resultado['erros'][2]['erros'])
+    
+    def test_unicidade_com_uma_query(self):
+        """Teste: Validação consulta o banco uma vez por lote, não por linha"""
+        rows = [self.linha(i) for i in range(50)]
+        
+        with self.assertNumQueries(1):
+            validas, erros = importacao.validar_linhas(rows)
+        
+        self.assertEqual(len(validas), 50)
+    
+    def test_bulk_create_em_lotes(self):
+        """Teste: Inserção usa bulk_create por lote"""
+        rows = [self.linha(i) for i in range(10)]
+        
+        # 1 query de unicidade + 3 INSERTs (lotes de 4) com savepoints
+        with self.assertNumQueries(1 + 3 * 3):
+            resultado = importacao.importar_usuarios(rows, workers=1, batch_size=4)
+        
+        self.assertEqual(resultado['criados'], 10)
+    
+    def test_hash_em_pool_de_processos(self):
+        """Teste: Hash paralelo preserva a ordem das senhas"""
+        senhas = [f'senha_{i:03d}' for i in range(8)]
+        
+        hashes = importacao.hash_senhas(senhas, workers=2)
+        
+        from django.contrib.auth.hashers import check_password
+        self.assertTrue(all(check_password(s, h) for s, h in zip(senhas, hashes)))
+    
+    def test_dry_run(self):
+        """Teste: dry_run apenas valida"""
+        resultado = importacao.importar_usuarios([self.linha(0)], dry_run=True)
+        
+        self.assertEqual(resultado['validos'], 1)
+        self.assertFalse(Usuario.objects.filter(username='importado_0').exists())
+    
+    def test_comando_csv(self):
+        """Teste: Comando import_usuarios lê CSV"""
+        conteudo = 'username,email,password,first_name\n' + '\n'.join(
+            f'csv_{i},csv_{i}@test.com,senhaforte123,Csv' for i in range(3)
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.remove, arquivo.name)
+        
+        call_command('import_usuarios', arquivo.name, workers=1, stdout=StringIO())
+        
+        self.assertEqual(Usuario.objects.filter(username__startswith='csv_').count(), 3)
+
+
+@override_settings(PASSWORD_HASHERS=HASHER_RAPIDO)
+class TestImportacaoEndpoint(TestCase):
+    """Testes para o endpoint de importação"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = Usuario.objects.create_superuser(
+            username='import_admin',
+            email='import_admin@test.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = '/api/v1/auth/usuarios/importar/'
+    
+    @override_settings(IMPORTACAO_USUARIOS={'WORKERS': 1})
+    def test_importar_arquivo_json(self):
+        """Teste: Upload de arquivo JSON"""
+        dados = [
+            {'username': 'api_1', 'email': 'api_1@test.com', 'password': 'senhaforte123'},
+            {'username': 'api_2', 'email': 'api_2@test.com', 'password': '123'},
+        ]
+        arquivo = SimpleUploadedFile('usuarios.json', json.dumps(dados).encode(), 'application/json')
+        
+        response = self.client.post(self.url, {'arquivo': arquivo}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['criados'], 1)
+        self.assertEqual(response.data['erros'][0]['linha'], 2)
+    
+    @override_settings(IMPORTACAO_USUARIOS={'WORKERS': 1, 'MAX_LINHAS_API': 1})
+    def test_limite_de_linhas(self):
+        """Teste: Requisição acima do limite é recusada"""
+        dados = {'usuarios': [{'username': f'x{i}'} for i in range(2)]}
+        
+        response = self.client.post(self.url, dados, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_corpo_invalido_responde_400(self):
+        """Teste: corpo JSON em lista e CSV malformado = 400 (não 500)"""
+        response = self.client.post(self.url, [{'username': 'lista'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        # Campo acima do csv.field_size_limit(): csv.Error na leitura
+        conteudo = f'username,email\nx,{"a" * 200000}\n'.encode()
+        arquivo = SimpleUploadedFile('usuarios.csv', conteudo, 'text/csv')
+        response = self.client.post(self.url, {'arquivo': arquivo}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Usuario.objects.filter(username__in=['lista', 'x']).exists())
+    
+    def test_limite_padrao_cabe_em_uma_requisicao(self):
+        """Teste: sem configuração, o endpoint aceita no máximo 100 linhas (hash de cada uma)"""
+        self.assertEqual(importacao.get_import_config()['max_linhas_api'], 100)
+    
+    def test_hash_em_threads_sem_pool_de_processos(self):
+        """Teste: Endpoint não cria processos a partir do worker web"""
+        dados = {'usuarios': [
+            {'username': f'thr_{i}', 'email': f'thr_{i}@test.com', 'password': 'senhaforte123'}
+            for i in range(3)
+        ]}
+        
+        with mock.patch.object(importacao, 'ProcessPoolExecutor') as pool_processos:
+            response = self.client.post(self.url, dados, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['criados'], 3)
+        pool_processos.assert_not_called()
+        self.assertTrue(Usuario.objects.get(username='thr_2').check_password('senhaforte123'))
+    
+    def test_importar_exige_permissao_criar(self):
+        """Teste: Usuário sem accounts_criar recebe 403 e nada é criado"""
+        usuario = Usuario.objects.create_user(
+            username='import_sem_perm', email='import_sem_perm@test.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=usuario)
+        dados = {'usuarios': [{'username': 'intruso', 'email': 'intruso@test.com', 'password': 'senhaforte123'}]}
+        
+        response = self.client.post(self.url, dados, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Usuario.objects.filter(username='intruso').exists())
@@ -0,0 +1,125 @@
+import json
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.test import TestCase, override_settings
+
+from apps.accounts.login_async import pool_hash, verificar_senha
+from apps.accounts.models import Usuario
+from core import metrics
+
+
+class TestLoginAsync(TestCase):
+    """Testes do login assíncrono (view do URLconf, atrás dos middlewares)"""
+
+    def setUp(self):
+        metrics.reset()
+        self.usuario = Usuario.objects.create_user(
+            username='assincrono', email='assincrono@example.com', password='senha123'
+        )
+
+    def tearDown(self):
+        pool_hash.shutdown()
+
+    async def requisitar(self, method, path, corpo=None):
+        if method == 'POST':
+            response = await self.async_client.post(path, corpo or {}, content_type='application/json')
+        else:
+            response = await self.async_client.get(path)
+        return response.status_code, response, json.loads(response.content or b'null')
+
+    async def login(self, email='assincrono@example.com', password='senha123'):
+        return await self.requisitar('POST', '/api/v1/auth/login/', {'email': email, 'password': password})
+
+    async def test_login_devolve_tokens_e_marca_online(self):
+        """Teste: mesmo contrato da view síncrona (refresh, access, user)"""
+        status, _, dados = await self.login()
+
+        self.assertEqual(status, 200)
+        self.assertIn('access', dados)
+        self.assertIn('refresh', dados)
+        self.assertEqual(dados['user']['email'], 'assincrono@example.com')
+
+        await self.usuario.arefresh_from_db()
+        self.assertTrue(self.usuario.is_online)
+        self.assertIsNotNone(self.usuario.last_login)
+
+        counters, histograms = metrics.merge_snapshots([metrics.snapshot()])
+        self.assertEqual(counters[('login_async_total', (('result', 'success'),))], 1)
+        # Contado pelo MetricsMiddleware: o login passa pela cadeia de middlewares
+        rota = (('route', '/api/v1/auth/login/'), ('method', 'POST'), ('status', '200'))
+        self.assertEqual(counters[('http_requests_total', rota)], 1)
+        self.assertIn(('login_hash_seconds', ()), histograms)
+        self.assertIn(('login_hash_queue_seconds', ()), histograms)
+
+    async def test_senha_errada_e_usuario_inativo(self):
+        """Teste: credencial inválida ou usuário inativo = 401"""
+        status, response, dados = await self.login(password='errada')
+        self.assertEqual(status, 401)
+        self.assertIn('detail', dados)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+        status, _, _ = await self.login(email='naoexiste@example.com')
+        self.assertEqual(status, 401)
+
+        await Usuario.objects.filter(pk=self.usuario.pk).aupdate(is_active=False)
+        status, _, _ = await self.login()
+        self.assertEqual(status, 401)
+
+    async def test_campos_obrigatorios(self):
+        """Teste: email/senha ausentes = 400 por campo, com os erros do serializer"""
+        corpos = ({'email': 'x@example.com'}, {'email': '', 'password': ['a']}, ['lista'])
+        for corpo in corpos:
+            status, _, dados = await self.requisitar('POST', '/api/v1/auth/login/', corpo)
+            with override_settings(LOGIN_ASYNC={'ENABLED': False}):
+                status_sincrono, _, dados_sincrono = await self.requisitar('POST', '/api/v1/auth/login/', corpo)
+
+            self.assertEqual(status, 400)
+            self.assertEqual(status_sincrono, 400)
+            self.assertEqual(dados, dados_sincrono)
+        self.assertEqual(pool_hash.pendentes, 0)
+
+    async def test_fila_cheia_recusa_com_503(self):
+        """Teste: acima de MAX_PENDING o login é recusado sem calcular hash"""
+        with override_settings(LOGIN_ASYNC={'MAX_PENDING': 0, 'RETRY_AFTER': 3}):
+            status, response, _ = await self.login()
+
+        self.assertEqual(status, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertEqual(pool_hash.pendentes, 0)
+
+    async def test_outros_requests_seguem_pelo_django(self):
+        """Teste: GET no login e demais paths passam pelos middlewares/views do Django"""
+        status, _, _ = await self.requisitar('GET', '/api/v1/auth/login/')
+        self.assertEqual(status, 405)
+
+        with override_settings(LOGIN_ASYNC={'ENABLED': False}):
+            status, _, dados = await self.login()
+        self.assertEqual(status, 200)
+        self.assertIn('access', dados)
+
+        counters, _ = metrics.merge_snapshots([metrics.snapshot()])
+        self.assertNotIn(('login_async_total', (('result', 'success'),)), counters)
+
+
+class TestVerificarSenha(TestCase):
+    """Testes da função executada no pool de hash"""
+
+    def test_espera_acima_do_limite_nao_calcula_hash(self):
+        """Teste: hash que esperou demais na fila é descartado"""
+        encoded = make_password('senha123')
+        self.assertIsNone(verificar_senha('senha123', encoded, time.time() - 5, 2.0))
+
+        ok, precisa_rehash, espera, _ = verificar_senha('senha123', encoded, time.time(), 2.0)
+        self.assertTrue(ok)
+        self.assertFalse(precisa_rehash)
+        self.assertLess(espera, 2.0)
+
+    def test_sem_usuario_e_hasher_antigo(self):
+        """Teste: email inexistente nunca autentica; hash com menos iterações pede rehash"""
+        self.assertFalse(verificar_senha('senha123', None, time.time(), 2.0)[0])
+
+        encoded = PBKDF2PasswordHasher().encode('senha123', 'sal', iterations=1000)
+        ok, precisa_rehash, _, _ = verificar_senha('senha123', encoded, time.time(), 2.0)
+        self.assertTrue(ok)
+        self.assertTrue(precisa_rehash)
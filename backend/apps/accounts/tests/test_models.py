@@ -1,7 +1,15 @@
-from django.test import TestCase
+import importlib
+
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from rest_framework import status
+from rest_framework.test import APIClient
 from apps.accounts.models import Usuario
+from apps.accounts.serializers import UsuarioCreateSerializer
 
 
 class TestUsuarioModel(TestCase):
@@ -149,4 +157,87 @@ class TestUsuarioModel(TestCase):
         usuario.set_offline()
         
         # tempo_offline deve ser calculado
-        self.assertIsNotNone(usuario.tempo_offline)
\ No newline at end of file
+        self.assertIsNotNone(usuario.tempo_offline)
+
+class TestEmailNormalizado(TestCase):
+    """Testes do email case-insensitive (login e unicidade)"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(
+            username='caixa', email='Caixa.Alta@Example.COM', password='senha123'
+        )
+    
+    def test_email_gravado_em_minusculas(self):
+        """Teste: create_user e save normalizam o email"""
+        self.assertEqual(self.usuario.email, 'caixa.alta@example.com')
+        
+        self.usuario.email = ' Outro@Example.com '
+        self.usuario.save()
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.email, 'outro@example.com')
+    
+    def test_login_ignora_maiusculas(self):
+        """Teste: login com o email em outra caixa, com uma query no usuário"""
+        with CaptureQueriesContext(connection) as queries:
+            encontrado = Usuario.objects.get_by_natural_key('CAIXA.alta@example.com')
+        self.assertEqual(encontrado.pk, self.usuario.pk)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn("EMAIL\" = 'CAIXA.ALTA@EXAMPLE.COM'", queries.captured_queries[0]['sql'].upper())
+        
+        response = self.client.post('/api/v1/auth/login/', {
+            'email': 'CAIXA.ALTA@example.com', 'password': 'senha123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_unicidade_sem_diferenciar_caixa(self):
+        """Teste: o banco recusa email que só difere na caixa"""
+        # Sem passar pelo save(): a check constraint recusa maiúsculas...
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Usuario.objects.bulk_create([
+                Usuario(username='caixa2', email='CAIXA.ALTA@EXAMPLE.COM', password='!')
+            ])
+        # ...e o índice único de email recusa o mesmo email normalizado
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Usuario.objects.bulk_create([
+                Usuario(username='caixa2', email='caixa.alta@example.com', password='!')
+            ])
+    
+    def test_serializer_acusa_email_duplicado(self):
+        """Teste: criação pela API com o email em outra caixa = 400, não 500"""
+        serializer = UsuarioCreateSerializer(data={
+            'username': 'caixa3', 'email': 'Caixa.Alta@example.com',
+            'password': 'senha1234', 'password_confirm': 'senha1234',
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('email', serializer.errors)
+
+
+class TestMigracaoEmailNormalizado(TransactionTestCase):
+    """Migração de dados dos emails gravados antes da check constraint"""
+    
+    anterior = [('accounts', '0005_usuario_updated_id_idx')]
+    
+    def setUp(self):
+        # Voltar para antes da check constraint: só então há email em maiúsculas
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.anterior)
+        self.addCleanup(self.migrar_para_o_fim)
+    
+    def migrar_para_o_fim(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+    
+    def test_migracao_normaliza_emails_existentes(self):
+        """Teste: a migração de dados baixa os emails gravados antes dela"""
+        migracao = importlib.import_module('apps.accounts.migrations.0002_usuario_email_lower_uniq')
+        estado = self.executor.loader.project_state(self.anterior).apps
+        UsuarioHistorico = estado.get_model('accounts', 'Usuario')
+        usuario = UsuarioHistorico.objects.create(
+            username='legado', email='Legado@Example.com', password='!'
+        )
+        
+        migracao.normalizar_emails(estado, None)
+        
+        usuario.refresh_from_db()
+        self.assertEqual(usuario.email, 'legado@example.com')
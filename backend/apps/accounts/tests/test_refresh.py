@@ -0,0 +1,117 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts import token_blacklist
+from apps.accounts.models import Usuario
+from apps.accounts.refresh import chaves_refresh, refresh_coalescido
+
+
+class TestRefreshCoalescido(TestCase):
+    """Testes do refresh concorrente com janela de graça"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(
+            username='coalesce', email='coalesce@example.com', password='senha123'
+        )
+        self.token = str(RefreshToken.for_user(self.usuario))
+
+    def tearDown(self):
+        for chave in chaves_refresh(self.token):
+            cache.delete(chave)
+
+    def refresh(self, token):
+        return self.client.post('/api/v1/auth/refresh/', {'refresh': token})
+
+    def test_mesmo_token_na_janela_devolve_mesmo_par(self):
+        """Teste: refreshes repetidos dentro da janela recebem o mesmo par"""
+        primeiro = self.refresh(self.token)
+        segundo = self.refresh(self.token)
+
+        self.assertEqual(primeiro.status_code, status.HTTP_200_OK)
+        self.assertEqual(segundo.status_code, status.HTTP_200_OK)
+        self.assertEqual(primeiro.data['refresh'], segundo.data['refresh'])
+        self.assertEqual(primeiro.data['access'], segundo.data['access'])
+        self.assertNotEqual(primeiro.data['refresh'], self.token)
+
+    def test_fora_da_janela_token_antigo_rejeitado(self):
+        """Teste: expirada a janela, a rotação normal vale (401)"""
+        self.assertEqual(self.refresh(self.token).status_code, status.HTTP_200_OK)
+        cache.delete(chaves_refresh(self.token)[0])  # janela expirada
+
+        self.assertEqual(self.refresh(self.token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REFRESH_COALESCING={'WAIT_SECONDS': 2, 'POLL_INTERVAL': 0.01})
+    def test_concorrente_espera_resultado_do_primeiro(self):
+        """Teste: com o lock ocupado, o refresh espera o par do primeiro"""
+        chave_resultado, chave_lock = chaves_refresh(self.token)
+        cache.add(chave_lock, 1, 10)
+        par = {'access': 'novo-access', 'refresh': 'novo-refresh'}
+        threading.Timer(0.05, cache.set, (chave_resultado, par, 10)).start()
+
+        resultado = refresh_coalescido(self.token, lambda: self.fail('não deveria rotacionar'))
+
+        self.assertEqual(resultado, par)
+        cache.delete(chave_lock)
+
+    def test_falha_nao_fica_em_cache(self):
+        """Teste: token inválido não guarda resultado nem deixa o lock preso"""
+        response = self.refresh('token-invalido')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        for chave in chaves_refresh('token-invalido'):
+            self.assertIsNone(cache.get(chave))
+
+    @override_settings(REFRESH_COALESCING={'WAIT_SECONDS': 5, 'POLL_INTERVAL': 0.01})
+    def test_concorrente_para_quando_o_primeiro_falha(self):
+        """Teste: lock liberado sem resultado = concorrente segue na hora, sem esperar WAIT_SECONDS"""
+        _, chave_lock = chaves_refresh(self.token)
+        cache.add(chave_lock, 1, 10)
+        threading.Timer(0.05, cache.delete, (chave_lock,)).start()
+
+        def gerar():
+            raise TokenError('Token is blacklisted')
+
+        inicio = time.monotonic()
+        with self.assertRaises(TokenError):
+            refresh_coalescido(self.token, gerar)
+        self.assertLess(time.monotonic() - inicio, 1)
+
+    def test_token_invalido_nao_entra_no_lock(self):
+        """Teste: string qualquer ou access token falham antes de esperar/reservar o lock"""
+        access = str(RefreshToken.for_user(self.usuario).access_token)
+        with mock.patch('apps.accounts.refresh.cache.add') as reservar:
+            for token in ('token-invalido', access):
+                self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+        reservar.assert_not_called()
+
+    def test_logout_encerra_a_janela_de_graca(self):
+        """Teste: após o logout (com o token novo ou o antigo) o token antigo não recebe mais o par"""
+        for token_do_logout in ('novo', 'antigo'):
+            antigo = str(RefreshToken.for_user(self.usuario))
+            response = self.refresh(antigo)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            tokens = {'novo': response.data['refresh'], 'antigo': antigo}
+
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+            self.client.post('/api/v1/auth/logout/', {'refresh_token': tokens[token_do_logout]})
+            self.client.credentials()
+
+            self.assertEqual(self.refresh(antigo).status_code, status.HTTP_401_UNAUTHORIZED, token_do_logout)
+
+    @override_settings(REFRESH_COALESCING={'REQUIRE_SHARED_CACHE': True})
+    @mock.patch.object(token_blacklist, '_avisos_cache_local', set())
+    def test_cache_por_processo_desliga_coalescing(self):
+        """Teste: com o locmem (lock e par não chegam aos outros workers) vale a rotação normal"""
+        with self.assertLogs('apps.accounts.token_blacklist', 'WARNING'):
+            self.assertEqual(self.refresh(self.token).status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(chaves_refresh(self.token)[0]))
+        self.assertEqual(self.refresh(self.token).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.login_async import pool_hash
+from apps.accounts.models import Usuario
+from apps.accounts.throttling import parse_rate, registrar_tentativa
+from core import metrics
+
+THROTTLE_TESTE = {
+    'ENABLED': True,
+    'RATES': {'login_email': '2/min', 'login_ip': '3/min', 'refresh_ip': '1/min'},
+}
+
+
+class TestJanelaDeslizante(TestCase):
+    """Testes do contador de janela deslizante"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        """Teste: formato do DRF e escopo sem limite"""
+        self.assertEqual(parse_rate('5/min'), (5, 60))
+        self.assertEqual(parse_rate('100/hour'), (100, 3600))
+        self.assertIsNone(parse_rate(None))
+
+    def test_limite_na_janela_atual(self):
+        """Teste: acima do limite recusa, sem contar a tentativa recusada"""
+        agora = 6000.0  # início de uma janela de 60s
+        for _ in range(3):
+            self.assertEqual(registrar_tentativa('t', 'ip', 3, 60, agora), (True, None))
+
+        permitido, espera = registrar_tentativa('t', 'ip', 3, 60, agora + 30)
+        self.assertFalse(permitido)
+        # Próxima janela: 3 * (1 - g) <= 2 a partir de g = 1/3 (30s + 20s)
+        self.assertAlmostEqual(espera, 50.0)
+        self.assertEqual(cache.get('throttle_t_ip_100'), 3)
+
+    def test_peso_da_janela_anterior_decai(self):
+        """Teste: a janela anterior pesa proporcionalmente ao tempo restante"""
+        for _ in range(3):
+            registrar_tentativa('t', 'ip', 3, 60, 6000.0)
+
+        # 15s na janela seguinte: 3 * 0.75 + 0 + 1 > 3
+        permitido, espera = registrar_tentativa('t', 'ip', 3, 60, 6075.0)
+        self.assertFalse(permitido)
+        self.assertAlmostEqual(espera, 5.0)  # 3 * (1 - f) <= 2 em f = 1/3
+
+        self.assertEqual(registrar_tentativa('t', 'ip', 3, 60, 6080.0), (True, None))
+
+    def test_identificadores_independentes(self):
+        """Teste: cada identificador tem o próprio contador"""
+        registrar_tentativa('t', 'a', 1, 60, 6000.0)
+        self.assertFalse(registrar_tentativa('t', 'a', 1, 60, 6001.0)[0])
+        self.assertTrue(registrar_tentativa('t', 'b', 1, 60, 6001.0)[0])
+
+
+@override_settings(LOGIN_THROTTLE=THROTTLE_TESTE)
+class TestThrottleLogin(TestCase):
+    """Testes do rate limit nas views de login e refresh"""
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(
+            username='limitado', email='limitado@example.com', password='senha123'
+        )
+
+    def login(self, email='limitado@example.com', password='errada', **extra):
+        return self.client.post('/api/v1/auth/login/', {'email': email, 'password': password}, **extra)
+
+    def test_recusa_por_email_antes_do_hash(self):
+        """Teste: acima do limite por email, 429 sem chamar o authenticate"""
+        with mock.patch.object(ModelBackend, 'authenticate', autospec=True, return_value=None) as authenticate:
+            self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.login(email='LIMITADO@example.com ').status_code, status.HTTP_401_UNAUTHORIZED)
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(authenticate.call_count, 2)
+
+        counters, _ = metrics.merge_snapshots([metrics.snapshot()])
+        self.assertEqual(counters[('login_throttle_total', (('scope', 'login_email'),))], 1)
+
+    def test_recusa_por_ip(self):
+        """Teste: emails diferentes do mesmo IP somam no limite por IP"""
+        for i in range(3):
+            self.assertEqual(self.login(email=f'outro{i}@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(self.login(email='outro9@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(
+            self.login(email='outro9@example.com', REMOTE_ADDR='10.0.0.2').status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_x_forwarded_for_nao_zera_limite_por_ip(self):
+        """Teste: X-Forwarded-For diferente a cada tentativa não escapa do limite por IP"""
+        for i in range(3):
+            response = self.login(email=f'xff{i}@example.com', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.login(email='xff9@example.com', HTTP_X_FORWARDED_FOR='203.0.113.99')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_refresh_limitado_por_ip(self):
+        """Teste: refresh acima do limite por IP = 429"""
+        token = str(RefreshToken.for_user(self.usuario))
+        self.assertEqual(self.client.post('/api/v1/auth/refresh/', {'refresh': token}).status_code, 200)
+        response = self.client.post('/api/v1/auth/refresh/', {'refresh': token})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    async def test_login_assincrono_recusa_antes_do_pool(self):
+        """Teste: no login assíncrono o 429 sai antes de reservar o pool de hash"""
+        corpo = {'email': 'limitado@example.com', 'password': 'errada'}
+        try:
+            for esperado in (401, 401, 429):
+                response = await self.async_client.post('/api/v1/auth/login/', corpo, content_type='application/json')
+                self.assertEqual(response.status_code, esperado)
+        finally:
+            pool_hash.shutdown()
+
+        self.assertIn('Retry-After', response)
+        self.assertIn('detail', json.loads(response.content))
+        _, histograms = metrics.merge_snapshots([metrics.snapshot()])
+        self.assertEqual(histograms[('login_hash_seconds', ())][2], 2)
@@ -0,0 +1,200 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts import token_blacklist
+from apps.accounts.models import Usuario
+from apps.accounts.token_blacklist import (
+    CACHE_KEY_BLACKLIST_VERSION, BloomFilter, FilteredRefreshToken, blacklist_filter, prune_expired_tokens,
+)
+
+# Testes rodam com o locmem: o filtro só liga sem exigir cache compartilhado
+SEM_SYNC = {'REQUIRE_SHARED_CACHE': False, 'SYNC_INTERVAL': 3600, 'MIN_SYNC_INTERVAL': 3600}
+SYNC_SEMPRE = {'REQUIRE_SHARED_CACHE': False, 'SYNC_INTERVAL': 0, 'MIN_SYNC_INTERVAL': 0}
+AVISO_DE_VERSAO = {'REQUIRE_SHARED_CACHE': False, 'SYNC_INTERVAL': 3600}
+
+
+class TestBloomFilter(SimpleTestCase):
+    """Testes do Bloom filter"""
+
+    def test_sem_falsos_negativos(self):
+        """Teste: todo valor adicionado é encontrado"""
+        bloom = BloomFilter(1000, 0.01)
+        valores = [f'jti-{i}' for i in range(1000)]
+        for valor in valores:
+            bloom.add(valor)
+        self.assertTrue(all(valor in bloom for valor in valores))
+        self.assertEqual(len(bloom), 1000)
+
+    def test_taxa_de_falsos_positivos(self):
+        """Teste: falsos positivos próximos da taxa configurada"""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        falsos = sum(f'outro-{i}' in bloom for i in range(10000))
+        self.assertLess(falsos, 300)
+
+
+class TestBlacklistFilter(TestCase):
+    """Testes da checagem da blacklist via filtro"""
+
+    def setUp(self):
+        blacklist_filter.reset()
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(
+            username='refresh', email='refresh@example.com', password='senha123'
+        )
+
+    def tearDown(self):
+        blacklist_filter.reset()
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=SEM_SYNC)
+    def test_token_fora_da_blacklist_sem_query(self):
+        """Teste: com o filtro carregado, token válido não consulta o banco"""
+        token = str(RefreshToken.for_user(self.usuario))
+        FilteredRefreshToken(token)  # carrega o filtro
+
+        with self.assertNumQueries(0):
+            FilteredRefreshToken(token)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=SEM_SYNC, REFRESH_COALESCING={'ENABLED': False})
+    def test_rotacao_rejeita_token_antigo(self):
+        """Teste: refresh rotacionado não pode ser reutilizado"""
+        antigo = str(RefreshToken.for_user(self.usuario))
+
+        response = self.client.post('/api/v1/auth/refresh/', {'refresh': antigo})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        novo = response.data['refresh']
+
+        response = self.client.post('/api/v1/auth/refresh/', {'refresh': antigo})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/v1/auth/refresh/', {'refresh': novo})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=SYNC_SEMPRE)
+    def test_blacklist_de_outro_processo_sincroniza(self):
+        """Teste: linha inserida sem passar por este processo entra no filtro"""
+        refresh = RefreshToken.for_user(self.usuario)
+        FilteredRefreshToken(str(refresh))  # carrega o filtro
+
+        outstanding = OutstandingToken.objects.get(jti=refresh['jti'])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=outstanding)])  # sem signals
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(refresh))
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=AVISO_DE_VERSAO)
+    def test_versao_publicada_vale_na_checagem_seguinte(self):
+        """Teste: com a versão avisada no cache, outro processo não espera o SYNC_INTERVAL"""
+        refresh = RefreshToken.for_user(self.usuario)
+        FilteredRefreshToken(str(refresh))  # carrega o filtro
+
+        outstanding = OutstandingToken.objects.get(jti=refresh['jti'])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=outstanding)])  # sem signals
+        cache.incr(CACHE_KEY_BLACKLIST_VERSION)  # o que o outro processo publica após o commit
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(refresh))
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=AVISO_DE_VERSAO)
+    def test_versao_publicada_so_apos_commit(self):
+        """Teste: a versão sobe no commit, não no post_save (linha ainda invisível)"""
+        refresh = RefreshToken.for_user(self.usuario)
+        FilteredRefreshToken(str(refresh))  # carrega o filtro
+        versao = cache.get(CACHE_KEY_BLACKLIST_VERSION)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh.blacklist()
+            self.assertEqual(cache.get(CACHE_KEY_BLACKLIST_VERSION), versao)
+
+        self.assertNotEqual(cache.get(CACHE_KEY_BLACKLIST_VERSION), versao)
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(refresh))
+
+    @override_settings(TOKEN_BLACKLIST_FILTER={**SEM_SYNC, 'REBUILD_INTERVAL': 0})
+    def test_reconstrucao_nao_trava_os_demais(self):
+        """Teste: durante a leitura da tabela o filtro anterior segue em uso e o novo recebe o que entrou no meio"""
+        antigo = RefreshToken.for_user(self.usuario)
+        novo = RefreshToken.for_user(self.usuario)
+        FilteredRefreshToken(str(antigo))  # carrega o filtro
+        antigo.blacklist()
+
+        carregar = blacklist_filter._carregar
+        durante = []
+
+        def carregar_lento(bloom, desde_id):
+            maior = carregar(bloom, desde_id)
+            if desde_id == 0 and not durante:
+                # Outro request do processo no meio da reconstrução: não espera o lock
+                durante.append(blacklist_filter.talvez_contem(antigo['jti']))
+                novo.blacklist()
+            return maior
+
+        with mock.patch.object(blacklist_filter, '_carregar', carregar_lento):
+            blacklist_filter.sincronizar()
+
+        self.assertEqual(durante, [True])
+        self.assertIn(novo['jti'], blacklist_filter._bloom)
+        self.assertFalse(blacklist_filter._reconstruindo)
+
+    @mock.patch.object(token_blacklist, '_avisos_cache_local', set())
+    def test_cache_por_processo_consulta_o_banco(self):
+        """Teste: com o locmem (versão não chega aos outros workers) toda checagem vai ao banco"""
+        token = str(RefreshToken.for_user(self.usuario))
+
+        with self.assertLogs('apps.accounts.token_blacklist', 'WARNING'):
+            FilteredRefreshToken(token)
+        with self.assertNumQueries(1):
+            FilteredRefreshToken(token)
+
+
+class TestPruneTokens(TestCase):
+    """Testes da remoção em lotes de tokens expirados"""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(
+            username='prune', email='prune@example.com', password='senha123'
+        )
+        expirado = timezone.now() - timedelta(days=1)
+        OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=self.usuario, jti=f'expirado-{i}', token='', expires_at=expirado)
+            for i in range(25)
+        ])
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token=token)
+            for token in OutstandingToken.objects.filter(jti__startswith='expirado-')[:10]
+        ])
+        self.valido = RefreshToken.for_user(self.usuario)
+
+    def test_remove_expirados_em_lotes(self):
+        """Teste: lotes limitados por batch_size e tokens válidos preservados"""
+        lotes = list(prune_expired_tokens(batch_size=10))
+
+        self.assertEqual([lote['outstanding'] for lote in lotes], [10, 10, 5])
+        self.assertEqual(sum(lote['blacklisted'] for lote in lotes), 10)
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [self.valido['jti']])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_max_lotes(self):
+        """Teste: max_lotes interrompe a passada"""
+        self.assertEqual(len(list(prune_expired_tokens(batch_size=10, max_lotes=1))), 1)
+        self.assertEqual(OutstandingToken.objects.count(), 16)
+
+    def test_comando_reporta_lotes(self):
+        """Teste: o comando informa os removidos por lote"""
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '20', '--sleep', '0', stdout=out)
+
+        self.assertIn('Lote 1: 20 outstanding', out.getvalue())
+        self.assertIn('Lote 2: 5 outstanding', out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
@@ -1,12 +1,29 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
 from rest_framework.test import APIClient
 from rest_framework import status
 from apps.accounts.models import Usuario
 from apps.controle_acesso.models import PermissaoCustomizada, GrupoCustomizado
 
 
+def conceder_permissao(usuario, modulo, acao):
+    """Permissão customizada + Permission do Django concedidas via grupo"""
+    nome = f'{modulo}_{acao}'
+    PermissaoCustomizada.objects.get_or_create(nome=nome, defaults={'modulo': modulo, 'acao': acao})
+    permissao, _ = Permission.objects.get_or_create(
+        codename=nome,
+        content_type=ContentType.objects.get_for_model(Usuario),
+        defaults={'name': nome},
+    )
+    grupo, _ = Group.objects.get_or_create(name=f'Grupo {nome}')
+    grupo.permissions.add(permissao)
+    usuario.groups.add(grupo)
+
+
 class TestUsuarioViewSet(TestCase):
     """Testes para UsuarioViewSet"""
     
@@ -307,4 +324,151 @@ class TestViewsExtras(TestCase):
         self.assertEqual(response.data['usuario'], 'test_user_views')
         self.assertFalse(response.data['is_superuser'])
         self.assertIsInstance(response.data['permissoes'], list)
-        self.assertIsInstance(response.data['total'], int)
\ No newline at end of file
+        self.assertIsInstance(response.data['total'], int)
+
+class TestUsuarioExportacao(TestCase):
+    """Testes para exportação em streaming de usuários"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = Usuario.objects.create_superuser(
+            username='export_admin',
+            email='export_admin@test.com',
+            password='testpass123'
+        )
+        for i in range(5):
+            Usuario.objects.create_user(
+                username=f'export_user_{i}',
+                email=f'export_user_{i}@test.com',
+                password='testpass123',
+                first_name='Maria' if i % 2 else 'João',
+                is_online=i == 0
+            )
+        self.export_url = '/api/v1/auth/usuarios/exportar/'
+        self.client.force_authenticate(user=self.admin_user)
+    
+    def ler_conteudo(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_exportar_csv(self):
+        """Teste: Exportação CSV em streaming com todos os usuários ativos"""
+        import csv
+        import io
+        
+        response = self.client.get(self.export_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        
+        linhas = list(csv.DictReader(io.StringIO(self.ler_conteudo(response))))
+        self.assertEqual(len(linhas), 6)
+        self.assertEqual(linhas[0]['username'], 'export_admin')
+    
+    def test_exportar_csv_neutraliza_formulas(self):
+        """Teste: CSV prefixa com aspas simples células que a planilha leria como fórmula"""
+        import csv
+        import io
+    
+        Usuario.objects.filter(username='export_user_0').update(
+            first_name='=HYPERLINK("http://x")', last_name='@SUM(A1)'
+        )
+    
+        response = self.client.get(self.export_url, {'search': 'export_user_0'})
+    
+        linha = next(csv.DictReader(io.StringIO(self.ler_conteudo(response))))
+        self.assertEqual(linha['first_name'], '\'=HYPERLINK("http://x")')
+        self.assertEqual(linha['last_name'], "'@SUM(A1)")
+        self.assertEqual(linha['username'], 'export_user_0')
+    
+    def test_exportar_ndjson_com_busca_e_ordenacao(self):
+        """Teste: Exportação NDJSON respeita busca e ordenação da listagem"""
+        import json
+        
+        response = self.client.get(self.export_url, {
+            'formato': 'ndjson', 'search': 'Maria', 'ordering': '-username'
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linhas = [json.loads(linha) for linha in self.ler_conteudo(response).splitlines()]
+        self.assertEqual(
+            [linha['username'] for linha in linhas],
+            ['export_user_3', 'export_user_1']
+        )
+    
+    def test_exportar_com_filtro(self):
+        """Teste: Exportação respeita filtros do UsuarioFilter"""
+        import json
+        
+        response = self.client.get(self.export_url, {'formato': 'ndjson', 'is_online': 'true'})
+        
+        linhas = [json.loads(linha) for linha in self.ler_conteudo(response).splitlines()]
+        self.assertEqual([linha['username'] for linha in linhas], ['export_user_0'])
+    
+    def test_exportar_formato_invalido(self):
+        """Teste: Formato não suportado retorna 400"""
+        response = self.client.get(self.export_url, {'formato': 'xlsx'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_exportar_exige_permissao_visualizar(self):
+        """Teste: Sem accounts_visualizar = 403; com a permissão via grupo = 200"""
+        usuario = Usuario.objects.get(username='export_user_1')
+        self.client.force_authenticate(user=usuario)
+        
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        conceder_permissao(usuario, 'accounts', 'visualizar')
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.ler_conteudo(response).splitlines()), 7)
+
+
+class TestCamposEsparsosUsuarios(TestCase):
+    """Testes de ?fields= / ?omit= na listagem e no detalhe de usuários"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = Usuario.objects.create_user(
+            username='esparso_admin', email='esparso_admin@example.com',
+            password='testpass123', is_superuser=True
+        )
+        self.admin_user.groups.add(Group.objects.create(name='Grupo Esparso'))
+        self.client.force_authenticate(user=self.admin_user)
+        self.detalhe_url = f'/api/v1/auth/usuarios/{self.admin_user.id}/'
+
+    def test_listagem_com_fields(self):
+        """Teste: ?fields= devolve só os campos pedidos e só lê essas colunas"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/auth/usuarios/', {'fields': 'id,username'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': self.admin_user.id, 'username': 'esparso_admin'})
+        select = next(q['sql'] for q in queries.captured_queries if 'LIMIT' in q['sql'])
+        self.assertNotIn('"email"', select)
+        self.assertNotIn('"password"', select)
+
+    def test_detalhe_sem_campos_de_grupo(self):
+        """Teste: ?omit= dos campos de grupo não consulta os grupos"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.detalhe_url, {'omit': 'total_grupos,grupos_nomes'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('grupos_nomes', response.data)
+        self.assertEqual(response.data['full_name'], 'esparso_admin')
+        self.assertFalse(any('auth_group' in q['sql'] for q in queries.captured_queries))
+
+    def test_detalhe_grupos_em_prefetch(self):
+        """Teste: campos de grupo pedidos saem de um único prefetch"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.detalhe_url, {'fields': 'total_grupos,grupos_nomes'})
+
+        self.assertEqual(response.data, {'total_grupos': 1, 'grupos_nomes': ['Grupo Esparso']})
+        self.assertEqual(len([q for q in queries.captured_queries if 'auth_group' in q['sql']]), 1)
+
+    def test_campo_inexistente(self):
+        """Teste: campo que o serializer não tem = 400"""
+        response = self.client.get('/api/v1/auth/usuarios/', {'fields': 'id,senha'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
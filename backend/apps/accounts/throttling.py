@@ -0,0 +1,159 @@
+"""
+Rate limit de login e refresh com janela deslizante em contadores no cache
+
+Cada tentativa de credential stuffing no /auth/login/ custa um PBKDF2
+completo. Os throttles daqui rodam no initial() da view (antes do
+serializer) e, no login assíncrono, antes de reservar o pool de hash:
+tentativa recusada responde 429 + Retry-After sem calcular hash nenhum.
+
+Em vez da lista de timestamps por chave do SimpleRateThrottle do DRF
+(lê, filtra e regrava a lista inteira, sem atomicidade entre workers),
+cada identificador usa dois contadores de janela fixa e a estimativa da
+janela deslizante:
+
+    estimado = anterior * (1 - fração decorrida da janela atual) + atual
+
+Custo por decisão: um get_many (atual + anterior) e um incr atômico
+(+ add na primeira tentativa da janela), independente do limite.
+
+Escopos (LOGIN_THROTTLE['RATES'], formato do DRF "n/s|m|h|d"):
+- login_email: por email informado (normalizado, guardado como hash);
+- login_ip: por IP (BaseThrottle.get_ident com REST_FRAMEWORK['NUM_PROXIES']:
+  X-Forwarded-For só é lido atrás de proxies configurados);
+- refresh_ip: refresh por IP.
+
+Os contadores precisam de cache compartilhado (LOGIN_THROTTLE['CACHE'])
+para valer entre workers; com o locmem padrão o limite é por processo.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from core.metrics import inc
+
+CACHE_KEY_THROTTLE = 'throttle_{escopo}_{ident}_{janela}'
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'CACHE': 'default',  # alias em CACHES (compartilhado entre workers em produção)
+    'RATES': {
+        'login_email': '5/min',
+        'login_ip': '30/min',
+        'refresh_ip': '120/min',
+    },
+}
+
+DURACOES = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_login_throttle_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'LOGIN_THROTTLE', {}))
+    config['RATES'] = {**DEFAULT_CONFIG['RATES'], **config['RATES']}
+    return config
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60); None/'' -> None (escopo sem limite)"""
+    if not rate:
+        return None
+    quantidade, periodo = rate.split('/')
+    return int(quantidade), DURACOES[periodo[0]]
+
+
+def registrar_tentativa(escopo, ident, limite, janela, agora=None, cache=None):
+    """
+    Contar uma tentativa na janela deslizante.
+
+    Retorna (permitido, espera): tentativa recusada não é contada e espera
+    é o tempo (s) até a estimativa cair abaixo do limite.
+    """
+    cache = cache or caches[get_login_throttle_config()['CACHE']]
+    agora = time.time() if agora is None else agora
+    indice = int(agora // janela)
+    fracao = (agora - indice * janela) / janela
+    chave_atual = CACHE_KEY_THROTTLE.format(escopo=escopo, ident=ident, janela=indice)
+    chave_anterior = CACHE_KEY_THROTTLE.format(escopo=escopo, ident=ident, janela=indice - 1)
+
+    valores = cache.get_many([chave_atual, chave_anterior])
+    atual = valores.get(chave_atual, 0)
+    anterior = valores.get(chave_anterior, 0)
+
+    if anterior * (1 - fracao) + atual + 1 > limite:
+        if atual + 1 > limite:
+            # Só a janela atual já estoura: na próxima ela vira a anterior
+            espera = (1 - fracao + 1 - (limite - 1) / atual) * janela
+        else:
+            # Esperar o peso da janela anterior cair o suficiente
+            espera = (1 - fracao - (limite - 1 - atual) / anterior) * janela
+        return False, espera
+
+    try:
+        cache.incr(chave_atual)
+    except ValueError:
+        if not cache.add(chave_atual, 1, 2 * janela):
+            cache.incr(chave_atual)  # outro request criou a chave no meio
+    return True, None
+
+
+def _hash_ident(valor):
+    return hashlib.sha256(valor.encode()).hexdigest()[:32]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle do DRF sobre registrar_tentativa (subclasses definem escopo e get_chave)"""
+
+    escopo = None
+
+    def __init__(self):
+        self.espera = None
+
+    def get_chave(self, request, dados):
+        """Identificador limitado (None = não limitar este request)"""
+        raise NotImplementedError
+
+    def permitir(self, request, dados):
+        config = get_login_throttle_config()
+        rate = parse_rate(config['RATES'].get(self.escopo))
+        if not config['ENABLED'] or rate is None:
+            return True
+        chave = self.get_chave(request, dados)
+        if chave is None:
+            return True
+
+        limite, janela = rate
+        permitido, self.espera = registrar_tentativa(self.escopo, _hash_ident(chave), limite, janela)
+        if not permitido:
+            inc('login_throttle_total', (('scope', self.escopo),))
+        return permitido
+
+    def allow_request(self, request, view):
+        return self.permitir(request, request.data)
+
+    def wait(self):
+        return self.espera
+
+
+class LoginEmailThrottle(SlidingWindowThrottle):
+    escopo = 'login_email'
+
+    def get_chave(self, request, dados):
+        email = dados.get('email') if hasattr(dados, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None  # o serializer responde 400
+        return email.strip().lower()
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    escopo = 'login_ip'
+
+    def get_chave(self, request, dados):
+        return self.get_ident(request)
+
+
+class RefreshIPThrottle(LoginIPThrottle):
+    escopo = 'refresh_ip'
+
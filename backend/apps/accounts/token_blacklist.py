@@ -0,0 +1,317 @@
+"""
+Consulta à blacklist de refresh tokens com Bloom filter por processo
+
+Com ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION todo refresh consulta
+token_blacklist_blacklistedtoken, que cresce uma linha por refresh. Aqui
+cada processo mantém um Bloom filter dos JTIs na blacklist:
+
+- "não está no filtro" = certamente não está na blacklist: sem query;
+- "talvez esteja" (hit real ou falso positivo) cai na consulta ao banco.
+
+O filtro é atualizado de forma incremental a partir de um high-water mark
+(maior BlacklistedToken.id já lido):
+- tokens colocados na blacklist por este processo entram na hora (post_save
+  de BlacklistedToken: rotação, logout, admin);
+- os de outros processos entram quando a versão publicada no cache muda:
+  a versão é lida a cada checagem (MIN_SYNC_INTERVAL=0) e só é publicada
+  depois do commit, então um token na blacklist em outro worker vale na
+  checagem seguinte; sem aviso (chave perdida no cache), a cada SYNC_INTERVAL;
+- a reconstrução completa (REBUILD_INTERVAL ou filtro acima da capacidade)
+  descarta os JTIs já removidos da tabela; o filtro novo é montado fora do
+  lock e trocado no fim, sem travar os demais requests do processo.
+
+O filtro só é confiável com cache compartilhado entre os workers (Redis/
+Memcached): com o locmem/dummy a versão não sai do processo e outro worker
+aceitaria um token já na blacklist até o SYNC_INTERVAL. Nesses backends o
+filtro fica desligado (toda checagem vai ao banco, com um warning no log),
+salvo REQUIRE_SHARED_CACHE=False.
+
+Limpeza (comando prune_tokens): tokens expirados (OutstandingToken e sua
+linha em BlacklistedToken) são removidos em lotes limitados por chave
+primária com pausa entre lotes, em vez do DELETE único do flushexpiredtokens
+que trava as tabelas.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_BLACKLIST_VERSION = 'token_blacklist_version'
+CACHES_POR_PROCESSO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'CAPACITY': 100000,  # JTIs previstos; o filtro dobra ao passar disso
+    'ERROR_RATE': 0.001,  # falsos positivos (caem no banco)
+    'REQUIRE_SHARED_CACHE': True,  # desligar o filtro com cache por processo
+    'SYNC_INTERVAL': 5,  # segundos entre leituras incrementais sem aviso no cache
+    'MIN_SYNC_INTERVAL': 0,  # segundos entre leituras da versão no cache (0 = a cada checagem)
+    'REBUILD_INTERVAL': 3600,  # segundos entre reconstruções completas
+    'OVERLAP': 100,  # ids relidos abaixo do high-water mark (commits fora de ordem)
+    'BATCH_SIZE': 5000,
+}
+
+
+def get_blacklist_filter_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'TOKEN_BLACKLIST_FILTER', {}))
+    return config
+
+
+def cache_compartilhado():
+    """False se o cache default é por processo (a versão não chega aos outros workers)"""
+    return settings.CACHES.get('default', {}).get('BACKEND') not in CACHES_POR_PROCESSO
+
+
+_avisos_cache_local = set()
+
+
+def cache_local_recusado(nome, config):
+    """
+    True se a configuração `nome` exige cache compartilhado (REQUIRE_SHARED_CACHE)
+    e o default é por processo; avisa no log uma vez por configuração.
+    """
+    if not config.get('REQUIRE_SHARED_CACHE', True) or cache_compartilhado():
+        return False
+    if nome not in _avisos_cache_local:
+        _avisos_cache_local.add(nome)
+        logger.warning(
+            '%s desligado: o cache default é por processo; '
+            'configure um cache compartilhado (Redis/Memcached) entre os workers.', nome
+        )
+    return True
+
+
+def filtro_ativo():
+    """Filtro habilitado e com cache compartilhado (senão a checagem vai ao banco)"""
+    config = get_blacklist_filter_config()
+    return config['ENABLED'] and not cache_local_recusado('TOKEN_BLACKLIST_FILTER', config)
+
+
+class BloomFilter:
+    """Bloom filter de strings (bits em bytearray, double hashing com blake2b)"""
+
+    def __init__(self, capacidade, taxa_erro=0.001):
+        capacidade = max(int(capacidade), 1)
+        self.capacidade = capacidade
+        self.num_bits = max(8, math.ceil(-capacidade * math.log(taxa_erro) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.itens = 0
+
+    def _posicoes(self, valor):
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, valor):
+        for posicao in self._posicoes(valor):
+            self.bits[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def __contains__(self, valor):
+        return all(self.bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(valor))
+
+    def __len__(self):
+        return self.itens
+
+
+class BlacklistFilter:
+    """Bloom filter da blacklist com sincronização incremental (um por processo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._bloom = None
+        self._hwm = 0
+        self._versao = None
+        self._sincronizado_em = 0.0
+        self._construido_em = 0.0
+        self._reconstruindo = False
+        self._adicionados = []  # (pk, jti) deste processo durante a reconstrução
+
+    def _carregar(self, bloom, desde_id):
+        """Adicionar ao filtro as linhas com id > desde_id; retorna o maior id"""
+        config = get_blacklist_filter_config()
+        maior = desde_id
+        linhas = (
+            BlacklistedToken.objects.filter(id__gt=desde_id)
+            .order_by('id').values_list('id', 'token__jti')
+        )
+        for pk, jti in linhas.iterator(chunk_size=config['BATCH_SIZE']):
+            bloom.add(jti)
+            maior = max(maior, pk)
+        return maior
+
+    def reconstruir(self):
+        """
+        Recriar o filtro a partir da tabela inteira. A leitura roda fora do
+        lock: os demais requests seguem com o filtro anterior até a troca.
+        """
+        with self._lock:
+            if self._reconstruindo:
+                return  # outra thread já está reconstruindo
+            self._reconstruindo = True
+            self._adicionados = []
+        try:
+            config = get_blacklist_filter_config()
+            versao = cache.get(CACHE_KEY_BLACKLIST_VERSION)
+            total = BlacklistedToken.objects.count()
+            bloom = BloomFilter(max(config['CAPACITY'], 2 * total), config['ERROR_RATE'])
+            hwm = self._carregar(bloom, 0)
+            with self._lock:
+                for pk, jti in self._adicionados:
+                    bloom.add(jti)
+                    hwm = max(hwm, pk)
+                agora = time.monotonic()
+                self._bloom, self._hwm, self._versao = bloom, hwm, versao
+                self._sincronizado_em = self._construido_em = agora
+        finally:
+            with self._lock:
+                self._reconstruindo = False
+                self._adicionados = []
+
+    def sincronizar(self):
+        """Garantir filtro atualizado (consulta o banco só se necessário)"""
+        config = get_blacklist_filter_config()
+        agora = time.monotonic()
+        with self._lock:
+            vencido = (
+                self._bloom is None
+                or agora - self._construido_em >= config['REBUILD_INTERVAL']
+                or len(self._bloom) > self._bloom.capacidade
+            )
+        if vencido and not self._reconstruindo:
+            self.reconstruir()
+            return
+
+        with self._lock:
+            if self._bloom is None:
+                return  # primeira carga em andamento em outra thread
+            decorrido = agora - self._sincronizado_em
+            if decorrido < config['MIN_SYNC_INTERVAL']:
+                return
+            versao = cache.get(CACHE_KEY_BLACKLIST_VERSION)
+            if versao == self._versao and decorrido < config['SYNC_INTERVAL']:
+                return
+            self._hwm = self._carregar(self._bloom, max(self._hwm - config['OVERLAP'], 0))
+            self._versao = versao
+            self._sincronizado_em = agora
+
+    def talvez_contem(self, jti):
+        """False = certamente fora da blacklist"""
+        self.sincronizar()
+        bloom = self._bloom
+        # Sem filtro ainda (primeira carga em outra thread): decide o banco
+        return bloom is None or jti in bloom
+
+    def adicionar(self, pk, jti):
+        """Token colocado na blacklist por este processo"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+                self._hwm = max(self._hwm, pk)
+            if self._reconstruindo:
+                self._adicionados.append((pk, jti))
+        # Aviso aos outros processos só depois do commit: quem sincronizasse
+        # antes não veria a linha e daria a nova versão por lida
+        transaction.on_commit(self.publicar)
+
+    def publicar(self):
+        """Subir a versão no cache (outros processos sincronizam na próxima checagem)"""
+        try:
+            versao = cache.incr(CACHE_KEY_BLACKLIST_VERSION)
+        except ValueError:
+            cache.add(CACHE_KEY_BLACKLIST_VERSION, time.time_ns(), None)
+            versao = cache.incr(CACHE_KEY_BLACKLIST_VERSION)
+        with self._lock:
+            if self._bloom is not None and self._versao is not None and versao == self._versao + 1:
+                # Ninguém publicou nada desde a última leitura: continua em dia
+                self._versao = versao
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken que consulta o Bloom filter antes da tabela de blacklist"""
+
+    def check_blacklist(self):
+        if not filtro_ativo():
+            return super().check_blacklist()
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.talvez_contem(jti):
+            inc('token_blacklist_checks_total', (('result', 'filter_negative'),))
+            return None
+        try:
+            super().check_blacklist()
+        except Exception:
+            inc('token_blacklist_checks_total', (('result', 'blacklisted'),))
+            raise
+        inc('token_blacklist_checks_total', (('result', 'false_positive'),))
+        return None
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def adicionar_ao_filtro(sender, instance, created, **kwargs):
+    """Token na blacklist: entra no filtro deste processo e avisa os demais"""
+    if created:
+        blacklist_filter.adicionar(instance.pk, instance.token.jti)
+
+
+# ============================================================
+# Limpeza em lotes
+# ============================================================
+
+def prune_expired_tokens(batch_size=1000, sleep=0, agora=None, max_lotes=None):
+    """
+    Remover tokens expirados em lotes limitados por pk.
+
+    Cada lote é uma transação curta: apaga as linhas de BlacklistedToken e
+    depois as de OutstandingToken de até batch_size tokens expirados,
+    percorrendo a tabela pela pk (keyset) sem reler o que já passou.
+    Gera um dict por lote: {'lote', 'outstanding', 'blacklisted', 'ultimo_pk'}.
+    """
+    agora = agora or timezone.now()
+    ultimo_pk = 0
+    lote = 0
+    while max_lotes is None or lote < max_lotes:
+        pks = list(
+            OutstandingToken.objects.filter(pk__gt=ultimo_pk, expires_at__lt=agora)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        with transaction.atomic():
+            blacklisted, _ = BlacklistedToken.objects.filter(token_id__in=pks).delete()
+            outstanding, _ = OutstandingToken.objects.filter(pk__in=pks).delete()
+        lote += 1
+        ultimo_pk = pks[-1]
+        yield {'lote': lote, 'outstanding': outstanding, 'blacklisted': blacklisted, 'ultimo_pk': ultimo_pk}
+        if len(pks) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
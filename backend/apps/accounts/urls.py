@@ -1,6 +1,6 @@
 from django.urls import path, include
+from .login_async import login_view
 from .views import (
-    CustomTokenObtainPairView,
     CustomTokenRefreshView,  # ✅ ADICIONAR NOVA VIEW
     logout_view,
     status_online,
@@ -17,7 +17,7 @@ router.register(r'usuarios', UsuarioViewSet, basename='usuarios')
 
 urlpatterns = [
     # ✅ Autenticação JWT - TODOS com tags 'Autenticação'
-    path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', login_view, name='token_obtain_pair'),  # hash da senha em pool próprio (login_async)
     path('refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', logout_view, name='logout'),
 
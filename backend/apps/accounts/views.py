@@ -1,16 +1,20 @@
+import csv
+
 from rest_framework import viewsets, status, serializers
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser, MultiPartParser
 from django.contrib.auth import authenticate
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from django.db.models import Value
 from django.utils import timezone
 
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 
 from .models import Usuario
 from .serializers import (
@@ -18,14 +22,23 @@ from .serializers import (
     UsuarioBasicoSerializer,
     UsuarioDetalhadoSerializer,
     UsuarioCreateSerializer,
-    CustomTokenObtainPairSerializer
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer
 )
 from apps.controle_acesso.models import GrupoCustomizado
 from controle_acesso.serializers import GrupoSimplificadoSerializer
 from controle_acesso.permissions import RequirePermission, HasCustomPermission
+from core.change_feed import ChangeFeedMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin
 from core.filters import GlobalSearchFilter, UsuarioFilter
 from core.pagination import CustomPagination
+from core.utils.export import EXPORT_FORMATS, streaming_export_response
 from .validators import ValidacaoCompleta 
+from . import importacao
+from .throttling import LoginEmailThrottle, LoginIPThrottle, RefreshIPThrottle
+from .refresh import descartar_resultado
+from .token_blacklist import FilteredRefreshToken
 
 @extend_schema(
     summary="Login JWT",
@@ -44,19 +57,10 @@ from .validators import ValidacaoCompleta
     }
 )
 class CustomTokenObtainPairView(TokenObtainPairView):
-    """Login customizado que marca usuário como online"""
+    """Login customizado que marca usuário como online (no serializer, um único UPDATE)"""
     serializer_class = CustomTokenObtainPairSerializer
-
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == status.HTTP_200_OK:
-            email = request.data.get('email')
-            try:
-                user = Usuario.objects.get(email=email)
-                user.set_online()
-            except Usuario.DoesNotExist:
-                pass
-        return response
+    # Antes do serializer: tentativa recusada não calcula o hash da senha
+    throttle_classes = [LoginEmailThrottle, LoginIPThrottle]
 
 @extend_schema(
     summary="Logout",
@@ -78,7 +82,9 @@ def logout_view(request):
         request.user.set_offline()
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            # Sem par da janela de graça para quem ainda tiver o token
+            descartar_resultado(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         
         return Response({
@@ -151,8 +157,49 @@ def status_online(request):
         description="Inativa (soft delete) o usuário, sem excluir do banco de dados. O usuário deixa de ter acesso ao sistema, mas seus dados permanecem para histórico/auditoria.",
         tags=['Usuários'],  
     ),
+    exportar=extend_schema(
+        summary="Exportar usuários",
+        description="Exporta em streaming (CSV ou NDJSON) todos os usuários que atendem aos mesmos filtros, busca e ordenação da listagem, sem paginação",
+        tags=['Usuários'],
+        parameters=[
+            OpenApiParameter('formato', str, enum=list(EXPORT_FORMATS), description='csv (padrão) ou ndjson'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    ),
+    importar=extend_schema(
+        summary="Importar usuários",
+        description="Importa usuários em massa de um arquivo CSV/JSON (campo 'arquivo') ou de uma lista JSON em 'usuarios'. Linhas com erro são reportadas sem abortar as demais. Para arquivos grandes use o comando import_usuarios.",
+        tags=['Usuários'],
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'arquivo': {'type': 'string', 'format': 'binary'},
+                    'dry_run': {'type': 'boolean'},
+                }
+            },
+            'application/json': {
+                'type': 'object',
+                'properties': {
+                    'usuarios': {'type': 'array', 'items': {'type': 'object'}},
+                    'dry_run': {'type': 'boolean'},
+                }
+            },
+        },
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'total': {'type': 'integer'},
+                    'validos': {'type': 'integer'},
+                    'criados': {'type': 'integer'},
+                    'erros': {'type': 'array'},
+                }
+            }
+        },
+    ),
 )
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(ChangeFeedMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet completo para gerenciar usuários com validações de segurança"""
     queryset = Usuario.objects.filter(is_active=True).order_by('username')
     pagination_class = CustomPagination
@@ -170,6 +217,32 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     ]
     ordering = ['username']
     
+    # Exportação em streaming
+    export_fields = [
+        'id', 'username', 'email', 'first_name', 'last_name', 'telefone',
+        'is_active', 'is_online', 'date_joined', 'last_login', 'last_activity',
+    ]
+    export_chunk_size = 2000
+    
+    # Orçamento de queries por action (core.query_budget)
+    query_budget = {'list': 8, 'retrieve': 8, 'exportar': 8, 'default': 15}
+    
+    # ?fields= / ?omit=: do que dependem os campos calculados (core.fieldsets)
+    sparse_field_dependencies = {
+        'full_name': ['first_name', 'last_name', 'username'],
+        'tempo_offline_formatado': ['logout_time', 'is_online'],
+        'total_grupos': ['groups'],
+        'grupos_nomes': ['groups'],
+    }
+    
+    # ETag/Last-Modified (core.conditional): grupos do detalhe seguem a
+    # acl_version; tempo offline formatado muda a cada minuto
+    conditional_acl = True
+    conditional_volatile_fields = {'tempo_offline_formatado': 60}
+    
+    # /changes/ (core.change_feed): inativos saem como exclusão
+    change_feed_tombstone = {'is_active': False}
+    
     def get_serializer_class(self):
         """Escolher serializer baseado na action"""
         if self.action == 'list':
@@ -182,8 +255,19 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             return UsuarioSerializer
         return UsuarioBasicoSerializer
     
+    # Actions verificadas pela permissão customizada (HasCustomPermission)
+    custom_permission_actions = {
+        'exportar': 'accounts_visualizar',
+        'importar': 'accounts_criar',
+        'changes': 'accounts_visualizar',
+    }
+    
     def get_permissions(self):
         """Definir permissões baseadas na action"""
+        if self.action in self.custom_permission_actions:
+            self.permission_required = self.custom_permission_actions[self.action]
+            return [IsAuthenticated(), HasCustomPermission()]
+        
         if self.action == 'list':
             self.required_permission = 'accounts_visualizar'
         elif self.action == 'retrieve':
@@ -203,9 +287,15 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         
         include_inactive = self.request.query_params.get('include_inactive', 'false')
         if include_inactive.lower() != 'true':
-            queryset = queryset.filter(is_active=True)
+            # "is_active = true" explícito: com True puro o Django gera
+            # "WHERE is_active" e o SQLite ignora os índices (is_active, ...)
+            queryset = queryset.filter(is_active=Value(True))
         
-        return queryset
+        return self.restringir_queryset(queryset)
+    
+    def get_change_feed_queryset(self):
+        """Feed inclui os inativos (viram exclusão na réplica)"""
+        return Usuario.objects.all()
     
     def destroy(self, request, *args, **kwargs):
         """Inativa o usuário (soft delete), nunca exclui do banco de dados."""
@@ -229,6 +319,53 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         """Soft delete ao invés de exclusão definitiva"""
         instance.is_active = False
         instance.save()
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exportar usuários filtrados em streaming (memória constante)"""
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in EXPORT_FORMATS:
+            return Response(
+                {'formato': f"Formato inválido. Use: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Mesmos filtros, busca e ordenação da listagem, sem paginação
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*self.export_fields).iterator(chunk_size=self.export_chunk_size)
+        
+        return streaming_export_response(rows, self.export_fields, formato, 'usuarios')
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, JSONParser])
+    def importar(self, request):
+        """Importar usuários em massa (CSV/JSON), com erros por linha"""
+        arquivo = request.FILES.get('arquivo')
+        try:
+            if arquivo:
+                formato = request.data.get('formato') or importacao.detectar_formato(arquivo.name)
+                rows = importacao.ler_arquivo(arquivo.read(), formato)
+            else:
+                # Corpo JSON pode ser uma lista ou um valor solto (sem .get)
+                rows = request.data.get('usuarios') if isinstance(request.data, dict) else None
+                if not isinstance(rows, list):
+                    raise ValueError("Envie um arquivo em 'arquivo' ou uma lista em 'usuarios'.")
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        config = importacao.get_import_config()
+        max_linhas = config['max_linhas_api']
+        if len(rows) > max_linhas:
+            return Response(
+                {'detail': f'Máximo de {max_linhas} linhas por requisição. Use o comando import_usuarios.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = str(request.data.get('dry_run', 'false')).lower() == 'true'
+        # Hash em poucas threads: sem pool de processos dentro da request
+        resultado = importacao.importar_usuarios(
+            rows, workers=config['api_workers'], dry_run=dry_run, processos=False
+        )
+        return Response(resultado, status=status.HTTP_200_OK)
 
 @extend_schema(
     summary="Grupos do Usuário",
@@ -240,15 +377,16 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 class UsuarioGruposView(APIView):
     """Listar grupos de um usuário específico (perspectiva do usuário)"""
     permission_classes = [IsAuthenticated, HasCustomPermission]
+    query_budget = {'get': 8}
     
     def get(self, request, usuario_id):
         try:
             usuario = Usuario.objects.get(id=usuario_id, is_active=True)
-            grupos_django = usuario.groups.all()
+            # Um JOIN só (sem query por grupo para buscar o nome)
             grupos_custom = GrupoCustomizado.objects.filter(
-                group__in=grupos_django, 
+                group__user=usuario,
                 ativo=True
-            )
+            ).select_related('group')
             
             serializer = GrupoSimplificadoSerializer(grupos_custom, many=True)
             grupos_data = [g for g in serializer.data if g is not None]
@@ -289,7 +427,7 @@ class StatusOnlineView(APIView):
         
         # Atualiza a última atividade para agora
         usuario.last_activity = timezone.now()
-        usuario.save(update_fields=['last_activity'])
+        usuario.save(update_fields=['last_activity', 'updated_at'])
         
         return Response({
             "user": usuario.username,
@@ -367,7 +505,8 @@ class CustomTokenRefreshView(TokenRefreshView):
     O refresh token é válido por mais tempo que o access token,
     permitindo renovação automática sem novo login.
     """
-    pass
+    serializer_class = CustomTokenRefreshSerializer
+    throttle_classes = [RefreshIPThrottle]
 
 @extend_schema(
     summary="Meus Dados",
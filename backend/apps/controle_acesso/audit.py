@@ -1,6 +1,14 @@
+import ipaddress
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 from django.utils import timezone
+from rest_framework.throttling import BaseThrottle
 import json
 
 Usuario = get_user_model()
@@ -37,26 +45,199 @@ class PermissionAuditLog(models.Model):
         indexes = [
             models.Index(fields=['permission_name', '-timestamp']),
             models.Index(fields=['target_user', '-timestamp']),
+            # Listagem/paginação keyset por (timestamp, id) e filtros da API de auditoria
+            models.Index(fields=['-timestamp', '-id'], name='audit_timestamp_id_idx'),
+            models.Index(fields=['action', '-timestamp'], name='audit_action_ts_idx'),
+            models.Index(fields=['user', '-timestamp'], name='audit_user_ts_idx'),
+            models.Index(fields=['group_name', '-timestamp'], name='audit_group_ts_idx'),
         ]
     
     def __str__(self):
         return f"{self.action} - {self.permission_name} - {self.timestamp}"
 
+def get_client_ip(request):
+    """
+    Extrair IP do cliente do request.
+
+    Usa a mesma regra dos throttles (BaseThrottle.get_ident com
+    REST_FRAMEWORK['NUM_PROXIES']): o X-Forwarded-For só é considerado até o
+    número de proxies confiáveis, então o cliente não forja o IP auditado.
+    """
+    if not request:
+        return None
+    ip_address = BaseThrottle().get_ident(request)
+    try:
+        ipaddress.ip_address(ip_address)
+    except ValueError:
+        # NUM_PROXIES=None devolve a cadeia inteira: não é um IP válido
+        ip_address = request.META.get('REMOTE_ADDR')
+    return ip_address or None
+
 def log_permission_change(action, permission_name, user=None, target_user=None, 
                          group_name=None, details=None, request=None):
     """
     Registrar mudança de permissão
     """
-    ip_address = None
-    if request:
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR') or request.META.get('REMOTE_ADDR')
+    ip_address = get_client_ip(request)
     
     PermissionAuditLog.objects.create(
         user=user,
         action=action,
         permission_name=permission_name,
         target_user=target_user,
-        group_name=group_name,
+        group_name=group_name or '',
         details=details or {},
         ip_address=ip_address
-    )
\ No newline at end of file
+    )
+
+
+# ============================================================
+# Auditoria automática via m2m_changed
+# ============================================================
+
+# relação -> (through, campo do dono, campo relacionado, model do dono, model relacionado)
+M2M_RELACOES_AUDITADAS = {
+    'group.permissions': (Group.permissions.through, 'group_id', 'permission_id', Group, Permission),
+    'user.groups': (Usuario.groups.through, 'usuario_id', 'group_id', Usuario, Group),
+    'user.user_permissions': (Usuario.user_permissions.through, 'usuario_id', 'permission_id', Usuario, Permission),
+}
+
+M2M_ACTIONS = {
+    'post_add': 'GRANT',
+    'post_remove': 'REVOKE',
+    'post_clear': 'REVOKE',
+}
+
+
+def audit_m2m_enabled():
+    controle_config = getattr(settings, 'CONTROLE_ACESSO', {})
+    return controle_config.get('AUDIT_M2M_CHANGES', True)
+
+
+def _get_request_context():
+    """Actor e IP do request corrente (capturado pelo AuditContextMiddleware)"""
+    from apps.controle_acesso.middleware import get_current_request
+
+    request = get_current_request()
+    if request is None:
+        return None, None
+    user = getattr(request, 'user', None)
+    actor_id = user.pk if user is not None and user.is_authenticated else None
+    return actor_id, get_client_ip(request)
+
+
+def _m2m_pares(instance, reverse, pk_set):
+    """Normaliza o evento em pares (pk do dono, pk relacionado)"""
+    if reverse:
+        return [(pk, instance.pk) for pk in pk_set]
+    return [(instance.pk, pk) for pk in pk_set]
+
+
+def _m2m_nomes(model_cls, pks, instance):
+    """Nomes de grupos/permissões por pk, evitando query se o instance basta"""
+    campo = 'name' if model_cls is Group else 'codename'
+    if isinstance(instance, model_cls) and pks == {instance.pk}:
+        return {instance.pk: getattr(instance, campo)}
+    return dict(model_cls.objects.filter(pk__in=pks).values_list('pk', campo))
+
+
+def build_m2m_audit_batch(relacao, instance, action, reverse, pk_set):
+    """
+    Montar (sem salvar) as linhas de auditoria de uma operação m2m.
+
+    Uma operação em lote gera um único lote: uma linha por pk de pk_set,
+    com nomes resolvidos em no máximo uma query por model relacionado.
+    """
+    _, _, _, owner_model, related_model = M2M_RELACOES_AUDITADAS[relacao]
+    pares = _m2m_pares(instance, reverse, pk_set)
+    if not pares:
+        return []
+
+    nomes = {}
+    for model_cls, pks in (
+        (owner_model, {owner_pk for owner_pk, _ in pares}),
+        (related_model, {related_pk for _, related_pk in pares}),
+    ):
+        if model_cls is not Usuario:
+            nomes[model_cls] = _m2m_nomes(model_cls, pks, instance)
+    nomes_grupos = nomes.get(Group, {})
+    nomes_permissoes = nomes.get(Permission, {})
+
+    actor_id, ip_address = _get_request_context()
+    timestamp = timezone.now()
+    details = {'relacao': relacao, 'origem': 'm2m_changed', 'lote': uuid.uuid4().hex}
+    audit_action = M2M_ACTIONS[action]
+
+    logs = []
+    for owner_pk, related_pk in pares:
+        if relacao == 'group.permissions':
+            permission_name = nomes_permissoes.get(related_pk, '')
+            group_name = nomes_grupos.get(owner_pk, '')
+            target_user_id = None
+        elif relacao == 'user.groups':
+            permission_name = ''
+            group_name = nomes_grupos.get(related_pk, '')
+            target_user_id = owner_pk
+        else:
+            permission_name = nomes_permissoes.get(related_pk, '')
+            group_name = ''
+            target_user_id = owner_pk
+
+        logs.append(PermissionAuditLog(
+            user_id=actor_id,
+            action=audit_action,
+            permission_name=permission_name,
+            target_user_id=target_user_id,
+            group_name=group_name,
+            details=details,
+            ip_address=ip_address,
+            timestamp=timestamp,
+        ))
+    return logs
+
+
+def _audit_m2m_changed(relacao, instance, action, reverse, pk_set):
+    if not audit_m2m_enabled():
+        return
+
+    through, owner_field, related_field, _, _ = M2M_RELACOES_AUDITADAS[relacao]
+
+    if action == 'pre_clear':
+        # clear() não informa pk_set: guardar os vínculos antes de apagar
+        filtro, coluna = (related_field, owner_field) if reverse else (owner_field, related_field)
+        instance._audit_pre_clear = set(
+            through.objects.filter(**{filtro: instance.pk}).values_list(coluna, flat=True)
+        )
+        return
+
+    if action not in M2M_ACTIONS:
+        return
+
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_audit_pre_clear', None)
+        instance.__dict__.pop('_audit_pre_clear', None)
+
+    if not pk_set:
+        return
+
+    logs = build_m2m_audit_batch(relacao, instance, action, reverse, pk_set)
+    if logs:
+        PermissionAuditLog.objects.bulk_create(logs)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def audit_group_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Auditar Group.permissions (e Permission.group_set)"""
+    _audit_m2m_changed('group.permissions', instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def audit_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """Auditar Usuario.groups (e Group.user_set)"""
+    _audit_m2m_changed('user.groups', instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Usuario.user_permissions.through)
+def audit_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Auditar Usuario.user_permissions (e Permission.user_set)"""
+    _audit_m2m_changed('user.user_permissions', instance, action, reverse, pk_set)
@@ -0,0 +1,126 @@
+"""
+Cache das respostas do catálogo de permissões (list/retrieve)
+
+O catálogo (PermissaoCustomizada) só muda no sync/cadastro, mas cada
+GET consultava o banco e rodava os SerializerMethodField por linha. A
+resposta JSON já renderizada (bytes + ETag/Last-Modified) fica no cache,
+com chave = versão do catálogo + action + path + query params ordenados.
+
+A versão sobe no receiver invalidate_permissions_cache (post_save/
+post_delete de PermissaoCustomizada): entradas antigas deixam de ser
+lidas e expiram sozinhas. Um hit não toca o banco do catálogo nem os
+serializers; a checagem de permissão do usuário continua a mesma.
+
+Só respostas JSON são guardadas (a API navegável leva dados do usuário).
+
+A versão precisa chegar a todos os workers: com o cache default por
+processo (locmem) uma permissão salva em um worker deixaria os demais
+servindo o catálogo antigo até o CATALOG_CACHE_TIMEOUT. Nesses backends o
+cache de respostas fica desligado, salvo CATALOG_CACHE_REQUIRE_SHARED=False.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from apps.accounts.token_blacklist import cache_local_recusado
+from core.metrics import record_cache_access
+
+CACHE_KEY_CATALOG_VERSION = 'permissoes_catalogo_version'
+CACHE_KEY_CATALOG_RESPONSE = 'permissoes_catalogo_{versao}_{hash}'
+HEADERS_GUARDADOS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def get_catalog_cache_config():
+    controle_config = getattr(settings, 'CONTROLE_ACESSO', {})
+    return {
+        'enabled': controle_config.get('CATALOG_RESPONSE_CACHE', True),
+        'timeout': controle_config.get('CATALOG_CACHE_TIMEOUT', 3600),
+        'require_shared_cache': controle_config.get('CATALOG_CACHE_REQUIRE_SHARED', True),
+    }
+
+
+def catalog_cache_ativo(config):
+    """Cache habilitado e compartilhado entre os workers (senão consulta o banco)"""
+    return config['enabled'] and not cache_local_recusado(
+        'CATALOG_RESPONSE_CACHE', {'REQUIRE_SHARED_CACHE': config['require_shared_cache']}
+    )
+
+
+def get_catalog_version():
+    """Versão do catálogo (recomeça de um timestamp se a chave sumir)"""
+    versao = cache.get(CACHE_KEY_CATALOG_VERSION)
+    if versao is None:
+        cache.add(CACHE_KEY_CATALOG_VERSION, time.time_ns(), None)
+        versao = cache.get(CACHE_KEY_CATALOG_VERSION)
+    return versao
+
+
+def bump_catalog_version():
+    """Invalidar todas as respostas do catálogo em cache"""
+    try:
+        return cache.incr(CACHE_KEY_CATALOG_VERSION)
+    except ValueError:
+        cache.add(CACHE_KEY_CATALOG_VERSION, time.time_ns(), None)
+        return cache.incr(CACHE_KEY_CATALOG_VERSION)
+
+
+def chave_resposta(request, action):
+    params = sorted((nome, valores) for nome, valores in request.query_params.lists())
+    assinatura = repr((action, request.path, params, request.accepted_media_type))
+    return CACHE_KEY_CATALOG_RESPONSE.format(
+        versao=get_catalog_version(),
+        hash=hashlib.md5(assinatura.encode()).hexdigest(),
+    )
+
+
+def _resposta_do_cache(request, entrada):
+    etag = entrada['headers'].get('ETag')
+    last_modified = parse_http_date_safe(entrada['headers'].get('Last-Modified', ''))
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(entrada['content'], content_type=entrada['content_type'])
+    elif not isinstance(response, HttpResponseNotModified):
+        return response
+    for nome, valor in entrada['headers'].items():
+        response[nome] = valor
+    return response
+
+
+class CatalogCacheMixin:
+    """Mixin da PermissaoCustomizadaViewSet: list/retrieve servidos do cache"""
+
+    def _responder_catalogo(self, request, metodo, *args, **kwargs):
+        config = get_catalog_cache_config()
+        if not catalog_cache_ativo(config) or request.accepted_renderer.format != 'json':
+            return metodo(request, *args, **kwargs)
+
+        chave = chave_resposta(request, self.action)
+        entrada = cache.get(chave)
+        record_cache_access('permission_catalog', entrada is not None)
+        if entrada is not None:
+            return _resposta_do_cache(request, entrada)
+
+        response = metodo(request, *args, **kwargs)
+        if response.status_code == 200:
+            def guardar(response_renderizada):
+                cache.set(chave, {
+                    'content': response_renderizada.content,
+                    'content_type': response_renderizada['Content-Type'],
+                    'headers': {
+                        nome: response_renderizada[nome]
+                        for nome in HEADERS_GUARDADOS if response_renderizada.has_header(nome)
+                    },
+                }, config['timeout'])
+            response.add_post_render_callback(guardar)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_catalogo(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_catalogo(request, super().retrieve, *args, **kwargs)
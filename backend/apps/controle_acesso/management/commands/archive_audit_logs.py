@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso import retention
+
+class Command(BaseCommand):
+    help = 'Arquivar (JSONL.gz por dia) e remover em lotes logs de auditoria antigos'
+
+    def add_arguments(self, parser):
+        config = retention.get_retention_config()
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=config['days'],
+            help=f"Arquivar logs mais antigos que N dias (padrão: {config['days']})",
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=str(config['archive_dir']),
+            help='Diretório dos arquivos de auditoria',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=config['chunk_size'],
+            help='Linhas lidas por vez do banco (iterator chunk_size)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=config['batch_size'],
+            help='Linhas removidas por DELETE',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Pausa em segundos entre lotes de DELETE',
+        )
+        parser.add_argument(
+            '--drop-partitions',
+            action='store_true',
+            help='MySQL particionado: descartar partições inteiras já arquivadas antes do DELETE em lotes',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostrar quantas linhas seriam arquivadas',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Arquivar sem remover do banco',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = retention.get_cutoff(options['days'])
+        self.stdout.write(f"🗄️  Arquivando logs anteriores a {cutoff:%Y-%m-%d %H:%M}...")
+
+        if options['dry_run']:
+            count = PermissionAuditLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(f"🔍 {count} logs seriam arquivados em {options['output_dir']} (DRY-RUN)")
+            return
+
+        total, max_pk, arquivos = retention.archive_logs(
+            cutoff, options['output_dir'], chunk_size=options['chunk_size']
+        )
+        self.stdout.write(f"📦 {total} logs arquivados em {len(arquivos)} arquivo(s)")
+
+        # Retry depois de uma falha: nada novo, mas as linhas já arquivadas ainda saem do banco
+        if options['keep'] or max_pk is None:
+            self.stdout.write(self.style.SUCCESS('✅ Arquivamento concluído!'))
+            return
+
+        if options['drop_partitions'] and retention.is_mysql():
+            statements = retention.build_partition_drop_sql(cutoff)
+            retention.execute_statements(statements)
+            for sql in statements:
+                self.stdout.write(f"  🗑️  {sql}")
+
+        removed = 0
+        for lote, deleted in enumerate(
+            retention.delete_archived_logs(
+                cutoff, max_pk, batch_size=options['batch_size'], sleep=options['sleep']
+            ),
+            start=1,
+        ):
+            removed += deleted
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  🗑️  Lote {lote}: {deleted} logs removidos")
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Arquivamento concluído! {removed} logs removidos do banco.')
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso import retention
+
+class Command(BaseCommand):
+    help = 'Particionamento mensal opcional de permission_audit_logs (apenas MySQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--setup',
+            action='store_true',
+            help='Converter a tabela em particionada por mês (remove as FKs de user/target_user)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Quantidade de meses futuros com partição criada',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostrar o SQL, sem executar',
+        )
+
+    def handle(self, *args, **options):
+        if not retention.is_mysql():
+            raise CommandError('Particionamento disponível apenas para MySQL.')
+
+        partitions = retention.get_partitions()
+
+        if options['setup']:
+            if partitions:
+                raise CommandError('A tabela já está particionada. Execute sem --setup para criar novos meses.')
+            oldest = PermissionAuditLog.objects.aggregate(oldest=Min('timestamp'))['oldest']
+            first_month = timezone.localtime(oldest).date() if oldest else timezone.now().date()
+            statements = retention.build_partition_setup_sql(first_month, options['months_ahead'])
+        else:
+            if not partitions:
+                raise CommandError('A tabela não está particionada. Use --setup primeiro.')
+            statements = retention.build_partition_rotate_sql(options['months_ahead'])
+
+        if not statements:
+            self.stdout.write('✅ Partições já estão atualizadas.')
+            return
+
+        for sql in statements:
+            self.stdout.write(sql)
+
+        if options['dry_run']:
+            self.stdout.write('🔍 Simulação concluída (DRY-RUN)')
+            return
+
+        retention.execute_statements(statements)
+        self.stdout.write(self.style.SUCCESS('✅ Particionamento aplicado!'))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.controle_acesso.tombstones import RegistroExcluido, purge_tombstones
+from core.change_feed import get_change_feed_config
+
+
+class Command(BaseCommand):
+    help = 'Remover em lotes as lápides do feed /changes/ mais antigas que a retenção'
+
+    def add_arguments(self, parser):
+        dias = get_change_feed_config()['TOMBSTONE_RETENTION_DAYS']
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=dias,
+            help=f'Remover lápides mais antigas que N dias (padrão: {dias})',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Lápides removidas por DELETE')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas contar')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        self.stdout.write(f"🪦 Lápides anteriores a {cutoff:%Y-%m-%d %H:%M}...")
+
+        if options['dry_run']:
+            total = RegistroExcluido.objects.filter(deleted_at__lt=cutoff).count()
+            self.stdout.write(f"🔍 {total} lápides seriam removidas")
+            return
+
+        total = sum(purge_tombstones(cutoff, batch_size=options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} lápides removidas"))
+        if options['days'] < get_change_feed_config()['TOMBSTONE_RETENTION_DAYS']:
+            self.stdout.write('⚠️  Menos dias que TOMBSTONE_RETENTION_DAYS: cursores dentro da retenção podem perder exclusões')
@@ -0,0 +1,46 @@
+import json
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.controle_acesso import retention
+
+class Command(BaseCommand):
+    help = 'Buscar logs de auditoria nos arquivos (offline, sem acessar o banco)'
+
+    def add_arguments(self, parser):
+        config = retention.get_retention_config()
+        parser.add_argument('--dir', type=str, default=str(config['archive_dir']), help='Diretório dos arquivos')
+        parser.add_argument('--since', type=str, help='Data inicial (AAAA-MM-DD)')
+        parser.add_argument('--until', type=str, help='Data final (AAAA-MM-DD)')
+        parser.add_argument('--user', type=int, help='ID do usuário que fez a alteração')
+        parser.add_argument('--target-user', type=int, help='ID do usuário afetado')
+        parser.add_argument('--action', type=str, help='Ação (GRANT, REVOKE, ...)')
+        parser.add_argument('--permission', type=str, help='Trecho do nome da permissão')
+        parser.add_argument('--group', type=str, help='Trecho do nome do grupo')
+        parser.add_argument('--limit', type=int, default=100, help='Máximo de linhas (0 = sem limite)')
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options['since']) if options['since'] else None
+            until = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as e:
+            raise CommandError(f"Data inválida: {e}")
+
+        rows = retention.search_archive(
+            options['dir'],
+            since=since,
+            until=until,
+            user_id=options['user'],
+            target_user_id=options['target_user'],
+            action=options['action'],
+            permission_name=options['permission'],
+            group_name=options['group'],
+        )
+
+        count = 0
+        for row in rows:
+            self.stdout.write(json.dumps(row, ensure_ascii=False))
+            count += 1
+            if options['limit'] and count >= options['limit']:
+                break
+
+        self.stderr.write(f"🔍 {count} logs encontrados")
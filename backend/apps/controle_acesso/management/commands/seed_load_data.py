@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.controle_acesso import seed
+
+class Command(BaseCommand):
+    help = 'Gerar massa de dados de carga (usuários, grupos, vínculos, presença e auditoria)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Número de usuários (padrão: 1000)')
+        parser.add_argument('--groups', type=int, default=50, help='Número de grupos customizados (padrão: 50)')
+        parser.add_argument(
+            '--groups-per-user',
+            type=int,
+            default=2,
+            help='Média de grupos por usuário (sorteio entre 0 e o dobro)',
+        )
+        parser.add_argument(
+            '--distribution',
+            choices=seed.DISTRIBUICOES,
+            default='zipf',
+            help='Distribuição dos membros entre grupos (zipf: poucos grupos muito populares)',
+        )
+        parser.add_argument('--perms-per-group', type=int, default=5, help='Permissões por grupo')
+        parser.add_argument('--online-ratio', type=float, default=0.1, help='Fração de usuários online')
+        parser.add_argument('--inactive-ratio', type=float, default=0.05, help='Fração de usuários inativos')
+        parser.add_argument(
+            '--audit-logs',
+            type=int,
+            default=None,
+            help='Linhas de histórico de auditoria (padrão: uma por usuário)',
+        )
+        parser.add_argument('--audit-days', type=int, default=365, help='Período do histórico de auditoria em dias')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (dados determinísticos)')
+        parser.add_argument('--prefix', type=str, default='carga_', help='Prefixo de usernames e grupos gerados')
+        parser.add_argument('--password', type=str, default='carga12345', help='Senha de todos os usuários gerados')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Linhas por bulk_create')
+        parser.add_argument(
+            '--admin',
+            action='store_true',
+            help='Criar também um superusuário <prefixo>admin@carga.test com a mesma senha',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remover antes os dados gerados anteriormente com o mesmo prefixo',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        if options['clear']:
+            self.stdout.write(f"🧹 Removendo dados com prefixo '{options['prefix']}'...")
+            removidos = seed.limpar_dados(options['prefix'], options['batch_size'])
+            self.stdout.write(f"🗑️  {removidos} usuários removidos")
+
+        self.stdout.write(
+            f"🌱 Gerando {options['users']} usuários e {options['groups']} grupos "
+            f"(seed={options['seed']}, distribuição={options['distribution']})..."
+        )
+        seed.seed_load_data(
+            usuarios=options['users'],
+            grupos=options['groups'],
+            grupos_por_usuario=options['groups_per_user'],
+            distribuicao=options['distribution'],
+            perms_por_grupo=options['perms_per_group'],
+            online_ratio=options['online_ratio'],
+            inactive_ratio=options['inactive_ratio'],
+            auditoria=options['audit_logs'],
+            auditoria_dias=options['audit_days'],
+            seed=options['seed'],
+            prefixo=options['prefix'],
+            senha=options['password'],
+            batch_size=options['batch_size'],
+            admin=options['admin'],
+            stdout=self.stdout,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Dados de carga gerados em {time.perf_counter() - inicio:.1f}s"
+        ))
@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+
+# Request corrente, disponível para signals que não recebem o request
+_current_request = ContextVar('controle_acesso_current_request', default=None)
+
+
+def get_current_request():
+    """Retorna o request em processamento (ou None fora de um request)"""
+    return _current_request.get()
+
+
+class AuditContextMiddleware:
+    """
+    Captura o request corrente para a auditoria automática de permissões.
+
+    O usuário (actor) é lido apenas no momento do registro, pois a
+    autenticação JWT do DRF só acontece dentro da view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controle_acesso', '0002_permissaocustomizada_updated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermissionAuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('GRANT', 'Permissão Concedida'), ('REVOKE', 'Permissão Revogada'), ('CREATE', 'Permissão Criada'), ('DELETE', 'Permissão Deletada'), ('SYNC', 'Sincronização de Permissões')], max_length=10)),
+                ('permission_name', models.CharField(max_length=100)),
+                ('group_name', models.CharField(blank=True, max_length=150)),
+                ('details', models.JSONField(default=dict)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('target_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='permission_logs_as_target', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'permission_audit_logs',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['permission_name', '-timestamp'], name='permission__permiss_419851_idx'), models.Index(fields=['target_user', '-timestamp'], name='permission__target__3c5ce9_idx')],
+            },
+        ),
+    ]
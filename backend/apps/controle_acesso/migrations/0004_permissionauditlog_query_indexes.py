@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controle_acesso', '0003_permissionauditlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permissionauditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='audit_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permissionauditlog',
+            index=models.Index(fields=['action', '-timestamp'], name='audit_action_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permissionauditlog',
+            index=models.Index(fields=['user', '-timestamp'], name='audit_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permissionauditlog',
+            index=models.Index(fields=['group_name', '-timestamp'], name='audit_group_ts_idx'),
+        ),
+    ]
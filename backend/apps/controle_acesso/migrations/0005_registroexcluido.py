@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('controle_acesso', '0004_permissionauditlog_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroExcluido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=100)),
+                ('objeto_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Registro Excluído',
+                'verbose_name_plural': 'Registros Excluídos',
+                'db_table': 'sis_registros_excluidos',
+                'indexes': [models.Index(fields=['modelo', 'deleted_at', 'id'], name='excluido_modelo_ts_idx'), models.Index(fields=['deleted_at'], name='excluido_ts_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import Group, Permission
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 from typing import TYPE_CHECKING
 
@@ -31,10 +31,15 @@ class GrupoCustomizado(models.Model):
     
     @property
     def total_usuarios(self):
+        # Usa a contagem anotada na listagem (evita uma query por grupo)
+        if hasattr(self, 'usuarios_count'):
+            return self.usuarios_count
         return self.group.user_set.count()
 
     @property
     def total_permissoes(self):
+        if hasattr(self, 'permissoes_count'):
+            return self.permissoes_count
         return self.group.permissions.count()
 
 class PermissaoCustomizada(models.Model):
@@ -81,5 +86,32 @@ class PermissaoCustomizada(models.Model):
 @receiver([post_save, post_delete], sender=PermissaoCustomizada)
 def invalidate_permissions_cache(sender, **kwargs):
     """Invalidar cache quando permissões mudarem"""
-    from .utils import invalidate_app_permissions_cache
+    from .catalog_cache import bump_catalog_version
+    from .utils import bump_acl_version, invalidate_app_permissions_cache
     invalidate_app_permissions_cache()
+    bump_acl_version()
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_acl_group_deleted(sender, **kwargs):
+    """Grupo removido (permissões dos membros mudaram) ou renomeado"""
+    from .utils import bump_acl_version
+    bump_acl_version()
+
+
+def invalidate_acl_m2m_changed(sender, action, **kwargs):
+    """Vínculos grupo/permissão/usuário alterados: snapshots de usuário obsoletos"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from .utils import bump_acl_version
+        bump_acl_version()
+
+
+for _through in (Group.permissions.through, Group.user_set.through, Permission.user_set.through):
+    m2m_changed.connect(invalidate_acl_m2m_changed, sender=_through, dispatch_uid=f'acl_{_through._meta.label}')
+
+# Model de auditoria e receivers m2m_changed vivem em audit.py
+from apps.controle_acesso.audit import PermissionAuditLog  # noqa: E402,F401
+
+# Lápides do feed de alterações (core.change_feed) vivem em tombstones.py
+from apps.controle_acesso.tombstones import RegistroExcluido  # noqa: E402,F401
@@ -0,0 +1,312 @@
+"""
+Retenção do log de auditoria (permission_audit_logs)
+
+- Arquivamento: linhas antigas são lidas em streaming e gravadas em
+  arquivos JSONL comprimidos (gzip), um arquivo por dia, sem duplicar
+  linhas já arquivadas (pode ser repetido).
+- Remoção: após arquivadas, as linhas são apagadas em lotes limitados
+  por chave primária, sem travar a tabela inteira.
+- Particionamento opcional por mês no MySQL (DROP PARTITION em vez de DELETE).
+- Leitura offline dos arquivos para investigações sem acesso ao banco.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.controle_acesso.audit import PermissionAuditLog
+
+ARCHIVE_PREFIX = 'permission_audit_logs'
+ARCHIVE_FIELDS = [
+    'id', 'timestamp', 'action', 'permission_name', 'user_id',
+    'target_user_id', 'group_name', 'details', 'ip_address',
+]
+
+
+def get_retention_config():
+    """Configurações de retenção (CONTROLE_ACESSO)"""
+    controle_config = getattr(settings, 'CONTROLE_ACESSO', {})
+    return {
+        'days': controle_config.get('AUDIT_RETENTION_DAYS', 365),
+        'archive_dir': Path(controle_config.get(
+            'AUDIT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archives' / 'audit_logs'
+        )),
+        'chunk_size': controle_config.get('AUDIT_ARCHIVE_CHUNK_SIZE', 2000),
+        'batch_size': controle_config.get('AUDIT_DELETE_BATCH_SIZE', 1000),
+    }
+
+
+def get_cutoff(days):
+    """Data limite: linhas com timestamp anterior são arquivadas"""
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_path(archive_dir, dia):
+    """Caminho do arquivo de um dia: <dir>/AAAA/MM/permission_audit_logs-AAAA-MM-DD.jsonl.gz"""
+    return Path(archive_dir) / f"{dia:%Y}" / f"{dia:%m}" / f"{ARCHIVE_PREFIX}-{dia:%Y-%m-%d}.jsonl.gz"
+
+
+# ============================================================
+# Arquivamento e remoção
+# ============================================================
+
+def _abrir_dia(path):
+    """
+    Temporário do arquivo do dia com as linhas já arquivadas copiadas.
+
+    Retorna (arquivo temporário, ids já presentes no arquivo do dia).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporario = path.with_name(path.name + '.tmp')
+    destino = gzip.open(temporario, 'wt', encoding='utf-8')
+    ids = set()
+    if path.exists():
+        with gzip.open(path, 'rt', encoding='utf-8') as existente:
+            for linha in existente:
+                if linha.strip():
+                    ids.add(json.loads(linha)['id'])
+                    destino.write(linha)
+    return destino, ids
+
+
+def archive_logs(cutoff, archive_dir, chunk_size=2000):
+    """
+    Gravar em arquivos diários as linhas com timestamp < cutoff.
+
+    Lê com .iterator(chunk_size) ordenado por (timestamp, id), mantendo
+    apenas um arquivo aberto por vez. Idempotente: o arquivo do dia é
+    regravado num temporário com as linhas já arquivadas + as novas (ids
+    já presentes são pulados) e substitui o original com os.replace. Nova
+    execução, --keep ou retry depois de uma falha antes da remoção não
+    duplicam linhas, e uma falha no meio não corrompe o arquivo.
+
+    Retorna (linhas novas arquivadas, maior pk arquivado, arquivos gravados).
+    O maior pk inclui linhas que já estavam no arquivo: podem ser removidas.
+    """
+    queryset = (
+        PermissionAuditLog.objects
+        .filter(timestamp__lt=cutoff)
+        .order_by('timestamp', 'id')
+        .values(*ARCHIVE_FIELDS)
+    )
+
+    total = 0
+    max_pk = None
+    arquivos = []
+    dia_atual = None
+    arquivo = None
+    ids_arquivados = set()
+    try:
+        for row in queryset.iterator(chunk_size=chunk_size):
+            dia = timezone.localtime(row['timestamp']).date()
+            if dia != dia_atual:
+                if arquivo:
+                    arquivo.close()
+                    os.replace(arquivo.name, arquivos[-1])
+                    arquivo = None
+                path = archive_path(archive_dir, dia)
+                arquivo, ids_arquivados = _abrir_dia(path)
+                arquivos.append(path)
+                dia_atual = dia
+            max_pk = row['id'] if max_pk is None else max(max_pk, row['id'])
+            if row['id'] in ids_arquivados:
+                continue
+            arquivo.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            arquivo.write('\n')
+            total += 1
+        if arquivo:
+            arquivo.close()
+            os.replace(arquivo.name, arquivos[-1])
+            arquivo = None
+    finally:
+        if arquivo:
+            # Falha no meio do dia: o arquivo original fica como estava
+            arquivo.close()
+            Path(arquivo.name).unlink(missing_ok=True)
+
+    return total, max_pk, arquivos
+
+
+def delete_archived_logs(cutoff, max_pk, batch_size=1000, sleep=0):
+    """
+    Apagar em lotes limitados por pk as linhas já arquivadas.
+
+    Só remove linhas com timestamp < cutoff e pk <= max_pk (o maior pk
+    gravado no arquivo), para nunca apagar algo que não foi arquivado.
+    Gera o número de linhas removidas em cada lote.
+    """
+    if max_pk is None:
+        return
+    queryset = PermissionAuditLog.objects.filter(timestamp__lt=cutoff, pk__lte=max_pk)
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic():
+            deleted, _ = PermissionAuditLog.objects.filter(pk__in=pks).delete()
+        yield deleted
+        if len(pks) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+
+# ============================================================
+# Leitura offline
+# ============================================================
+
+def iter_archive(archive_dir, since=None, until=None):
+    """
+    Ler linhas arquivadas (dicts) entre as datas since/until (inclusivas).
+
+    Só abre os arquivos diários dentro do intervalo.
+    """
+    for path in sorted(Path(archive_dir).glob(f"*/*/{ARCHIVE_PREFIX}-*.jsonl.gz")):
+        dia = date.fromisoformat(path.name[len(ARCHIVE_PREFIX) + 1:].split('.')[0])
+        if since and dia < since:
+            continue
+        if until and dia > until:
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    yield json.loads(linha)
+
+
+def search_archive(archive_dir, since=None, until=None, user_id=None, target_user_id=None,
+                   action=None, permission_name=None, group_name=None):
+    """Filtrar linhas arquivadas pelos mesmos campos do log"""
+    for row in iter_archive(archive_dir, since=since, until=until):
+        if user_id is not None and row.get('user_id') != user_id:
+            continue
+        if target_user_id is not None and row.get('target_user_id') != target_user_id:
+            continue
+        if action and row.get('action') != action:
+            continue
+        if permission_name and permission_name not in (row.get('permission_name') or ''):
+            continue
+        if group_name and group_name not in (row.get('group_name') or ''):
+            continue
+        yield row
+
+
+# ============================================================
+# Particionamento mensal (MySQL)
+# ============================================================
+
+def is_mysql():
+    return connection.vendor == 'mysql'
+
+
+def mysql_to_days(dia):
+    """Equivalente ao TO_DAYS() do MySQL"""
+    return dia.toordinal() + 365
+
+
+def month_start(dia, offset=0):
+    """Primeiro dia do mês de `dia`, deslocado `offset` meses"""
+    mes = dia.month - 1 + offset
+    return date(dia.year + mes // 12, mes % 12 + 1, 1)
+
+
+def partition_name(inicio_mes):
+    return f"p{inicio_mes:%Y%m}"
+
+
+def partition_definition(inicio_mes):
+    """Partição que guarda o mês iniciado em inicio_mes"""
+    fim = month_start(inicio_mes, 1)
+    return f"PARTITION {partition_name(inicio_mes)} VALUES LESS THAN (TO_DAYS('{fim:%Y-%m-%d}'))"
+
+
+def get_partitions(table=None):
+    """Lista [(nome, limite TO_DAYS ou None para MAXVALUE)] da tabela no MySQL"""
+    table = table or PermissionAuditLog._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [table],
+        )
+        return [
+            (nome, None if descricao == 'MAXVALUE' else int(descricao))
+            for nome, descricao in cursor.fetchall()
+        ]
+
+
+def build_partition_setup_sql(primeiro_mes, months_ahead=3, table=None):
+    """
+    SQL para converter a tabela em particionada por mês.
+
+    O MySQL exige que a chave de particionamento faça parte da PK e não
+    aceita foreign keys em tabelas particionadas: as FKs de user/target_user
+    são removidas (as colunas e índices permanecem).
+    """
+    table = table or PermissionAuditLog._meta.db_table
+    statements = []
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    for nome, info in constraints.items():
+        if info.get('foreign_key'):
+            statements.append(f"ALTER TABLE `{table}` DROP FOREIGN KEY `{nome}`")
+    statements.append(f"ALTER TABLE `{table}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `timestamp`)")
+
+    hoje = timezone.now().date()
+    meses = []
+    mes = month_start(primeiro_mes)
+    ultimo = month_start(hoje, months_ahead)
+    while mes <= ultimo:
+        meses.append(partition_definition(mes))
+        mes = month_start(mes, 1)
+    meses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    statements.append(
+        f"ALTER TABLE `{table}` PARTITION BY RANGE (TO_DAYS(`timestamp`)) (\n    "
+        + ",\n    ".join(meses) + "\n)"
+    )
+    return statements
+
+
+def build_partition_rotate_sql(months_ahead=3, table=None):
+    """SQL para criar partições dos próximos meses a partir da pmax"""
+    table = table or PermissionAuditLog._meta.db_table
+    existentes = {nome for nome, _ in get_partitions(table)}
+    hoje = timezone.now().date()
+    novos = []
+    for offset in range(months_ahead + 1):
+        mes = month_start(hoje, offset)
+        if partition_name(mes) not in existentes:
+            novos.append(partition_definition(mes))
+    if not novos:
+        return []
+    novos.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return [
+        f"ALTER TABLE `{table}` REORGANIZE PARTITION pmax INTO (\n    "
+        + ",\n    ".join(novos) + "\n)"
+    ]
+
+
+def build_partition_drop_sql(cutoff, table=None):
+    """SQL para descartar partições inteiramente anteriores ao cutoff"""
+    table = table or PermissionAuditLog._meta.db_table
+    limite = mysql_to_days(cutoff.date() if isinstance(cutoff, datetime) else cutoff)
+    antigas = [
+        nome for nome, fim in get_partitions(table)
+        if fim is not None and fim <= limite
+    ]
+    if not antigas:
+        return []
+    return [f"ALTER TABLE `{table}` DROP PARTITION {', '.join(antigas)}"]
+
+
+def execute_statements(statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -0,0 +1,276 @@
+"""
+Geração de dados de carga (comando seed_load_data)
+
+Cria usuários, grupos customizados, vínculos usuário/grupo, permissões por
+grupo, estado de presença e histórico de auditoria em volumes realistas
+para benchmarks e testes de carga.
+
+- Determinístico: mesma semente + mesmos parâmetros = mesmos dados
+- Rápido: bulk_create em lotes e inserts diretos nas tabelas m2m
+  (sem signals de auditoria); o hash da senha é calculado uma única vez
+- Todos os registros usam o prefixo informado, para limpeza com --clear
+"""
+import random
+import time
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import Usuario
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+
+SEED_ORIGEM = 'seed_load_data'
+DISTRIBUICOES = ['uniforme', 'zipf']
+
+PRIMEIROS_NOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique',
+    'Isabela', 'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael',
+    'Sofia', 'Thiago', 'Vanessa', 'Yuri',
+]
+SOBRENOMES = [
+    'Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima', 'Martins',
+    'Oliveira', 'Pereira', 'Ribeiro', 'Rocha', 'Santos', 'Silva', 'Souza',
+]
+# Permissões atribuídas aos grupos gerados (as mesmas checadas pelas views)
+PERMISSOES_CARGA = {
+    'accounts': ['criar', 'visualizar', 'editar', 'inativar'],
+    'controle_acesso': ['criar', 'visualizar', 'editar', 'inativar', 'gerenciar'],
+}
+
+
+class SeedReport:
+    """Totais e tempo de cada etapa"""
+
+    def __init__(self, stdout=None):
+        self.stdout = stdout
+        self.etapas = []
+
+    def etapa(self, nome, total, inicio):
+        duracao = time.perf_counter() - inicio
+        self.etapas.append({'etapa': nome, 'total': total, 'segundos': round(duracao, 2)})
+        if self.stdout:
+            self.stdout.write(f"   {nome}: {total} em {duracao:.2f}s")
+
+
+def _lotes(iterable, tamanho):
+    lote = []
+    for item in iterable:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _bulk_create(model, objetos, batch_size):
+    """
+    Inserir em lotes e retornar quantos registros foram de fato criados.
+
+    Com ignore_conflicts o banco descarta em silêncio o que já existia
+    (ex: rodar de novo sem --clear): o total vem da contagem antes/depois.
+    """
+    antes = model.objects.count()
+    for lote in _lotes(objetos, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(lote, batch_size=batch_size, ignore_conflicts=True)
+    return model.objects.count() - antes
+
+
+def _pesos_grupos(quantidade, distribuicao):
+    """Pesos acumulados: uniforme ou zipf (poucos grupos muito populares)"""
+    if distribuicao == 'zipf':
+        pesos = [1 / (posicao + 1) for posicao in range(quantidade)]
+    else:
+        pesos = [1] * quantidade
+    acumulados = []
+    soma = 0
+    for peso in pesos:
+        soma += peso
+        acumulados.append(soma)
+    return acumulados
+
+
+# ============================================================
+# Etapas
+# ============================================================
+
+def seed_usuarios(rng, prefixo, quantidade, senha_hash, online_ratio, inactive_ratio, batch_size, agora):
+    def gerar():
+        for i in range(quantidade):
+            username = f"{prefixo}{i:07d}"
+            online = rng.random() < online_ratio
+            ultima_atividade = agora - timedelta(seconds=rng.randint(0, 60 if online else 30 * 86400))
+            yield Usuario(
+                username=username,
+                email=f"{username}@carga.test",
+                password=senha_hash,
+                first_name=rng.choice(PRIMEIROS_NOMES),
+                last_name=rng.choice(SOBRENOMES),
+                telefone=f"119{rng.randint(10000000, 99999999)}",
+                is_active=rng.random() >= inactive_ratio,
+                is_online=online,
+                last_activity=ultima_atividade,
+                last_login=ultima_atividade,
+                logout_time=None if online else ultima_atividade + timedelta(minutes=rng.randint(1, 240)),
+                date_joined=ultima_atividade - timedelta(days=rng.randint(0, 720)),
+            )
+    return _bulk_create(Usuario, gerar(), batch_size)
+
+
+def seed_grupos(prefixo, quantidade, batch_size):
+    nomes = [f"{prefixo}grupo_{j:04d}" for j in range(quantidade)]
+    _bulk_create(Group, (Group(name=nome) for nome in nomes), batch_size)
+    grupos = dict(Group.objects.filter(name__in=nomes).values_list('name', 'id'))
+    group_ids = [grupos[nome] for nome in nomes]
+    _bulk_create(GrupoCustomizado, (
+        GrupoCustomizado(group_id=group_id, descricao=f"Grupo de carga {j}")
+        for j, group_id in enumerate(group_ids)
+    ), batch_size)
+    return group_ids
+
+
+def garantir_permissoes():
+    """PermissaoCustomizada + Permission dos módulos usados pelas views (idempotente)"""
+    from django.contrib.contenttypes.models import ContentType
+
+    content_types = {
+        'accounts': ContentType.objects.get_for_model(Usuario),
+        'controle_acesso': ContentType.objects.get_for_model(PermissaoCustomizada),
+    }
+    for modulo, acoes in PERMISSOES_CARGA.items():
+        for acao in acoes:
+            nome = f"{modulo}_{acao}"
+            descricao = f"{acao.title()} {modulo.replace('_', ' ')}"
+            PermissaoCustomizada.objects.get_or_create(
+                nome=nome, defaults={'modulo': modulo, 'acao': acao, 'descricao': descricao}
+            )
+            Permission.objects.get_or_create(
+                codename=nome, content_type=content_types[modulo], defaults={'name': descricao}
+            )
+
+
+def seed_permissoes_grupos(rng, group_ids, perms_por_grupo, batch_size):
+    """Permissões Django que correspondem a PermissaoCustomizada (sincronizadas)"""
+    nomes = PermissaoCustomizada.objects.filter(ativo=True).values_list('nome', flat=True)
+    pool = sorted(Permission.objects.filter(codename__in=nomes).values_list('id', flat=True))
+    if not pool or not perms_por_grupo:
+        return 0
+    through = Group.permissions.through
+    return _bulk_create(through, (
+        through(group_id=group_id, permission_id=permission_id)
+        for group_id in group_ids
+        for permission_id in rng.sample(pool, min(perms_por_grupo, len(pool)))
+    ), batch_size)
+
+
+def seed_vinculos(rng, user_ids, group_ids, grupos_por_usuario, distribuicao, batch_size):
+    if not group_ids:
+        return 0
+    acumulados = _pesos_grupos(len(group_ids), distribuicao)
+    maximo = min(len(group_ids), 2 * grupos_por_usuario)
+    through = Usuario.groups.through
+
+    def gerar():
+        for user_id in user_ids:
+            quantidade = rng.randint(0, maximo) if maximo else 0
+            if not quantidade:
+                continue
+            escolhidos = set(rng.choices(group_ids, cum_weights=acumulados, k=quantidade))
+            for group_id in sorted(escolhidos):
+                yield through(usuario_id=user_id, group_id=group_id)
+    return _bulk_create(through, gerar(), batch_size)
+
+
+def seed_auditoria(rng, quantidade, user_ids, group_ids, dias, batch_size, agora):
+    if not quantidade or not user_ids:
+        return 0
+    nomes_grupos = dict(Group.objects.filter(id__in=group_ids).values_list('id', 'name'))
+    permissoes = list(Permission.objects.order_by('codename').values_list('codename', flat=True)[:500]) or ['']
+    intervalo = dias * 86400
+
+    def gerar():
+        for _ in range(quantidade):
+            grupo = nomes_grupos.get(rng.choice(group_ids), '') if group_ids else ''
+            yield PermissionAuditLog(
+                user_id=rng.choice(user_ids),
+                action=rng.choice(['GRANT', 'GRANT', 'REVOKE']),
+                permission_name=rng.choice(permissoes),
+                target_user_id=rng.choice(user_ids) if rng.random() < 0.5 else None,
+                group_name=grupo,
+                details={'origem': SEED_ORIGEM},
+                ip_address=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                timestamp=agora - timedelta(seconds=rng.randint(0, intervalo)),
+            )
+    return _bulk_create(PermissionAuditLog, gerar(), batch_size)
+
+
+def limpar_dados(prefixo, batch_size=5000):
+    """Remover em lotes os dados gerados com o prefixo"""
+    PermissionAuditLog.objects.filter(details__origem=SEED_ORIGEM).delete()
+    removidos = 0
+    usuarios = Usuario.objects.filter(username__startswith=prefixo)
+    while True:
+        pks = list(usuarios.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic():
+            Usuario.groups.through.objects.filter(usuario_id__in=pks).delete()
+            Usuario.objects.filter(pk__in=pks).delete()
+        removidos += len(pks)
+    Group.objects.filter(name__startswith=f"{prefixo}grupo_").delete()
+    return removidos
+
+
+def seed_load_data(usuarios=1000, grupos=50, grupos_por_usuario=2, distribuicao='zipf',
+                   perms_por_grupo=5, online_ratio=0.1, inactive_ratio=0.05,
+                   auditoria=None, auditoria_dias=365, seed=42, prefixo='carga_',
+                   senha='carga12345', batch_size=5000, admin=False, stdout=None):
+    """
+    Gerar a massa de dados de carga. Retorna o SeedReport com as etapas.
+
+    auditoria=None gera uma linha de auditoria por usuário.
+    """
+    rng = random.Random(seed)
+    agora = timezone.now()
+    report = SeedReport(stdout)
+
+    garantir_permissoes()
+
+    inicio = time.perf_counter()
+    senha_hash = make_password(senha)  # um hash para todos (login funciona com a mesma senha)
+    total = seed_usuarios(rng, prefixo, usuarios, senha_hash, online_ratio, inactive_ratio, batch_size, agora)
+    if admin:
+        Usuario.objects.filter(email=f"{prefixo}admin@carga.test").delete()
+        Usuario.objects.create_superuser(
+            username=f"{prefixo}admin", email=f"{prefixo}admin@carga.test", password=senha
+        )
+    report.etapa('usuários', total, inicio)
+
+    inicio = time.perf_counter()
+    group_ids = seed_grupos(prefixo, grupos, batch_size)
+    report.etapa('grupos', len(group_ids), inicio)
+
+    inicio = time.perf_counter()
+    total = seed_permissoes_grupos(rng, group_ids, perms_por_grupo, batch_size)
+    report.etapa('permissões por grupo', total, inicio)
+
+    inicio = time.perf_counter()
+    user_ids = array('q', Usuario.objects.filter(
+        username__startswith=prefixo
+    ).exclude(username=f"{prefixo}admin").order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size))
+    total = seed_vinculos(rng, user_ids, group_ids, grupos_por_usuario, distribuicao, batch_size)
+    report.etapa('vínculos usuário/grupo', total, inicio)
+
+    inicio = time.perf_counter()
+    total = seed_auditoria(
+        rng, usuarios if auditoria is None else auditoria,
+        user_ids, group_ids, auditoria_dias, batch_size, agora,
+    )
+    report.etapa('logs de auditoria', total, inicio)
+    return report
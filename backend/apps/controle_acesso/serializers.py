@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import Group, Permission
 from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+from apps.controle_acesso.audit import PermissionAuditLog
 from apps.accounts.models import Usuario
 
 class PermissaoSerializer(serializers.ModelSerializer):
@@ -232,4 +233,19 @@ class GrupoSimplificadoSerializer(serializers.ModelSerializer):
         # Só incluir grupos ativos
         if not instance.ativo:
             return None
-        return super().to_representation(instance)
\ No newline at end of file
+        return super().to_representation(instance)
+
+class PermissionAuditLogSerializer(serializers.ModelSerializer):
+    """Serializer somente leitura para o log de auditoria"""
+    user_username = serializers.CharField(source='user.username', read_only=True, default=None)
+    target_user_username = serializers.CharField(source='target_user.username', read_only=True, default=None)
+    action_display = serializers.CharField(source='get_action_display', read_only=True)
+
+    class Meta:
+        model = PermissionAuditLog
+        fields = [
+            'id', 'timestamp', 'action', 'action_display', 'permission_name',
+            'group_name', 'user', 'user_username', 'target_user',
+            'target_user_username', 'ip_address', 'details'
+        ]
+        read_only_fields = fields
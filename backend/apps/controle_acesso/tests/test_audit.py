@@ -0,0 +1,222 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.controle_acesso.audit import PermissionAuditLog, get_client_ip
+from apps.controle_acesso.middleware import AuditContextMiddleware
+
+Usuario = get_user_model()
+
+
+class TestAuditoriaM2M(TestCase):
+    """Testes da auditoria automática via m2m_changed"""
+
+    def setUp(self):
+        content_type = ContentType.objects.get_for_model(Usuario)
+        self.perms = [
+            Permission.objects.create(
+                codename=f'audit_teste_{i}',
+                name=f'Audit teste {i}',
+                content_type=content_type
+            )
+            for i in range(3)
+        ]
+        self.grupo = Group.objects.create(name='Auditados')
+        self.usuario = Usuario.objects.create_user(
+            username='auditado',
+            email='auditado@test.com',
+            password='test123'
+        )
+        self.admin = Usuario.objects.create_superuser(
+            username='auditor',
+            email='auditor@test.com',
+            password='test123'
+        )
+        PermissionAuditLog.objects.all().delete()
+
+    def test_add_em_lote_gera_um_lote(self):
+        """Teste: add() com várias permissões gera uma linha por pk no mesmo lote"""
+        self.grupo.permissions.add(*self.perms)
+
+        logs = PermissionAuditLog.objects.all()
+        self.assertEqual(logs.count(), 3)
+        self.assertEqual({log.action for log in logs}, {'GRANT'})
+        self.assertEqual({log.group_name for log in logs}, {'Auditados'})
+        self.assertEqual(
+            {log.permission_name for log in logs},
+            {perm.codename for perm in self.perms}
+        )
+        self.assertEqual(len({log.details['lote'] for log in logs}), 1)
+
+    def test_lote_usa_bulk_create_unico(self):
+        """Teste: auditoria custa uma query de nomes + um INSERT"""
+        # add (2 queries) + lookup de codenames + bulk_create
+        # + UPDATE do updated_at do grupo (feed /changes/)
+        with self.assertNumQueries(5):
+            self.grupo.permissions.add(*self.perms)
+
+    def test_remove_reverso_de_usuarios(self):
+        """Teste: group.user_set.remove() registra REVOKE com target_user"""
+        self.grupo.user_set.add(self.usuario)
+        self.grupo.user_set.remove(self.usuario)
+
+        log = PermissionAuditLog.objects.get(action='REVOKE')
+        self.assertEqual(log.target_user, self.usuario)
+        self.assertEqual(log.group_name, 'Auditados')
+        self.assertEqual(log.details['relacao'], 'user.groups')
+
+    def test_clear_registra_vinculos_removidos(self):
+        """Teste: clear() registra um REVOKE por vínculo existente"""
+        self.usuario.user_permissions.add(*self.perms[:2])
+        self.usuario.user_permissions.clear()
+
+        revokes = PermissionAuditLog.objects.filter(action='REVOKE')
+        self.assertEqual(revokes.count(), 2)
+        self.assertTrue(all(log.target_user_id == self.usuario.id for log in revokes))
+
+    def test_contexto_do_request(self):
+        """Teste: actor e IP vêm do request capturado pelo middleware"""
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.5')
+        request.user = self.admin
+
+        def view(req):
+            self.grupo.permissions.add(self.perms[0])
+            return None
+
+        AuditContextMiddleware(view)(request)
+
+        log = PermissionAuditLog.objects.get()
+        self.assertEqual(log.user, self.admin)
+        self.assertEqual(log.ip_address, '10.0.0.5')
+
+    def test_ip_ignora_x_forwarded_for_forjado(self):
+        """Teste: sem proxy confiável o X-Forwarded-For do cliente é ignorado"""
+        factory = RequestFactory()
+        forjado = factory.post('/', REMOTE_ADDR='10.0.0.5', HTTP_X_FORWARDED_FOR='1.2.3.4')
+        self.assertEqual(get_client_ip(forjado), '10.0.0.5')
+
+        # Com um proxy confiável vale o hop que ele acrescentou, não o primeiro
+        atras_do_proxy = factory.post(
+            '/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7'
+        )
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(get_client_ip(atras_do_proxy), '203.0.113.7')
+
+    def test_sem_request_actor_nulo(self):
+        """Teste: fora de um request o log é gravado sem actor"""
+        self.grupo.permissions.add(self.perms[0])
+
+        log = PermissionAuditLog.objects.get()
+        self.assertIsNone(log.user)
+        self.assertIsNone(log.ip_address)
+
+    @override_settings(CONTROLE_ACESSO={'AUDIT_M2M_CHANGES': False})
+    def test_auditoria_desativada(self):
+        """Teste: AUDIT_M2M_CHANGES=False não grava logs"""
+        self.grupo.permissions.add(*self.perms)
+        self.assertFalse(PermissionAuditLog.objects.exists())
+
+
+class TestAuditoriaAPI(TestCase):
+    """Testes do endpoint de consulta do log de auditoria"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = '/api/v1/controle-acesso/auditoria/'
+        self.superuser = Usuario.objects.create_superuser(
+            username='super_audit',
+            email='super_audit@test.com',
+            password='test123'
+        )
+        self.normal_user = Usuario.objects.create_user(
+            username='user_audit',
+            email='user_audit@test.com',
+            password='test123'
+        )
+        PermissionAuditLog.objects.all().delete()
+
+        agora = timezone.now()
+        PermissionAuditLog.objects.bulk_create([
+            PermissionAuditLog(
+                action='GRANT' if i % 2 else 'REVOKE',
+                permission_name=f'perm_{i}',
+                group_name='Suporte' if i < 5 else 'Financeiro',
+                user=self.superuser,
+                target_user=self.normal_user if i % 3 == 0 else None,
+                # Timestamps repetidos para exercitar o desempate por id
+                timestamp=agora - timedelta(minutes=i // 2),
+            )
+            for i in range(12)
+        ])
+
+    def autenticar(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_paginacao_keyset_percorre_tudo_sem_repetir(self):
+        """Teste: cursor percorre todas as linhas em ordem (timestamp, id) desc"""
+        self.autenticar(self.superuser)
+        ids = []
+        url = f'{self.url}?page_size=5'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertNotIn('count', data)
+            ids.extend(row['id'] for row in data['results'])
+            url = data['next']
+
+        esperado = list(
+            PermissionAuditLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, esperado)
+
+    def test_pagina_sem_count(self):
+        """Teste: listagem não executa COUNT(*)"""
+        self.autenticar(self.superuser)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(f'{self.url}?page_size=5')
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in ctx.captured_queries))
+
+    def test_filtros(self):
+        """Teste: filtros por ação, grupo e usuário afetado"""
+        self.autenticar(self.superuser)
+
+        data = self.client.get(f'{self.url}?action=GRANT&group=Suporte').json()
+        self.assertEqual(
+            {(row['action'], row['group_name']) for row in data['results']},
+            {('GRANT', 'Suporte')}
+        )
+        self.assertEqual(len(data['results']), 2)
+
+        data = self.client.get(f'{self.url}?target_user={self.normal_user.id}').json()
+        self.assertEqual(len(data['results']), 4)
+        self.assertTrue(all(row['target_user_username'] == 'user_audit' for row in data['results']))
+
+    def test_cursor_invalido(self):
+        """Teste: cursor malformado retorna 404"""
+        self.autenticar(self.superuser)
+        response = self.client.get(f'{self.url}?cursor=invalido')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_usuario_sem_permissao(self):
+        """Teste: usuário comum não acessa o log de auditoria"""
+        self.autenticar(self.normal_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_somente_leitura(self):
+        """Teste: endpoint não aceita escrita"""
+        self.autenticar(self.superuser)
+        response = self.client.post(self.url, {'action': 'GRANT'})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts import token_blacklist
+from apps.accounts.models import Usuario
+from apps.controle_acesso.models import PermissaoCustomizada
+from apps.controle_acesso.serializers import PermissaoCustomizadaSerializer
+from core import metrics
+
+# Testes rodam em um processo só: o locmem vale como cache compartilhado
+CONTROLE_ACESSO_CACHE = {
+    **settings.CONTROLE_ACESSO, 'CATALOG_RESPONSE_CACHE': True, 'CATALOG_CACHE_REQUIRE_SHARED': False,
+}
+
+
+@override_settings(CONTROLE_ACESSO=CONTROLE_ACESSO_CACHE)
+class TestCacheCatalogo(TestCase):
+    """Testes do cache de respostas do catálogo de permissões"""
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(user=Usuario.objects.create_superuser(
+            username='catalogo', email='catalogo@test.com', password='test123'
+        ))
+        self.permissao = PermissaoCustomizada.objects.create(modulo='catalogo', acao='ver')
+        self.url = '/api/v1/controle-acesso/permissoes/'
+
+    def test_hit_sem_banco_e_sem_serializer(self):
+        """Teste: segunda listagem sai do cache sem query nem serializer"""
+        primeira = self.client.get(self.url, {'ordering': 'nome'})
+        self.assertEqual(primeira.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0), \
+                mock.patch.object(PermissaoCustomizadaSerializer, 'to_representation') as serializar:
+            segunda = self.client.get(self.url, {'ordering': 'nome'})
+        serializar.assert_not_called()
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.content, primeira.content)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+
+        counters, _ = metrics.merge_snapshots([metrics.snapshot()])
+        chave = ('permission_cache_requests_total', (('cache', 'permission_catalog'), ('result', 'hit')))
+        self.assertEqual(counters[chave], 1)
+
+    def test_hit_responde_304(self):
+        """Teste: If-None-Match com o ETag guardado = 304 direto do cache"""
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_chave_por_parametros_e_detalhe(self):
+        """Teste: outros parâmetros e o detalhe têm entradas próprias"""
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'modulo': 'outro'})
+        self.assertEqual(response.data['count'], 0)
+
+        detalhe = self.client.get(f'{self.url}{self.permissao.id}/')
+        self.assertEqual(detalhe.data['nome'], 'catalogo_ver')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(f'{self.url}{self.permissao.id}/').content, detalhe.content)
+
+    def test_invalidado_ao_salvar(self):
+        """Teste: salvar uma permissão invalida as respostas guardadas"""
+        self.client.get(self.url)
+        self.permissao.descricao = 'Nova descrição'
+        self.permissao.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['results'][0]['descricao'], 'Nova descrição')
+
+    @mock.patch.object(token_blacklist, '_avisos_cache_local', set())
+    def test_cache_por_processo_desliga_o_cache(self):
+        """Teste: com o locmem (versão não chega aos outros workers) toda listagem vai ao banco"""
+        config = {**CONTROLE_ACESSO_CACHE, 'CATALOG_CACHE_REQUIRE_SHARED': True}
+        with override_settings(CONTROLE_ACESSO=config):
+            with self.assertLogs('apps.accounts.token_blacklist', 'WARNING'):
+                self.client.get(self.url)
+            # Alteração feita por outro worker (sem signal neste processo)
+            PermissaoCustomizada.objects.filter(pk=self.permissao.pk).update(descricao='Outro worker')
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['results'][0]['descricao'], 'Outro worker')
@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso import retention
+
+
+class TestRetencaoAuditoria(TestCase):
+    """Testes do arquivamento e remoção em lotes do log de auditoria"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        agora = timezone.now()
+        PermissionAuditLog.objects.bulk_create([
+            PermissionAuditLog(
+                action='GRANT',
+                permission_name=f'antiga_{i}',
+                group_name='Arquivados',
+                timestamp=agora - timedelta(days=400 + i % 3),
+            )
+            for i in range(25)
+        ] + [
+            PermissionAuditLog(action='REVOKE', permission_name='recente', timestamp=agora)
+        ])
+
+    def test_arquiva_por_dia_e_remove_em_lotes(self):
+        """Teste: logs antigos vão para arquivos diários e saem do banco"""
+        cutoff = retention.get_cutoff(365)
+        total, max_pk, arquivos = retention.archive_logs(cutoff, self.archive_dir, chunk_size=10)
+
+        self.assertEqual(total, 25)
+        self.assertEqual(len(arquivos), 3)
+
+        lotes = list(retention.delete_archived_logs(cutoff, max_pk, batch_size=10))
+        self.assertEqual(lotes, [10, 10, 5])
+        self.assertEqual(PermissionAuditLog.objects.count(), 1)
+
+    def test_busca_offline(self):
+        """Teste: leitor encontra os logs arquivados com filtros"""
+        call_command('archive_audit_logs', days=365, output_dir=self.archive_dir, stdout=StringIO())
+
+        rows = list(retention.search_archive(self.archive_dir, permission_name='antiga_1'))
+        # antiga_1, antiga_10..19
+        self.assertEqual(len(rows), 11)
+        self.assertTrue(all(row['group_name'] == 'Arquivados' for row in rows))
+
+        futuro = timezone.now().date()
+        self.assertEqual(list(retention.iter_archive(self.archive_dir, since=futuro)), [])
+
+    def test_rearquivar_nao_duplica(self):
+        """Teste: duas execuções (ex: --keep ou retry antes da remoção) não duplicam linhas"""
+        cutoff = retention.get_cutoff(365)
+        primeiro = retention.archive_logs(cutoff, self.archive_dir)
+        total, max_pk, arquivos = retention.archive_logs(cutoff, self.archive_dir)
+
+        self.assertEqual(primeiro[0], 25)
+        self.assertEqual(total, 0)
+        self.assertEqual(max_pk, primeiro[1])
+        ids = [row['id'] for row in retention.iter_archive(self.archive_dir)]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+        # Retry do comando: nada novo a gravar, mas as linhas arquivadas saem do banco
+        call_command('archive_audit_logs', days=365, output_dir=self.archive_dir, stdout=StringIO())
+        self.assertEqual(PermissionAuditLog.objects.count(), 1)
+        self.assertEqual(len(list(retention.iter_archive(self.archive_dir))), 25)
+
+    def test_falha_no_meio_preserva_arquivo(self):
+        """Teste: erro durante a gravação não altera o arquivo existente nem deixa temporário"""
+        cutoff = retention.get_cutoff(365)
+        retention.archive_logs(cutoff, self.archive_dir)
+        antes = sorted(row['id'] for row in retention.iter_archive(self.archive_dir))
+        PermissionAuditLog.objects.create(
+            action='GRANT', permission_name='nova', timestamp=timezone.now() - timedelta(days=400)
+        )
+
+        with mock.patch.object(retention.json, 'dumps', side_effect=RuntimeError('disco cheio')):
+            with self.assertRaises(RuntimeError):
+                retention.archive_logs(cutoff, self.archive_dir)
+
+        self.assertEqual(sorted(row['id'] for row in retention.iter_archive(self.archive_dir)), antes)
+        self.assertEqual(list(Path(self.archive_dir).rglob('*.tmp')), [])
+
+    def test_dry_run_nao_remove(self):
+        """Teste: --dry-run não arquiva nem remove"""
+        call_command(
+            'archive_audit_logs', days=365, output_dir=self.archive_dir,
+            dry_run=True, stdout=StringIO()
+        )
+        self.assertEqual(PermissionAuditLog.objects.count(), 26)
+        self.assertEqual(list(retention.iter_archive(self.archive_dir)), [])
+
+    def test_helpers_particionamento(self):
+        """Teste: limites de partição mensal"""
+        self.assertEqual(retention.month_start(date(2025, 12, 15), 1), date(2026, 1, 1))
+        self.assertEqual(retention.mysql_to_days(date(2025, 1, 1)), 739617)
+        self.assertEqual(
+            retention.partition_definition(date(2025, 12, 1)),
+            "PARTITION p202512 VALUES LESS THAN (TO_DAYS('2026-01-01'))"
+        )
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Usuario
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso.models import GrupoCustomizado
+from apps.controle_acesso.seed import seed_load_data
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestSeedLoadData(TestCase):
+    """Testes do comando seed_load_data"""
+
+    def seed(self, *args):
+        call_command(
+            'seed_load_data', '--users', '60', '--groups', '6', '--audit-logs', '40',
+            '--batch-size', '25', *args, stdout=StringIO()
+        )
+
+    def snapshot(self):
+        vinculos = set(
+            Usuario.groups.through.objects
+            .values_list('usuario__username', 'group__name')
+        )
+        perms = set(
+            Group.permissions.through.objects
+            .filter(group__name__startswith='carga_')
+            .values_list('group__name', 'permission__codename')
+        )
+        presenca = set(Usuario.objects.values_list('username', 'is_online', 'is_active'))
+        return vinculos, perms, presenca
+
+    def test_volumes(self):
+        """Teste: gera usuários, grupos customizados, permissões e auditoria"""
+        self.seed('--admin')
+
+        self.assertEqual(Usuario.objects.filter(username__startswith='carga_0').count(), 60)
+        self.assertEqual(GrupoCustomizado.objects.filter(group__name__startswith='carga_grupo_').count(), 6)
+        self.assertEqual(
+            Group.permissions.through.objects.filter(group__name__startswith='carga_').count(), 30
+        )
+        self.assertEqual(PermissionAuditLog.objects.count(), 40)
+        self.assertTrue(Usuario.groups.through.objects.exists())
+        self.assertTrue(Usuario.objects.filter(is_online=True).exists())
+
+        admin = Usuario.objects.get(email='carga_admin@carga.test')
+        self.assertTrue(admin.is_superuser)
+        self.assertTrue(Usuario.objects.get(username='carga_0000001').check_password('carga12345'))
+
+    def test_deterministico_com_seed(self):
+        """Teste: mesma semente gera os mesmos dados"""
+        self.seed('--seed', '7')
+        primeiro = self.snapshot()
+        self.seed('--seed', '7', '--clear')
+        self.assertEqual(self.snapshot(), primeiro)
+
+        self.seed('--seed', '8', '--clear')
+        self.assertNotEqual(self.snapshot()[0], primeiro[0])
+
+    def test_relatorio_conta_so_o_que_foi_criado(self):
+        """Teste: rodar de novo sem --clear não reporta como criados os registros que já existiam"""
+        def totais():
+            report = seed_load_data(usuarios=30, grupos=3, auditoria=0, batch_size=10)
+            return {etapa['etapa']: etapa['total'] for etapa in report.etapas}
+
+        primeiro = totais()
+        self.assertEqual(primeiro['usuários'], 30)
+        self.assertEqual(primeiro['permissões por grupo'], 15)
+
+        segundo = totais()
+        self.assertEqual(segundo['usuários'], 0)
+        self.assertEqual(segundo['permissões por grupo'], 0)
+        self.assertEqual(segundo['vínculos usuário/grupo'], 0)
+
+    def test_distribuicao_zipf_concentra_membros(self):
+        """Teste: com zipf o primeiro grupo tem mais membros que o último"""
+        self.seed('--distribution', 'zipf', '--groups-per-user', '2')
+        primeiro = Group.objects.get(name='carga_grupo_0000').user_set.count()
+        ultimo = Group.objects.get(name='carga_grupo_0005').user_set.count()
+        self.assertGreater(primeiro, ultimo)
+
+    def test_clear_remove_dados_gerados(self):
+        """Teste: --clear remove apenas os dados com o prefixo"""
+        outro = Usuario.objects.create_user(username='real', email='real@test.com', password='test123')
+        self.seed()
+        call_command('seed_load_data', '--users', '0', '--groups', '0', '--clear', stdout=StringIO())
+
+        self.assertEqual(list(Usuario.objects.values_list('pk', flat=True)), [outro.pk])
+        self.assertFalse(Group.objects.filter(name__startswith='carga_grupo_').exists())
+        self.assertFalse(PermissionAuditLog.objects.filter(details__origem='seed_load_data').exists())
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
@@ -258,4 +260,60 @@ class TestGrupoCustomizadoViewSet(TestCase):
             GrupoCustomizado.objects.filter(
                 group__name='Novo Grupo ViewSet'
             ).exists()
-        )
\ No newline at end of file
+        )
+
+class TestCamposEsparsosControleAcesso(TestCase):
+    """Testes de ?fields= / ?omit= em grupos e permissões"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.superuser = Usuario.objects.create_user(
+            username='esparso_super', email='esparso_super@test.com',
+            password='testpass123', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.superuser)
+        grupo = Group.objects.create(name='Grupo Esparso')
+        grupo.user_set.add(self.superuser)
+        self.grupo = GrupoCustomizado.objects.create(group=grupo, descricao='Descrição')
+
+    def test_grupos_sem_totais(self):
+        """Teste: totais omitidos não geram os COUNTs"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/controle-acesso/grupos/', {'fields': 'id,nome'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.grupo.id, 'nome': 'Grupo Esparso'}])
+        self.assertFalse(any('COUNT(DISTINCT' in q['sql'] for q in queries.captured_queries))
+
+    def test_grupo_detalhe_com_total(self):
+        """Teste: total pedido continua vindo da anotação"""
+        response = self.client.get(
+            f'/api/v1/controle-acesso/grupos/{self.grupo.id}/', {'fields': 'nome,total_usuarios'}
+        )
+        self.assertEqual(response.data, {'nome': 'Grupo Esparso', 'total_usuarios': 1})
+
+    def test_patch_responde_totais_atualizados(self):
+        """Teste: PATCH que altera permissões responde os totais já atualizados"""
+        content_type = ContentType.objects.get_for_model(Usuario)
+        Permission.objects.create(codename='totais_ver', name='Totais ver', content_type=content_type)
+        permissao = PermissaoCustomizada.objects.create(modulo='totais', acao='ver', nome='totais_ver')
+
+        response = self.client.patch(
+            f'/api/v1/controle-acesso/grupos/{self.grupo.id}/', {'permissoes': [permissao.id]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_permissoes'], 1)
+        self.assertEqual(response.data['total_usuarios'], 1)
+        detalhe = self.client.get(f'/api/v1/controle-acesso/grupos/{self.grupo.id}/')
+        self.assertEqual(detalhe.data['total_permissoes'], 1)
+
+    def test_permissoes_sem_label(self):
+        """Teste: ?omit= tira o campo calculado da resposta"""
+        PermissaoCustomizada.objects.create(modulo='accounts', acao='criar', nome='accounts_criar_esparso')
+        response = self.client.get('/api/v1/controle-acesso/permissoes/', {'omit': 'label,descricao'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.data['results'][0]
+        self.assertNotIn('label', item)
+        self.assertIn('modulo_display', item)
@@ -0,0 +1,106 @@
+"""
+Lápides do feed de alterações (core.change_feed)
+
+Exclusões definitivas de usuários, grupos e permissões viram uma linha
+em sis_registros_excluidos (model, pk, quando), lida pelo /changes/ como
+operação "delete". Vínculos grupo/usuário e grupo/permissão atualizam o
+updated_at do grupo: os totais da listagem mudaram.
+
+Lápides mais antigas que CHANGE_FEED['TOMBSTONE_RETENTION_DAYS'] são
+removidas pelo comando purge_tombstones; cursores anteriores a isso
+recebem 410 e o cliente refaz a carga inicial.
+"""
+from django.contrib.auth.models import Group
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.accounts.models import Usuario
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+
+
+class RegistroExcluido(models.Model):
+    """Lápide de um registro excluído definitivamente"""
+
+    modelo = models.CharField(max_length=100)  # _meta.label_lower
+    objeto_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'sis_registros_excluidos'
+        verbose_name = 'Registro Excluído'
+        verbose_name_plural = 'Registros Excluídos'
+        indexes = [
+            # Leitura do feed por (deleted_at, id) dentro de cada model
+            models.Index(fields=['modelo', 'deleted_at', 'id'], name='excluido_modelo_ts_idx'),
+            models.Index(fields=['deleted_at'], name='excluido_ts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} ({self.deleted_at})"
+
+
+@receiver(post_delete, sender=Usuario)
+@receiver(post_delete, sender=GrupoCustomizado)
+@receiver(post_delete, sender=PermissaoCustomizada)
+def registrar_exclusao(sender, instance, **kwargs):
+    """Gravar a lápide do registro excluído"""
+    RegistroExcluido.objects.create(modelo=sender._meta.label_lower, objeto_id=instance.pk)
+
+
+def _tocar_grupos(group_ids):
+    if group_ids:
+        GrupoCustomizado.objects.filter(group_id__in=group_ids).update(updated_at=timezone.now())
+
+
+def _grupos_do_evento(instance, action, reverse, pk_set, grupo_e_dono):
+    """
+    Ids dos Group afetados por um m2m_changed.
+
+    grupo_e_dono: o Group é o dono do campo m2m (Group.permissions) ou o
+    lado relacionado (Usuario.groups).
+    """
+    instance_e_grupo = grupo_e_dono != reverse
+    if instance_e_grupo:
+        return {instance.pk}
+    if action == 'pre_clear':
+        # clear() pelo outro lado: os grupos ainda vinculados
+        if grupo_e_dono:
+            return set(instance.group_set.values_list('pk', flat=True))
+        return set(instance.groups.values_list('pk', flat=True))
+    return set(pk_set or ())
+
+
+def _vinculo_alterado(instance, action, reverse, pk_set, grupo_e_dono):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if action != 'pre_clear' and not pk_set:
+        return
+    _tocar_grupos(_grupos_do_evento(instance, action, reverse, pk_set, grupo_e_dono))
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+def grupo_usuarios_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    """Usuario.groups / Group.user_set: total_usuarios do grupo mudou"""
+    _vinculo_alterado(instance, action, reverse, pk_set, grupo_e_dono=False)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def grupo_permissoes_alteradas(sender, instance, action, reverse, pk_set, **kwargs):
+    """Group.permissions / Permission.group_set: total_permissoes do grupo mudou"""
+    _vinculo_alterado(instance, action, reverse, pk_set, grupo_e_dono=True)
+
+
+def purge_tombstones(cutoff, batch_size=1000):
+    """Apagar em lotes as lápides anteriores a cutoff; gera o total de cada lote"""
+    queryset = RegistroExcluido.objects.filter(deleted_at__lt=cutoff)
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        with transaction.atomic():
+            deleted, _ = RegistroExcluido.objects.filter(pk__in=pks).delete()
+        yield deleted
+        if len(pks) < batch_size:
+            break
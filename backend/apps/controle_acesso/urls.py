@@ -8,6 +8,7 @@ router = DefaultRouter()
 router.register(r'permissoes', views.PermissaoCustomizadaViewSet, basename='permissoes')
 router.register(r'grupos-detalhe', GrupoDetalheViewSet, basename='grupos-detalhe')
 router.register(r'grupos', views.GrupoCustomizadoViewSet, basename='grupos')
+router.register(r'auditoria', views.PermissionAuditLogViewSet, basename='auditoria')
 
 urlpatterns = [
     # URL de Sincronização de Permissões
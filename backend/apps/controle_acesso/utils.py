@@ -1,14 +1,17 @@
 from django.apps import apps
 from django.apps import apps
 from django.conf import settings
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 from apps.controle_acesso.models import PermissaoCustomizada
 from django.core.cache import cache
+from core.metrics import record_cache_access
 import hashlib
+import time
 # Cache keys
 CACHE_KEY_USER_PERMISSIONS = 'user_permissions_{user_id}'
 CACHE_KEY_APP_PERMISSIONS = 'app_permissions'
+CACHE_KEY_ACL_VERSION = 'acl_version'
 CACHE_TIMEOUT = getattr(settings, 'PERMISSIONS_CACHE_TIMEOUT', 300)  # 5 minutos
 
 def get_app_permissions():
@@ -144,15 +147,16 @@ def check_permission(user, permission_name):
             codename=permission_name
         ).first()
         
-        if user.user_permissions.filter(pk=django_perm.pk).exists():
+        # Consultas pelo pk: não carregam o usuário (request.user pode ser um snapshot)
+        if Permission.objects.filter(pk=django_perm.pk, user=user.pk).exists():
             return False
         
         # ✅ VERIFICAR: Permissão direta do usuário
-        if user.user_permissions.filter(id=django_perm.id).exists():
+        if Permission.objects.filter(id=django_perm.id, user=user.pk).exists():
             return True
         
         # ✅ VERIFICAR: Permissão via grupos
-        if user.groups.filter(permissions=django_perm).exists():
+        if Group.objects.filter(user=user.pk, permissions=django_perm).exists():
             return True
         
         return False
@@ -248,6 +252,7 @@ def get_user_permissions_cached(user):
     
     cache_key = CACHE_KEY_USER_PERMISSIONS.format(user_id=user.id)
     permissions = cache.get(cache_key)
+    record_cache_access('user_permissions', permissions is not None)
     
     if permissions is None:
         # Calcular permissões
@@ -274,6 +279,7 @@ def get_app_permissions_cached():
     Obter permissões dos apps com cache
     """
     permissions = cache.get(CACHE_KEY_APP_PERMISSIONS)
+    record_cache_access('app_permissions', permissions is not None)
     
     if permissions is None:
         permissions = get_app_permissions()
@@ -284,4 +290,28 @@ def get_app_permissions_cached():
 
 def invalidate_app_permissions_cache():
     """Invalidar cache de permissões dos apps"""
-    cache.delete(CACHE_KEY_APP_PERMISSIONS)
\ No newline at end of file
+    cache.delete(CACHE_KEY_APP_PERMISSIONS)
+
+
+def get_acl_version():
+    """
+    Versão global das ACLs (grupos, permissões e vínculos).
+
+    Snapshots de usuário guardam a versão em que foram montados e são
+    descartados quando ela muda. Se a chave sumir do cache (expiração ou
+    LRU), recomeça de um timestamp, nunca de um valor já usado.
+    """
+    versao = cache.get(CACHE_KEY_ACL_VERSION)
+    if versao is None:
+        cache.add(CACHE_KEY_ACL_VERSION, time.time_ns(), None)
+        versao = cache.get(CACHE_KEY_ACL_VERSION)
+    return versao
+
+
+def bump_acl_version():
+    """Invalidar todos os snapshots de usuário (ACL alterada)"""
+    try:
+        return cache.incr(CACHE_KEY_ACL_VERSION)
+    except ValueError:
+        cache.add(CACHE_KEY_ACL_VERSION, time.time_ns(), None)
+        return cache.incr(CACHE_KEY_ACL_VERSION)
@@ -6,3 +6,4 @@ from .sync_permissoes import SyncPermissoesView
 from .grupo_usuarios import GrupoUsuariosView
 from .remover_usuario_grupo import RemoverUsuarioGrupoView
 from .remover_permissao_grupo import RemoverPermissaoGrupoView
+from .auditoria import PermissionAuditLogViewSet
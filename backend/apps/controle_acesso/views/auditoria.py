@@ -0,0 +1,40 @@
+from rest_framework import viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from apps.controle_acesso.audit import PermissionAuditLog
+from core.filters import PermissionAuditLogFilter
+from core.pagination import KeysetPagination
+from ..serializers import PermissionAuditLogSerializer
+from ..permissions import HasCustomPermission
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar log de auditoria",
+        description=(
+            "Lista mudanças de permissões/grupos (mais recentes primeiro). "
+            "Filtros: user, target_user, group, permission, action, since, until. "
+            "Paginação por cursor (next_cursor), sem contagem total."
+        ),
+        tags=['Controle de Acesso'],
+    ),
+    retrieve=extend_schema(
+        summary="Detalhes do log de auditoria",
+        description="Obtém um registro específico do log de auditoria",
+        tags=['Controle de Acesso'],
+    ),
+)
+class PermissionAuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet somente leitura para o log de auditoria de permissões"""
+    queryset = PermissionAuditLog.objects.select_related('user', 'target_user')
+    serializer_class = PermissionAuditLogSerializer
+    permission_classes = [HasCustomPermission]
+    pagination_class = KeysetPagination
+    # Sem busca textual/ordenação livre: só filtros cobertos por índices
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PermissionAuditLogFilter
+    # Página keyset sem COUNT: autenticação + permissão + uma query de dados
+    query_budget = {'list': 7, 'retrieve': 7}
+
+    def get_permissions(self):
+        self.permission_required = 'controle_acesso_gerenciar'
+        return [HasCustomPermission()]
@@ -1,11 +1,16 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.response import Response
 from django.contrib.auth.models import Permission
+from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from apps.controle_acesso.models import GrupoCustomizado
 from ..serializers import GrupoCustomizadoSerializer
 from ..permissions import HasCustomPermission
+from core.change_feed import ChangeFeedMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin
 
 @extend_schema_view(
     list=extend_schema(
@@ -69,7 +74,7 @@ from ..permissions import HasCustomPermission
         }
     ),
 )
-class GrupoCustomizadoViewSet(viewsets.ModelViewSet):
+class GrupoCustomizadoViewSet(ChangeFeedMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         grupo = self.get_object()
         user = request.user
@@ -93,6 +98,26 @@ class GrupoCustomizadoViewSet(viewsets.ModelViewSet):
     filterset_fields = ['group__name']
     ordering_fields = ['group__name', 'created_at']
     ordering = ['group__name']
+    query_budget = {'list': 8, 'retrieve': 7, 'update': 16, 'partial_update': 16, 'default': 12}
+    # Nas actions de escrita a resposta sai depois de alterar os vínculos:
+    # sem as anotações (calculadas antes), os totais são contados de novo
+    write_actions = ('create', 'update', 'partial_update')
+    def get_queryset(self):
+        # Nome do grupo e totais em uma única query (sem N+1 na listagem);
+        # com ?fields=/?omit= os COUNTs não pedidos ficam de fora
+        anotacoes = {}
+        if getattr(self, 'action', None) not in self.write_actions:
+            if self.campo_solicitado('total_usuarios'):
+                anotacoes['usuarios_count'] = Count('group__user', distinct=True)
+            if self.campo_solicitado('total_permissoes'):
+                anotacoes['permissoes_count'] = Count('group__permissions', distinct=True)
+        queryset = GrupoCustomizado.objects.select_related('group').annotate(**anotacoes)
+        return self.restringir_queryset(queryset)
+    # Totais e nome do grupo mudam sem tocar updated_at: entram pela acl_version
+    conditional_acl = True
+    def get_conditional_queryset(self):
+        # Validadores sem os COUNTs da listagem
+        return self.filter_queryset(GrupoCustomizado.objects.all())
     def get_permissions(self):
         self.permission_required = 'controle_acesso_gerenciar'
         return [HasCustomPermission()]
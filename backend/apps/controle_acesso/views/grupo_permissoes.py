@@ -15,27 +15,19 @@ from django.contrib.auth.models import Permission
 )
 class GrupoPermissoesView(APIView):
     permission_classes = [HasCustomPermission]
+    query_budget = {'get': 8, 'default': 12}
     def get(self, request, grupo_id):
         from apps.controle_acesso.models import PermissaoCustomizada
         from apps.controle_acesso.serializers import PermissaoCustomizadaSerializer
         try:
-            grupo_custom = GrupoCustomizado.objects.get(id=grupo_id)
-            # Busca os objetos Permission do grupo
-            permissions = grupo_custom.group.permissions.all()
+            grupo_custom = GrupoCustomizado.objects.select_related('group').get(id=grupo_id)
+            # Codenames do grupo em uma query; customizadas correspondentes em outra
+            codenames = grupo_custom.group.permissions.values_list('codename', flat=True)
             acao_modulo_list = []
-            for perm in permissions:
-                codename = perm.codename
+            for codename in codenames:
                 if '_' in codename:
                     modulo, acao = codename.split('_', 1)
                     acao_modulo_list.append((acao, modulo))
-            # LOG TEMPORÁRIO PARA DEBUG
-            print('Codenames do grupo:', [perm.codename for perm in permissions])
-            print('Pares acao/modulo extraídos:', acao_modulo_list)
-            from apps.controle_acesso.models import PermissaoCustomizada
-            for acao, modulo in acao_modulo_list:
-                count = PermissaoCustomizada.objects.filter(acao=acao, modulo=modulo).count()
-                print(f"PermissaoCustomizada(acao='{acao}', modulo='{modulo}') -> {count} encontrada(s)")
-            # Busca as permissões customizadas correspondentes
             from django.db.models import Q
             q = Q()
             for acao, modulo in acao_modulo_list:
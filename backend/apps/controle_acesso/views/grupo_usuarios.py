@@ -14,9 +14,10 @@ from ..permissions import HasCustomPermission, RequirePermission
 )
 class GrupoUsuariosView(APIView):
     permission_classes = [HasCustomPermission]
+    query_budget = {'get': 8, 'default': 12}
     def get(self, request, grupo_id):
         try:
-            grupo_custom = GrupoCustomizado.objects.get(id=grupo_id)
+            grupo_custom = GrupoCustomizado.objects.select_related('group').get(id=grupo_id)
             usuarios = grupo_custom.group.user_set.filter(is_active=True)
             usuarios_data = [{
                 'id': user.id,
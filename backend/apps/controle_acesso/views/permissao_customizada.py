@@ -3,7 +3,11 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from apps.controle_acesso.models import PermissaoCustomizada
 from ..serializers import PermissaoCustomizadaSerializer
+from ..catalog_cache import CatalogCacheMixin
 from ..permissions import HasCustomPermission
+from core.change_feed import ChangeFeedMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetMixin
 
 @extend_schema_view(
     list=extend_schema(
@@ -37,7 +41,7 @@ from ..permissions import HasCustomPermission
         tags=['Controle de Acesso'],  
     ),
 )
-class PermissaoCustomizadaViewSet(viewsets.ModelViewSet):
+class PermissaoCustomizadaViewSet(CatalogCacheMixin, ChangeFeedMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar permissões customizadas"""
     queryset = PermissaoCustomizada.objects.all()
     serializer_class = PermissaoCustomizadaSerializer
@@ -47,10 +51,18 @@ class PermissaoCustomizadaViewSet(viewsets.ModelViewSet):
     filterset_fields = ['modulo', 'acao', 'ativo']
     ordering_fields = ['nome', 'modulo', 'created_at']
     ordering = ['nome']
+    query_budget = {'list': 8, 'retrieve': 7, 'default': 12}
+    sparse_field_dependencies = {
+        'modulo_display': ['modulo'],
+        'acao_display': ['acao'],
+        'label': ['modulo', 'acao', 'descricao'],
+    }
+    def get_queryset(self):
+        return self.restringir_queryset(PermissaoCustomizada.objects.all())
     def get_permissions(self):
         if self.action == 'list':
             self.permission_required = 'controle_acesso_visualizar'
-        elif self.action == 'retrieve':
+        elif self.action in ['retrieve', 'changes']:
             self.permission_required = 'controle_acesso_visualizar'
         elif self.action == 'create':
             self.permission_required = 'controle_acesso_criar'
@@ -0,0 +1,333 @@
+"""
+Micro-benchmarks dos caminhos críticos de autorização e serialização
+(comando run_benchmarks)
+
+Cada alvo é medido com 1, 100 e 10k linhas, no estilo do pytest-benchmark:
+rodadas repetidas (mínimo de rodadas + tempo máximo) com min/max/média/
+mediana/desvio/OPS. O número de queries é medido numa chamada extra,
+fora das rodadas cronometradas, para não distorcer o tempo.
+
+Os dados de cada escala são criados dentro de uma transação desfeita ao
+final: o banco configurado não é alterado.
+
+O alvo de refresh roda com `linhas` tokens expirados nas tabelas de
+blacklist: comparar as escalas mostra o custo de não rodar o prune_tokens.
+
+O login é medido duas vezes: pela view roteada em auth/login/ com um
+request ASGI (login_async.login_view, hash no pool: o caminho de produção
+sob uvicorn) e pela CustomTokenObtainPairView direto (caminho WSGI).
+
+Os alvos de renderer/parser comparam o JSON padrão do DRF com o
+core.renderers nas mesmas respostas reais (página da listagem de
+usuários e catálogo de permissões inteiro), serializadas uma vez fora
+das rodadas.
+"""
+import functools
+import io
+import statistics
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import AsyncRequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.accounts.models import Usuario
+from apps.accounts.serializers import CustomTokenRefreshSerializer, UsuarioBasicoSerializer
+from apps.accounts.token_blacklist import FilteredRefreshToken
+from apps.accounts.views import CustomTokenObtainPairView
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+from apps.controle_acesso.permissions import HasCustomPermission
+from apps.controle_acesso.serializers import GrupoCustomizadoSerializer, PermissaoCustomizadaSerializer
+from apps.controle_acesso.utils import check_permission, get_user_permissions
+from apps.controle_acesso.views import GrupoCustomizadoViewSet
+from core.filters import GlobalSearchFilter
+from core.pagination import CustomPagination
+from core.renderers import FastJSONParser, FastJSONRenderer
+
+ESCALAS_PADRAO = [1, 100, 10000]
+PERMISSAO_ALVO = 'accounts_visualizar'
+PREFIXO = 'bench_'
+SENHA = 'bench12345'
+
+
+class _Rollback(Exception):
+    pass
+
+
+# ============================================================
+# Medição
+# ============================================================
+
+def medir(func, setup=None, min_rounds=5, max_time=1.0, max_rounds=1000):
+    """
+    Cronometrar func(*setup()) em rodadas.
+
+    setup (não cronometrado) prepara os argumentos de cada rodada, ex: um
+    usuário recém-carregado para não aproveitar caches do objeto.
+    """
+    tempos = []
+    total = 0.0
+    while len(tempos) < min_rounds or (total < max_time and len(tempos) < max_rounds):
+        args = setup() if setup else ()
+        inicio = time.perf_counter()
+        func(*args)
+        duracao = time.perf_counter() - inicio
+        tempos.append(duracao)
+        total += duracao
+
+    args = setup() if setup else ()
+    with CaptureQueriesContext(connection) as queries:
+        func(*args)
+
+    return {
+        'min_ms': round(min(tempos) * 1000, 4),
+        'max_ms': round(max(tempos) * 1000, 4),
+        'mean_ms': round(statistics.fmean(tempos) * 1000, 4),
+        'median_ms': round(statistics.median(tempos) * 1000, 4),
+        'stddev_ms': round(statistics.pstdev(tempos) * 1000, 4),
+        'ops': round(1 / statistics.fmean(tempos), 2) if statistics.fmean(tempos) else 0.0,
+        'rounds': len(tempos),
+        'queries': len(queries.captured_queries),
+    }
+
+
+# ============================================================
+# Dados de cada escala
+# ============================================================
+
+def criar_dados(linhas):
+    """
+    `linhas` permissões customizadas (todas concedidas ao usuário via
+    grupo), `linhas` usuários e `linhas` grupos customizados.
+    """
+    content_type = ContentType.objects.get_for_model(Usuario)
+    modulos = [('accounts', 'visualizar')] + [(f'{PREFIXO}{i:05d}', 'visualizar') for i in range(1, linhas)]
+    PermissaoCustomizada.objects.bulk_create([
+        PermissaoCustomizada(modulo=modulo, acao=acao, nome=f'{modulo}_{acao}', descricao=f'Bench {modulo}')
+        for modulo, acao in modulos
+    ], ignore_conflicts=True)
+    Permission.objects.bulk_create([
+        Permission(codename=f'{modulo}_{acao}', name=f'Bench {modulo}', content_type=content_type)
+        for modulo, acao in modulos
+    ], ignore_conflicts=True)
+    permissoes = list(Permission.objects.filter(
+        content_type=content_type, codename__in=[f'{modulo}_{acao}' for modulo, acao in modulos]
+    ).values_list('pk', flat=True))
+
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=f'{PREFIXO}{i:05d}', email=f'{PREFIXO}{i:05d}@bench.test', password='!',
+            first_name='Ana' if i % 2 else 'Bruno', last_name='Silva' if i % 3 else 'Souza',
+        )
+        for i in range(linhas)
+    ])
+    Group.objects.bulk_create([Group(name=f'{PREFIXO}grupo_{i:05d}') for i in range(linhas)])
+    grupos = list(Group.objects.filter(name__startswith=f'{PREFIXO}grupo_').order_by('pk'))
+    GrupoCustomizado.objects.bulk_create([
+        GrupoCustomizado(group=grupo, descricao=f'Grupo bench {i}') for i, grupo in enumerate(grupos)
+    ])
+
+    # Usuário medido: membro do primeiro grupo, que tem todas as permissões
+    usuario = Usuario.objects.get(username=f'{PREFIXO}00000')
+    Usuario.objects.filter(pk=usuario.pk).update(password=make_password(SENHA))
+    Group.permissions.through.objects.bulk_create([
+        Group.permissions.through(group_id=grupos[0].pk, permission_id=pk) for pk in permissoes
+    ])
+    Usuario.groups.through.objects.bulk_create([
+        Usuario.groups.through(usuario_id=usuario.pk, group_id=grupos[0].pk)
+    ])
+
+    # Tokens expirados ainda não removidos (acúmulo da rotação)
+    expirado = timezone.now() - timezone.timedelta(days=1)
+    OutstandingToken.objects.bulk_create([
+        OutstandingToken(user_id=usuario.pk, jti=f'{PREFIXO}{i:05d}', token='', expires_at=expirado)
+        for i in range(linhas)
+    ])
+    BlacklistedToken.objects.bulk_create([
+        BlacklistedToken(token_id=pk)
+        for pk in OutstandingToken.objects.filter(jti__startswith=PREFIXO).values_list('pk', flat=True)
+    ])
+    return usuario.pk
+
+
+# ============================================================
+# Alvos
+# ============================================================
+
+def _usuario(usuario_id):
+    # Objeto novo a cada rodada: sem _perm_cache do ModelBackend
+    return Usuario.objects.get(pk=usuario_id)
+
+
+def alvos(usuario_id):
+    """(nome, func, setup) de cada caminho medido"""
+    factory = APIRequestFactory()
+    view_permissao = SimpleNamespace(permission_required=PERMISSAO_ALVO, action='list', basename='bench')
+    view_busca = SimpleNamespace(search_fields=['username', 'email', 'first_name', 'last_name', 'telefone'])
+    request_busca = Request(factory.get('/', {'search': 'silva'}))
+
+    def setup_refresh():
+        return (str(FilteredRefreshToken.for_user(_usuario(usuario_id))),)
+
+    def refresh(token):
+        serializer = CustomTokenRefreshSerializer(data={'refresh': token})
+        serializer.is_valid(raise_exception=True)
+
+    credenciais = {'email': f'{PREFIXO}00000@bench.test', 'password': SENHA}
+    view_login = CustomTokenObtainPairView.as_view(throttle_classes=[])  # mede a view, não o rate limit
+    rota_login = reverse('token_obtain_pair')
+    view_login_roteada = resolve(rota_login).func
+
+    def login():
+        request = factory.post(rota_login, credenciais, format='json')
+        response = view_login(request)
+        assert response.status_code == 200, response.data
+
+    def login_roteado():
+        request = AsyncRequestFactory().post(rota_login, credenciais, content_type='application/json')
+        with override_settings(LOGIN_THROTTLE={'ENABLED': False}):
+            response = async_to_sync(view_login_roteada)(request)
+        assert response.status_code == 200, response.rendered_content
+
+    def setup_request():
+        request = Request(factory.get('/'))
+        request.user = _usuario(usuario_id)
+        return (request,)
+
+    @functools.cache
+    def pagina_usuarios():
+        # Resposta da listagem com o maior page_size aceito
+        request = Request(factory.get('/api/v1/auth/usuarios/', {'page_size': CustomPagination.max_page_size}))
+        paginacao = CustomPagination()
+        pagina = paginacao.paginate_queryset(Usuario.objects.order_by('username'), request)
+        with override_settings(ALLOWED_HOSTS=['testserver']):  # links next/previous
+            return paginacao.get_paginated_response(UsuarioBasicoSerializer(pagina, many=True).data).data
+
+    @functools.cache
+    def catalogo():
+        return PermissaoCustomizadaSerializer(PermissaoCustomizada.objects.order_by('nome'), many=True).data
+
+    @functools.cache
+    def catalogo_json():
+        return JSONRenderer().render(catalogo())
+
+    def setup_corpo():
+        # Stream novo a cada rodada, como o corpo de uma request
+        return (io.BytesIO(catalogo_json()),)
+
+    return [
+        (
+            'HasCustomPermission.has_permission',
+            lambda request: HasCustomPermission().has_permission(request, view_permissao),
+            setup_request,
+        ),
+        (
+            'utils.check_permission',
+            lambda usuario: check_permission(usuario, PERMISSAO_ALVO),
+            lambda: (_usuario(usuario_id),),
+        ),
+        (
+            'utils.get_user_permissions',
+            lambda usuario: list(get_user_permissions(usuario)),
+            lambda: (_usuario(usuario_id),),
+        ),
+        (
+            'GlobalSearchFilter.filter_queryset',
+            lambda: list(GlobalSearchFilter().filter_queryset(
+                request_busca, Usuario.objects.order_by('username'), view_busca
+            )),
+            None,
+        ),
+        (
+            'Login (rota auth/login/, ASGI)',
+            login_roteado,
+            None,
+        ),
+        (
+            'Login (CustomTokenObtainPairView)',
+            login,
+            None,
+        ),
+        (
+            'TokenRefresh (rotação + blacklist)',
+            refresh,
+            setup_refresh,
+        ),
+        (
+            'PermissaoCustomizadaSerializer',
+            lambda: PermissaoCustomizadaSerializer(
+                PermissaoCustomizada.objects.order_by('nome'), many=True
+            ).data,
+            None,
+        ),
+        (
+            'GrupoCustomizadoSerializer',
+            lambda: GrupoCustomizadoSerializer(
+                GrupoCustomizadoViewSet().get_queryset().order_by('group__name'), many=True
+            ).data,
+            None,
+        ),
+        ('JSONRenderer (página de usuários)', lambda data: JSONRenderer().render(data), lambda: (pagina_usuarios(),)),
+        ('FastJSONRenderer (página de usuários)', lambda data: FastJSONRenderer().render(data), lambda: (pagina_usuarios(),)),
+        ('JSONRenderer (catálogo de permissões)', lambda data: JSONRenderer().render(data), lambda: (catalogo(),)),
+        ('FastJSONRenderer (catálogo de permissões)', lambda data: FastJSONRenderer().render(data), lambda: (catalogo(),)),
+        ('JSONParser (catálogo de permissões)', lambda stream: JSONParser().parse(stream), setup_corpo),
+        ('FastJSONParser (catálogo de permissões)', lambda stream: FastJSONParser().parse(stream), setup_corpo),
+    ]
+
+
+def run_benchmarks(escalas=None, filtro=None, min_rounds=5, max_time=1.0, stdout=None):
+    """Retorna lista de resultados {'alvo', 'linhas', ...estatísticas}"""
+    resultados = []
+    for linhas in escalas or ESCALAS_PADRAO:
+        try:
+            with transaction.atomic():
+                usuario_id = criar_dados(linhas)
+                for nome, func, setup in alvos(usuario_id):
+                    if filtro and filtro.lower() not in nome.lower():
+                        continue
+                    resultado = dict(alvo=nome, linhas=linhas, **medir(func, setup, min_rounds, max_time))
+                    resultados.append(resultado)
+                    if stdout:
+                        stdout.write(
+                            f"   {nome} [{linhas}]: {resultado['mean_ms']:.3f} ms, "
+                            f"{resultado['queries']} queries"
+                        )
+                raise _Rollback
+        except _Rollback:
+            pass
+    return resultados
+
+
+def comparar(resultados, baseline, limite_pct=20.0):
+    """Variação da média (%) por (alvo, linhas) em relação a um JSON anterior"""
+    anteriores = {(item['alvo'], item['linhas']): item for item in baseline.get('resultados', [])}
+    linhas = []
+    for item in resultados:
+        anterior = anteriores.get((item['alvo'], item['linhas']))
+        if not anterior:
+            continue
+        delta = round((item['mean_ms'] - anterior['mean_ms']) / anterior['mean_ms'] * 100, 1) if anterior['mean_ms'] else 0.0
+        linhas.append({
+            'alvo': item['alvo'],
+            'linhas': item['linhas'],
+            'mean_ms': item['mean_ms'],
+            'mean_baseline_ms': anterior['mean_ms'],
+            'delta_pct': delta,
+            'queries': item['queries'],
+            'queries_baseline': anterior['queries'],
+            'regressao': delta > limite_pct or item['queries'] > anterior['queries'],
+        })
+    return linhas
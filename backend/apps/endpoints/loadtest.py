@@ -0,0 +1,349 @@
+"""
+Teste de carga HTTP da API (comando loadtest)
+
+Usuários virtuais (threads) executam jornadas roteirizadas contra a API:
+- login: login de um usuário gerado + minhas-permissoes
+- status: polling de status-online
+- busca: listagem paginada e busca global de /usuarios/
+- grupos: edição de permissões de grupo (adiciona, consulta e remove)
+
+O servidor pode ser o da própria aplicação (iniciado em processo contra o
+banco configurado, já populado com seed_load_data) ou uma URL externa.
+
+Relatório por endpoint: requisições, erros, RPS e latência p50/p95/p99.
+O JSON do relatório serve de baseline para comparar execuções.
+"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.accounts.models import Usuario
+from apps.controle_acesso.models import GrupoCustomizado
+
+API_PREFIX = '/api/v1'
+MIX_PADRAO = {'login': 1, 'status': 3, 'busca': 3, 'grupos': 1}
+TERMOS_BUSCA = ['ana', 'silva', 'carga_00', 'marcos', 'santos', 'lima', 'paula', '@carga.test']
+
+
+# ============================================================
+# Cliente HTTP e coleta
+# ============================================================
+
+class ClienteHTTP:
+    """Conexão HTTP persistente de um usuário virtual"""
+
+    def __init__(self, base_url, timeout=30):
+        partes = urlsplit(base_url)
+        self.host = partes.hostname
+        self.port = partes.port or (443 if partes.scheme == 'https' else 80)
+        self.https = partes.scheme == 'https'
+        self.timeout = timeout
+        self.token = None
+        self.conexao = None
+
+    def _conectar(self):
+        classe = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conexao = classe(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, dados=None, token=None):
+        """Retorna (status, corpo decodificado ou None, segundos)"""
+        headers = {'Accept': 'application/json'}
+        corpo = None
+        if dados is not None:
+            corpo = json.dumps(dados)
+            headers['Content-Type'] = 'application/json'
+        token = token or self.token
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        for tentativa in range(2):
+            if self.conexao is None:
+                self._conectar()
+            inicio = time.perf_counter()
+            try:
+                self.conexao.request(method, API_PREFIX + path, body=corpo, headers=headers)
+                response = self.conexao.getresponse()
+                conteudo = response.read()
+                duracao = time.perf_counter() - inicio
+                break
+            except (http.client.HTTPException, OSError):
+                self.conexao.close()
+                self.conexao = None
+                if tentativa:
+                    return 0, None, time.perf_counter() - inicio
+
+        try:
+            dados_resposta = json.loads(conteudo) if conteudo else None
+        except ValueError:
+            dados_resposta = None
+        return response.status, dados_resposta, duracao
+
+    def close(self):
+        if self.conexao is not None:
+            self.conexao.close()
+
+
+class Coletor:
+    """Latências e erros por endpoint de um usuário virtual (sem lock)"""
+
+    def __init__(self):
+        self.latencias = {}
+        self.erros = {}
+
+    def registrar(self, nome, status, duracao):
+        self.latencias.setdefault(nome, []).append(duracao)
+        if not 200 <= status < 400:
+            self.erros[nome] = self.erros.get(nome, 0) + 1
+
+
+# ============================================================
+# Jornadas
+# ============================================================
+
+class UsuarioVirtual:
+    """Executa jornadas sorteadas pelo mix até o fim do tempo ou das iterações"""
+
+    def __init__(self, indice, base_url, contexto, mix, seed):
+        self.rng = random.Random(seed * 1000 + indice)
+        self.cliente = ClienteHTTP(base_url)
+        self.contexto = contexto
+        self.coletor = Coletor()
+        self.jornadas = list(mix)
+        self.pesos = [mix[nome] for nome in self.jornadas]
+        self.admin_token = None
+        self.total_paginas = 1
+
+    def chamar(self, nome, method, path, dados=None, token=None):
+        status, corpo, duracao = self.cliente.request(method, path, dados, token)
+        self.coletor.registrar(nome, status, duracao)
+        return status, corpo
+
+    def login(self, email):
+        status, corpo, _ = self.cliente.request(
+            'POST', '/auth/login/', {'email': email, 'password': self.contexto['senha']}
+        )
+        return corpo.get('access') if status == 200 and corpo else None
+
+    def preparar(self):
+        """Login inicial (não medido) do usuário comum e do admin"""
+        self.cliente.token = self.login(self.rng.choice(self.contexto['emails']))
+        if 'grupos' in self.jornadas and self.contexto['admin_email']:
+            self.admin_token = self.login(self.contexto['admin_email'])
+
+    def jornada_login(self):
+        status, corpo = self.chamar('POST /auth/login/', 'POST', '/auth/login/', {
+            'email': self.rng.choice(self.contexto['emails']),
+            'password': self.contexto['senha'],
+        })
+        if status == 200 and corpo:
+            self.chamar('GET /auth/minhas-permissoes/', 'GET', '/auth/minhas-permissoes/', token=corpo['access'])
+
+    def jornada_status(self):
+        for _ in range(3):
+            self.chamar('GET /auth/status-online/', 'GET', '/auth/status-online/')
+
+    def jornada_busca(self):
+        # Primeiras páginas da listagem (limitadas ao total já visto)
+        pagina = self.rng.randint(1, min(5, self.total_paginas))
+        status, corpo = self.chamar('GET /auth/usuarios/', 'GET', f'/auth/usuarios/?page={pagina}')
+        if status == 200 and corpo:
+            self.total_paginas = max(1, corpo.get('total_pages', 1))
+        termo = urlencode({'search': self.rng.choice(TERMOS_BUSCA)})
+        self.chamar('GET /auth/usuarios/?search=', 'GET', f'/auth/usuarios/?{termo}')
+
+    def jornada_grupos(self):
+        if not (self.admin_token and self.contexto['grupos'] and self.contexto['permissoes']):
+            return
+        grupo_id = self.rng.choice(self.contexto['grupos'])
+        dados = {'permission_id': self.rng.choice(self.contexto['permissoes'])}
+        path = f'/controle-acesso/grupos/{grupo_id}/permissoes/'
+        nome = '/controle-acesso/grupos/<id>/permissoes/'
+        self.chamar(f'POST {nome}', 'POST', path, dados, token=self.admin_token)
+        self.chamar(f'GET {nome}', 'GET', path, token=self.admin_token)
+        self.chamar(f'DELETE {nome}', 'DELETE', path, dados, token=self.admin_token)
+
+    def executar(self, fim, iteracoes):
+        try:
+            self.preparar()
+            feitas = 0
+            while time.monotonic() < fim and (iteracoes is None or feitas < iteracoes):
+                jornada = self.rng.choices(self.jornadas, weights=self.pesos)[0]
+                getattr(self, f'jornada_{jornada}')()
+                feitas += 1
+        finally:
+            self.cliente.close()
+
+
+# ============================================================
+# Execução e relatório
+# ============================================================
+
+def carregar_contexto(prefixo='carga_', senha='carga12345', pool=1000):
+    """Emails, grupos e permissões dos dados gerados por seed_load_data"""
+    emails = list(
+        Usuario.objects.filter(username__startswith=prefixo, is_active=True, is_superuser=False)
+        .order_by('pk').values_list('email', flat=True)[:pool]
+    )
+    admin = Usuario.objects.filter(email=f'{prefixo}admin@carga.test', is_superuser=True).first()
+    return {
+        'senha': senha,
+        'emails': emails,
+        'admin_email': admin.email if admin else None,
+        'grupos': list(
+            GrupoCustomizado.objects.filter(group__name__startswith=prefixo)
+            .order_by('pk').values_list('pk', flat=True)[:200]
+        ),
+        'permissoes': list(
+            Permission.objects.filter(codename__startswith='controle_acesso_')
+            .order_by('pk').values_list('pk', flat=True)
+        ),
+    }
+
+
+def parse_mix(texto):
+    """'login=1,busca=3' -> {'login': 1, 'busca': 3}"""
+    mix = {}
+    for parte in filter(None, (texto or '').split(',')):
+        nome, _, peso = parte.partition('=')
+        if nome.strip() not in MIX_PADRAO:
+            raise ValueError(f"Jornada inválida: {nome}. Use: {', '.join(MIX_PADRAO)}")
+        mix[nome.strip()] = float(peso or 1)
+    return mix or dict(MIX_PADRAO)
+
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank"""
+    if not valores_ordenados:
+        return 0.0
+    posicao = math.ceil(p / 100 * len(valores_ordenados))
+    return valores_ordenados[min(max(posicao, 1), len(valores_ordenados)) - 1]
+
+
+def montar_relatorio(coletores, duracao, meta):
+    latencias = {}
+    erros = {}
+    for coletor in coletores:
+        for nome, valores in coletor.latencias.items():
+            latencias.setdefault(nome, []).extend(valores)
+        for nome, quantidade in coletor.erros.items():
+            erros[nome] = erros.get(nome, 0) + quantidade
+
+    def resumo(valores, quantidade_erros):
+        valores = sorted(valores)
+        return {
+            'requests': len(valores),
+            'errors': quantidade_erros,
+            'rps': round(len(valores) / duracao, 2) if duracao else 0.0,
+            'p50_ms': round(percentil(valores, 50) * 1000, 2),
+            'p95_ms': round(percentil(valores, 95) * 1000, 2),
+            'p99_ms': round(percentil(valores, 99) * 1000, 2),
+            'mean_ms': round(sum(valores) / len(valores) * 1000, 2) if valores else 0.0,
+            'max_ms': round(valores[-1] * 1000, 2) if valores else 0.0,
+        }
+
+    todos = [valor for valores in latencias.values() for valor in valores]
+    return {
+        'meta': dict(meta, duracao_s=round(duracao, 2), data=timezone.now().isoformat()),
+        'endpoints': {nome: resumo(valores, erros.get(nome, 0)) for nome, valores in sorted(latencias.items())},
+        'total': resumo(todos, sum(erros.values())),
+    }
+
+
+def executar(base_url, contexto, vus=10, duracao=30, iteracoes=None, mix=None, seed=42):
+    """Rodar os usuários virtuais e retornar o relatório"""
+    mix = mix or dict(MIX_PADRAO)
+    fim = time.monotonic() + duracao
+    usuarios = [UsuarioVirtual(i, base_url, contexto, mix, seed) for i in range(vus)]
+    threads = [threading.Thread(target=vu.executar, args=(fim, iteracoes), daemon=True) for vu in usuarios]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    meta = {'url': base_url, 'vus': vus, 'mix': mix, 'seed': seed, 'iteracoes': iteracoes}
+    return montar_relatorio([vu.coletor for vu in usuarios], decorrido, meta)
+
+
+def comparar(atual, baseline, limite_pct=20.0):
+    """
+    Comparar com um relatório anterior.
+
+    Retorna lista de dicts por endpoint com as variações (%) de p95 e RPS;
+    'regressao' indica p95 pior ou RPS menor que o limite.
+    """
+    linhas = []
+    for nome, dados in atual['endpoints'].items():
+        anterior = baseline.get('endpoints', {}).get(nome)
+        if not anterior:
+            continue
+        delta_p95 = _variacao(dados['p95_ms'], anterior['p95_ms'])
+        delta_rps = _variacao(dados['rps'], anterior['rps'])
+        linhas.append({
+            'endpoint': nome,
+            'p95_ms': dados['p95_ms'],
+            'p95_baseline_ms': anterior['p95_ms'],
+            'delta_p95_pct': delta_p95,
+            'rps': dados['rps'],
+            'rps_baseline': anterior['rps'],
+            'delta_rps_pct': delta_rps,
+            'regressao': delta_p95 > limite_pct or delta_rps < -limite_pct,
+        })
+    return linhas
+
+
+def _variacao(atual, anterior):
+    if not anterior:
+        return 0.0
+    return round((atual - anterior) / anterior * 100, 1)
+
+
+# ============================================================
+# Servidor em processo
+# ============================================================
+
+class ServidorLocal:
+    """Servidor WSGI multithread da aplicação numa porta livre"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+        from django.core.wsgi import get_wsgi_application
+
+        class HandlerSilencioso(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        # Como no LiveServerTestCase: o host local precisa estar em ALLOWED_HOSTS.
+        # Todos os usuários virtuais saem do mesmo IP: sem o rate limit de login
+        self.allowed_hosts = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host],
+            LOGIN_THROTTLE={**getattr(settings, 'LOGIN_THROTTLE', {}), 'ENABLED': False},
+        )
+        self.httpd = ThreadedWSGIServer((host, port), HandlerSilencioso)
+        self.httpd.daemon_threads = True
+        self.httpd.set_app(get_wsgi_application())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.allowed_hosts.enable()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.allowed_hosts.disable()
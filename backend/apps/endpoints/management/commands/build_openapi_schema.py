@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api import schema as openapi_schema
+
+class Command(BaseCommand):
+    help = 'Gerar o schema OpenAPI no build para ser servido da memória em /api/schema/'
+
+    def add_arguments(self, parser):
+        config = openapi_schema.get_schema_cache_config()
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=str(config['file']),
+            help=f"Arquivo do schema pré-gerado (padrão: {config['file']})",
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verificar se o arquivo corresponde ao URLconf atual (sai com erro se desatualizado)',
+        )
+
+    def handle(self, *args, **options):
+        fingerprint = openapi_schema.urlconf_fingerprint()
+
+        if options['check']:
+            if openapi_schema.read_schema_file(options['output'], fingerprint) is None:
+                raise CommandError(f"❌ Schema desatualizado ou ausente: {options['output']}")
+            self.stdout.write(self.style.SUCCESS('✅ Schema atualizado'))
+            return
+
+        self.stdout.write('📐 Gerando schema OpenAPI...')
+        inicio = time.perf_counter()
+        schema = openapi_schema.generate_schema()
+        openapi_schema.write_schema_file(options['output'], schema, fingerprint)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {len(schema.get('paths', {}))} paths gravados em {options['output']} "
+            f"({time.perf_counter() - inicio:.2f}s, fingerprint {fingerprint[:12]})"
+        ))
@@ -0,0 +1,108 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.endpoints import loadtest
+
+class Command(BaseCommand):
+    help = 'Teste de carga HTTP da API com usuários virtuais (rode seed_load_data --admin antes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            default=None,
+            help='URL base de um servidor já em execução (padrão: sobe a aplicação em processo)',
+        )
+        parser.add_argument('--vus', type=int, default=10, help='Usuários virtuais simultâneos (padrão: 10)')
+        parser.add_argument('--duration', type=float, default=30, help='Duração em segundos (padrão: 30)')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=None,
+            help='Jornadas por usuário virtual (encerra antes da duração se atingido)',
+        )
+        parser.add_argument(
+            '--mix',
+            type=str,
+            default='',
+            help='Pesos das jornadas, ex: login=1,status=3,busca=3,grupos=1',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Semente do sorteio das jornadas')
+        parser.add_argument('--prefix', type=str, default='carga_', help='Prefixo dos dados do seed_load_data')
+        parser.add_argument('--password', type=str, default='carga12345', help='Senha dos usuários gerados')
+        parser.add_argument('--user-pool', type=int, default=1000, help='Usuários distintos usados nos logins')
+        parser.add_argument('--output', type=str, default=None, help='Salvar o relatório JSON (baseline)')
+        parser.add_argument('--baseline', type=str, default=None, help='Relatório JSON anterior para comparar')
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=20.0,
+            help='Variação máxima (%%) de p95/RPS antes de acusar regressão (padrão: 20)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = loadtest.parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        contexto = loadtest.carregar_contexto(options['prefix'], options['password'], options['user_pool'])
+        if not contexto['emails']:
+            raise CommandError(
+                f"Nenhum usuário com prefixo '{options['prefix']}'. Rode: python manage.py seed_load_data --admin"
+            )
+        if 'grupos' in mix and not contexto['admin_email']:
+            self.stdout.write(self.style.WARNING('⚠️  Sem admin de carga: jornada "grupos" será ignorada'))
+
+        parametros = dict(
+            contexto=contexto,
+            vus=options['vus'],
+            duracao=options['duration'],
+            iteracoes=options['iterations'],
+            mix=mix,
+            seed=options['seed'],
+        )
+        if options['url']:
+            self.stdout.write(f"🚀 {options['vus']} usuários virtuais contra {options['url']}...")
+            relatorio = loadtest.executar(options['url'], **parametros)
+        else:
+            with loadtest.ServidorLocal() as servidor:
+                self.stdout.write(f"🚀 {options['vus']} usuários virtuais contra {servidor.url} (em processo)...")
+                relatorio = loadtest.executar(servidor.url, **parametros)
+
+        self.imprimir(relatorio)
+
+        if options['output']:
+            Path(options['output']).parent.mkdir(parents=True, exist_ok=True)
+            Path(options['output']).write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding='utf-8')
+            self.stdout.write(f"💾 Relatório salvo em {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text(encoding='utf-8'))
+            linhas = loadtest.comparar(relatorio, baseline, options['max_regression'])
+            self.imprimir_comparacao(linhas)
+            if any(linha['regressao'] for linha in linhas):
+                raise CommandError('Regressão de desempenho em relação ao baseline')
+
+    def imprimir(self, relatorio):
+        self.stdout.write('')
+        self.stdout.write(f"{'Endpoint':<52} {'Reqs':>7} {'Erros':>6} {'RPS':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        linhas = list(relatorio['endpoints'].items()) + [('TOTAL', relatorio['total'])]
+        for nome, dados in linhas:
+            self.stdout.write(
+                f"{nome:<52} {dados['requests']:>7} {dados['errors']:>6} {dados['rps']:>8.1f} "
+                f"{dados['p50_ms']:>8.1f} {dados['p95_ms']:>8.1f} {dados['p99_ms']:>8.1f}"
+            )
+        self.stdout.write('(latências em ms)')
+
+    def imprimir_comparacao(self, linhas):
+        self.stdout.write('')
+        self.stdout.write('📊 Comparação com o baseline (p95 / RPS):')
+        for linha in linhas:
+            icone = '❌' if linha['regressao'] else '✅'
+            self.stdout.write(
+                f"{icone} {linha['endpoint']:<52} p95 {linha['p95_baseline_ms']:.1f} → {linha['p95_ms']:.1f} ms "
+                f"({linha['delta_p95_pct']:+.1f}%)  RPS {linha['rps_baseline']:.1f} → {linha['rps']:.1f} "
+                f"({linha['delta_rps_pct']:+.1f}%)"
+            )
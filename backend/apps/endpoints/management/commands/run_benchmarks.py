@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.endpoints import benchmarks
+
+class Command(BaseCommand):
+    help = 'Micro-benchmarks de autorização e serialização (tempo e queries por escala)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            type=str,
+            default=','.join(str(escala) for escala in benchmarks.ESCALAS_PADRAO),
+            help='Quantidade de linhas por execução (padrão: 1,100,10000)',
+        )
+        parser.add_argument('--only', type=str, default=None, help='Rodar só alvos cujo nome contém o texto')
+        parser.add_argument('--min-rounds', type=int, default=5, help='Rodadas mínimas por alvo (padrão: 5)')
+        parser.add_argument('--max-time', type=float, default=1.0, help='Tempo máximo de rodadas por alvo em segundos')
+        parser.add_argument('--output', type=str, default=None, help='Salvar resultados em JSON (baseline)')
+        parser.add_argument('--baseline', type=str, default=None, help='JSON anterior para comparar')
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=20.0,
+            help='Piora máxima da média (%%) antes de acusar regressão (padrão: 20)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            escalas = [int(escala) for escala in options['scales'].split(',') if escala.strip()]
+        except ValueError:
+            raise CommandError('--scales deve ser uma lista de inteiros, ex: 1,100,10000')
+
+        self.stdout.write(f"⏱️  Rodando benchmarks nas escalas {escalas} (dados desfeitos ao final)...")
+        resultados = benchmarks.run_benchmarks(
+            escalas, options['only'], options['min_rounds'], options['max_time'], stdout=self.stdout
+        )
+        self.imprimir(resultados)
+
+        if options['output']:
+            Path(options['output']).parent.mkdir(parents=True, exist_ok=True)
+            Path(options['output']).write_text(
+                json.dumps({'resultados': resultados}, ensure_ascii=False, indent=2), encoding='utf-8'
+            )
+            self.stdout.write(f"💾 Resultados salvos em {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text(encoding='utf-8'))
+            linhas = benchmarks.comparar(resultados, baseline, options['max_regression'])
+            self.stdout.write('')
+            self.stdout.write('📊 Comparação com o baseline (média / queries):')
+            for linha in linhas:
+                icone = '❌' if linha['regressao'] else '✅'
+                self.stdout.write(
+                    f"{icone} {linha['alvo']:<38} {linha['linhas']:>6}  "
+                    f"{linha['mean_baseline_ms']:.3f} → {linha['mean_ms']:.3f} ms ({linha['delta_pct']:+.1f}%)  "
+                    f"queries {linha['queries_baseline']} → {linha['queries']}"
+                )
+            if any(linha['regressao'] for linha in linhas):
+                raise CommandError('Regressão em relação ao baseline')
+
+    def imprimir(self, resultados):
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'Alvo':<38} {'Linhas':>6} {'Min':>9} {'Max':>9} {'Média':>9} {'Mediana':>9} "
+            f"{'Desvio':>9} {'OPS':>10} {'Rodadas':>7} {'Queries':>7}"
+        )
+        for item in resultados:
+            self.stdout.write(
+                f"{item['alvo']:<38} {item['linhas']:>6} {item['min_ms']:>9.3f} {item['max_ms']:>9.3f} "
+                f"{item['mean_ms']:>9.3f} {item['median_ms']:>9.3f} {item['stddev_ms']:>9.3f} "
+                f"{item['ops']:>10.1f} {item['rounds']:>7} {item['queries']:>7}"
+            )
+        self.stdout.write('(tempos em ms)')
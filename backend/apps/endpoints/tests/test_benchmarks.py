@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.accounts.models import Usuario
+from apps.endpoints import benchmarks
+from core import metrics
+
+
+class TestBenchmarksComparacao(SimpleTestCase):
+    """Testes da comparação com o baseline"""
+
+    def test_comparar_acusa_regressao(self):
+        """Teste: média acima do limite ou mais queries é regressão"""
+        baseline = {'resultados': [
+            {'alvo': 'a', 'linhas': 1, 'mean_ms': 10.0, 'queries': 2},
+            {'alvo': 'b', 'linhas': 1, 'mean_ms': 10.0, 'queries': 2},
+            {'alvo': 'c', 'linhas': 1, 'mean_ms': 10.0, 'queries': 2},
+        ]}
+        resultados = [
+            {'alvo': 'a', 'linhas': 1, 'mean_ms': 11.0, 'queries': 2},
+            {'alvo': 'b', 'linhas': 1, 'mean_ms': 15.0, 'queries': 2},
+            {'alvo': 'c', 'linhas': 1, 'mean_ms': 9.0, 'queries': 3},
+            {'alvo': 'a', 'linhas': 100, 'mean_ms': 1.0, 'queries': 1},
+        ]
+        linhas = {(linha['alvo'], linha['linhas']): linha for linha in benchmarks.comparar(resultados, baseline, 20)}
+        self.assertFalse(linhas[('a', 1)]['regressao'])
+        self.assertTrue(linhas[('b', 1)]['regressao'])
+        self.assertEqual(linhas[('b', 1)]['delta_pct'], 50.0)
+        self.assertTrue(linhas[('c', 1)]['regressao'])
+        self.assertNotIn(('a', 100), linhas)
+
+
+class TestBenchmarksExecucao(TestCase):
+    """Execução rápida dos alvos"""
+
+    def test_todos_os_alvos_medidos_e_dados_desfeitos(self):
+        """Teste: cada alvo gera estatísticas e os dados criados são removidos"""
+        metrics.reset()
+        resultados = benchmarks.run_benchmarks([1, 3], min_rounds=1, max_time=0)
+
+        nomes = {nome for nome, _, _ in benchmarks.alvos(0)}
+        self.assertEqual({item['alvo'] for item in resultados}, nomes)
+        self.assertEqual(len(resultados), 2 * len(nomes))
+        for item in resultados:
+            self.assertLessEqual(item['min_ms'], item['max_ms'])
+            self.assertGreaterEqual(item['rounds'], 1)
+        self.assertFalse(Usuario.objects.filter(username__startswith=benchmarks.PREFIXO).exists())
+        # O login roteado é o da produção sob ASGI (view assíncrona, hash no pool)
+        counters, _ = metrics.merge_snapshots([metrics.snapshot()])
+        self.assertGreaterEqual(counters[('login_async_total', (('result', 'success'),))], 2)
+
+    def test_comando_com_filtro(self):
+        """Teste: --only limita os alvos e imprime a tabela"""
+        out = StringIO()
+        call_command(
+            'run_benchmarks', '--scales', '1', '--only', 'check_permission',
+            '--min-rounds', '1', '--max-time', '0', stdout=out
+        )
+        self.assertIn('utils.check_permission', out.getvalue())
+        self.assertNotIn('GrupoCustomizadoSerializer', out.getvalue())
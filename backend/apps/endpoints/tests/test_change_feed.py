@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Usuario
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada, RegistroExcluido
+
+FEED_TESTE = {'SAFETY_LAG': 0, 'PAGE_SIZE': 2}
+
+
+@override_settings(CHANGE_FEED=FEED_TESTE)
+class TestChangeFeed(TestCase):
+    """Testes do /changes/ de usuários, grupos e permissões"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = Usuario.objects.create_user(
+            username='feed_admin', email='feed_admin@example.com',
+            password='testpass123', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def sincronizar(self, url, **params):
+        """Todas as páginas a partir de params; devolve (operações, {"cursor": próximo})"""
+        operacoes = []
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            operacoes.extend(response.data['results'])
+            params = {'cursor': response.data['next_cursor']}
+            if not response.data['has_more']:
+                return operacoes, params
+
+    def test_carga_inicial_e_delta(self):
+        """Teste: carga inicial paginada e depois só o que mudou"""
+        outros = [
+            Usuario.objects.create_user(username=f'feed{i}', email=f'feed{i}@example.com', password='x')
+            for i in range(3)
+        ]
+        operacoes, cursor = self.sincronizar('/api/v1/auth/usuarios/changes/')
+        self.assertEqual([op['id'] for op in operacoes], [self.admin.id] + [u.id for u in outros])
+        self.assertEqual(operacoes[1]['data']['username'], 'feed0')
+
+        outros[0].first_name = 'Editado'
+        outros[0].save()
+        outros[1].is_active = False
+        outros[1].save()
+        excluido_id = outros[2].id
+        outros[2].delete()
+
+        operacoes, cursor = self.sincronizar('/api/v1/auth/usuarios/changes/', **cursor)
+        self.assertEqual(
+            [(op['op'], op['id']) for op in operacoes],
+            [('upsert', outros[0].id), ('delete', outros[1].id), ('delete', excluido_id)],
+        )
+        self.assertEqual(operacoes[0]['data']['first_name'], 'Editado')
+
+        operacoes, _ = self.sincronizar('/api/v1/auth/usuarios/changes/', **cursor)
+        self.assertEqual(operacoes, [])
+
+    def test_changed_since(self):
+        """Teste: changed_since pula o que é anterior"""
+        inicio = timezone.now()
+        permissao = PermissaoCustomizada.objects.create(modulo='feed', acao='ver')
+        operacoes, _ = self.sincronizar('/api/v1/controle-acesso/permissoes/changes/', changed_since=inicio.isoformat())
+        self.assertEqual([op['id'] for op in operacoes], [permissao.id])
+        self.assertEqual(operacoes[0]['data']['nome'], 'feed_ver')
+
+    def test_grupos_vinculos_e_exclusao(self):
+        """Teste: vínculo muda o total no feed; exclusão do grupo vira lápide"""
+        grupo = GrupoCustomizado.objects.create(group=Group.objects.create(name='Grupo Feed'))
+        _, cursor = self.sincronizar('/api/v1/controle-acesso/grupos/changes/')
+
+        self.admin.groups.add(grupo.group)
+        grupo.group.permissions.add(Permission.objects.first())
+        operacoes, cursor = self.sincronizar('/api/v1/controle-acesso/grupos/changes/', **cursor)
+        self.assertEqual(operacoes[0]['data']['total_usuarios'], 1)
+        self.assertEqual(operacoes[0]['data']['total_permissoes'], 1)
+
+        grupo_id = grupo.id
+        grupo.group.delete()
+        operacoes, _ = self.sincronizar('/api/v1/controle-acesso/grupos/changes/', **cursor)
+        self.assertEqual(operacoes[-1]['op'], 'delete')
+        self.assertEqual(operacoes[-1]['id'], grupo_id)
+
+    def test_cursor_invalido_e_expirado(self):
+        """Teste: cursor inválido = 400; anterior à retenção = 410"""
+        url = '/api/v1/auth/usuarios/changes/'
+        self.assertEqual(self.client.get(url, {'cursor': 'xyz'}).status_code, status.HTTP_400_BAD_REQUEST)
+        antigo = (timezone.now() - timedelta(days=365)).isoformat()
+        self.assertEqual(self.client.get(url, {'changed_since': antigo}).status_code, status.HTTP_410_GONE)
+
+    def test_feed_de_usuarios_exige_permissao(self):
+        """Teste: usuário sem accounts_visualizar não lê o feed de usuários"""
+        comum = Usuario.objects.create_user(username='feed_comum', email='feed_comum@example.com', password='x')
+        self.client.force_authenticate(user=comum)
+        response = self.client.get('/api/v1/auth/usuarios/changes/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestPurgeTombstones(TestCase):
+    """Testes do comando purge_tombstones"""
+
+    def test_remove_apenas_antigas(self):
+        """Teste: só lápides anteriores à retenção são removidas"""
+        RegistroExcluido.objects.create(modelo='accounts.usuario', objeto_id=1,
+                                        deleted_at=timezone.now() - timedelta(days=200))
+        recente = RegistroExcluido.objects.create(modelo='accounts.usuario', objeto_id=2)
+
+        call_command('purge_tombstones', days=90, stdout=StringIO())
+        self.assertEqual(list(RegistroExcluido.objects.all()), [recente])
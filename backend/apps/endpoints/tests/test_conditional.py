@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Usuario
+from apps.accounts.serializers import UsuarioBasicoSerializer
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+
+
+class TestGetCondicional(TestCase):
+    """Testes de ETag/Last-Modified nas listagens e detalhes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = Usuario.objects.create_user(
+            username='etag_admin', email='etag_admin@example.com',
+            password='testpass123', is_superuser=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_listagem_304_sem_serializar(self):
+        """Teste: If-None-Match igual = 304 sem passar pelo serializer"""
+        response = self.client.get('/api/v1/auth/usuarios/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with mock.patch.object(UsuarioBasicoSerializer, 'to_representation') as serializar:
+            response = self.client.get('/api/v1/auth/usuarios/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        serializar.assert_not_called()
+
+    def test_etag_muda_com_dados_e_parametros(self):
+        """Teste: edição, novo registro e outros filtros geram outro ETag"""
+        etag = self.client.get('/api/v1/auth/usuarios/')['ETag']
+        self.assertNotEqual(self.client.get('/api/v1/auth/usuarios/', {'page_size': 5})['ETag'], etag)
+
+        self.admin.first_name = 'Novo'
+        self.admin.save()
+        response = self.client.get('/api/v1/auth/usuarios/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_logout_muda_etag(self):
+        """Teste: presença (is_online) atualiza updated_at"""
+        etag = self.client.get(f'/api/v1/auth/usuarios/{self.admin.id}/')['ETag']
+        self.admin.set_offline()
+        response = self.client.get(f'/api/v1/auth/usuarios/{self.admin.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detalhe_if_modified_since(self):
+        """Teste: detalhe com Last-Modified e 304 por If-Modified-Since"""
+        url = f'/api/v1/controle-acesso/permissoes/{PermissaoCustomizada.objects.create(modulo="etag", acao="ver").id}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get('/api/v1/controle-acesso/permissoes/999999/').status_code, 404)
+
+    def test_exclusao_muda_etag_da_listagem(self):
+        """Teste: registro excluído muda o COUNT e o ETag"""
+        PermissaoCustomizada.objects.create(modulo='etag', acao='a')
+        antiga = PermissaoCustomizada.objects.create(modulo='etag', acao='b')
+        PermissaoCustomizada.objects.filter(pk=antiga.pk).update(updated_at=antiga.created_at.replace(year=2000))
+        etag = self.client.get('/api/v1/controle-acesso/permissoes/')['ETag']
+
+        antiga.delete()
+        response = self.client.get('/api/v1/controle-acesso/permissoes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_vinculo_de_grupo_muda_etag(self):
+        """Teste: total de usuários do grupo muda sem tocar updated_at (acl_version)"""
+        grupo = GrupoCustomizado.objects.create(group=Group.objects.create(name='Grupo ETag'))
+        etag = self.client.get('/api/v1/controle-acesso/grupos/')['ETag']
+
+        grupo.group.user_set.add(self.admin)
+        response = self.client.get('/api/v1/controle-acesso/grupos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['total_usuarios'], 1)
+
+    @override_settings(CONDITIONAL_GET={'ENABLED': False})
+    def test_desabilitado(self):
+        """Teste: CONDITIONAL_GET desligado não emite validadores"""
+        self.assertNotIn('ETag', self.client.get('/api/v1/auth/usuarios/'))
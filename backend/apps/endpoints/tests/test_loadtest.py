@@ -0,0 +1,66 @@
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+
+from apps.controle_acesso.seed import seed_load_data
+from apps.endpoints import loadtest
+
+
+class TestLoadtestRelatorio(SimpleTestCase):
+    """Testes do cálculo e da comparação de relatórios"""
+
+    def test_percentil_nearest_rank(self):
+        """Teste: percentis pelo método nearest-rank"""
+        valores = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(loadtest.percentil(valores, 50), 0.05)
+        self.assertEqual(loadtest.percentil(valores, 95), 0.095)
+        self.assertEqual(loadtest.percentil(valores, 99), 0.099)
+        self.assertEqual(loadtest.percentil([0.2], 99), 0.2)
+        self.assertEqual(loadtest.percentil([], 50), 0.0)
+
+    def test_parse_mix(self):
+        """Teste: pesos das jornadas e jornada inválida"""
+        self.assertEqual(loadtest.parse_mix('login=2,busca'), {'login': 2.0, 'busca': 1.0})
+        self.assertEqual(loadtest.parse_mix(''), loadtest.MIX_PADRAO)
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix('inexistente=1')
+
+    def test_comparar_acusa_regressao(self):
+        """Teste: p95 acima do limite ou RPS abaixo é regressão"""
+        baseline = {'endpoints': {
+            'GET /a/': {'p95_ms': 10.0, 'rps': 100.0},
+            'GET /b/': {'p95_ms': 10.0, 'rps': 100.0},
+        }}
+        atual = {'endpoints': {
+            'GET /a/': {'p95_ms': 11.0, 'rps': 95.0},
+            'GET /b/': {'p95_ms': 15.0, 'rps': 100.0},
+            'GET /novo/': {'p95_ms': 1.0, 'rps': 1.0},
+        }}
+        linhas = {linha['endpoint']: linha for linha in loadtest.comparar(atual, baseline, 20)}
+        self.assertFalse(linhas['GET /a/']['regressao'])
+        self.assertTrue(linhas['GET /b/']['regressao'])
+        self.assertEqual(linhas['GET /b/']['delta_p95_pct'], 50.0)
+        self.assertNotIn('GET /novo/', linhas)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestLoadtestExecucao(LiveServerTestCase):
+    """Execução curta das jornadas contra o servidor de teste"""
+
+    def test_jornadas_sem_erros(self):
+        """Teste: todas as jornadas executam e geram métricas por endpoint"""
+        seed_load_data(usuarios=20, grupos=3, auditoria=0, admin=True)
+        contexto = loadtest.carregar_contexto()
+
+        relatorio = loadtest.executar(
+            self.live_server_url, contexto, vus=2, duracao=30, iteracoes=15, seed=1,
+        )
+
+        endpoints = relatorio['endpoints']
+        self.assertIn('POST /auth/login/', endpoints)
+        self.assertIn('GET /auth/usuarios/?search=', endpoints)
+        self.assertIn('POST /controle-acesso/grupos/<id>/permissoes/', endpoints)
+        self.assertEqual(relatorio['total']['errors'], 0)
+        self.assertEqual(
+            relatorio['total']['requests'],
+            sum(dados['requests'] for dados in endpoints.values())
+        )
+        self.assertLessEqual(endpoints['POST /auth/login/']['p50_ms'], endpoints['POST /auth/login/']['p99_ms'])
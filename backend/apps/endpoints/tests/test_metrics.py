@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.controle_acesso.utils import get_user_permissions_cached
+from core import metrics
+
+Usuario = get_user_model()
+
+
+class TestMetricsEndpoint(TestCase):
+    """Testes das métricas por view expostas em /metrics"""
+
+    def setUp(self):
+        metrics.reset()
+        cache.clear()
+        self.client = APIClient()
+        self.superuser = Usuario.objects.create_superuser(
+            username='metrics_admin',
+            email='metrics_admin@test.com',
+            password='test123'
+        )
+        token = RefreshToken.for_user(self.superuser).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def linhas_metricas(self, **extra):
+        response = self.client.get('/metrics', **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode().splitlines()
+
+    def test_requests_por_rota_e_metodo(self):
+        """Teste: contador, histograma e queries usam a rota (sem ids)"""
+        self.client.get(f'/api/v1/auth/usuarios/{self.superuser.id}/')
+        self.client.get(f'/api/v1/auth/usuarios/{self.superuser.id}/')
+
+        linhas = self.linhas_metricas()
+        labels = 'route="/api/v1/auth/usuarios/<pk>/",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', linhas)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', linhas)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', linhas)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', linhas)
+        queries = [l for l in linhas if l.startswith(f'http_request_db_queries_total{{{labels}}}')]
+        self.assertEqual(len(queries), 1)
+        self.assertGreater(int(queries[0].rsplit(' ', 1)[1]), 0)
+
+    def test_rota_inexistente_agrupada(self):
+        """Teste: 404 sem rota não gera uma série por path"""
+        self.client.get('/nao-existe/1/')
+        self.client.get('/nao-existe/2/')
+        self.assertIn(
+            'http_requests_total{route="unmatched",method="GET",status="404"} 2',
+            self.linhas_metricas()
+        )
+
+    def test_cache_de_permissoes_hit_miss(self):
+        """Teste: hits e misses do cache de permissões do usuário"""
+        usuario = Usuario.objects.create_user(
+            username='metrics_user', email='metrics_user@test.com', password='test123'
+        )
+        get_user_permissions_cached(usuario)
+        get_user_permissions_cached(usuario)
+        get_user_permissions_cached(usuario)
+
+        linhas = self.linhas_metricas()
+        self.assertIn('permission_cache_requests_total{cache="user_permissions",result="miss"} 1', linhas)
+        self.assertIn('permission_cache_requests_total{cache="user_permissions",result="hit"} 2', linhas)
+
+    def test_agregacao_entre_processos(self):
+        """Teste: snapshots de outros workers no diretório compartilhado são somados"""
+        with tempfile.TemporaryDirectory() as diretorio:
+            outro_worker = {
+                'counters': [['permission_cache_requests_total', [['cache', 'app_permissions'], ['result', 'hit']], 5]],
+                'histograms': [],
+            }
+            # PID de um processo vivo (o pai do runner), como um worker do gunicorn
+            Path(diretorio, f'metrics-{os.getppid()}-abcdef.json').write_text(json.dumps(outro_worker))
+            metrics.record_cache_access('app_permissions', True)
+
+            with override_settings(METRICS={'MULTIPROCESS_DIR': diretorio}):
+                linhas = self.linhas_metricas()
+                metrics.flush()
+
+            self.assertIn('permission_cache_requests_total{cache="app_permissions",result="hit"} 6', linhas)
+            self.assertEqual(len(list(Path(diretorio).glob('metrics-*.json'))), 2)
+
+    def test_snapshot_antigo_vai_para_o_arquivo(self):
+        """Teste: snapshot além do MAX_AGE é somado ao arquivo (total não diminui); recente de outro host fica"""
+        snapshot = {
+            'counters': [['permission_cache_requests_total', [['cache', 'app_permissions'], ['result', 'hit']], 5]],
+            'histograms': [],
+        }
+        linha = 'permission_cache_requests_total{cache="app_permissions",result="hit"} 10'
+        with tempfile.TemporaryDirectory() as diretorio:
+            # PID inexistente neste host: worker de outro host/container, ainda vivo
+            outro_host = Path(diretorio, 'metrics-999999-abcdef.json')
+            encerrado = Path(diretorio, 'metrics-888888-abcdef.json')
+            for path in (outro_host, encerrado):
+                path.write_text(json.dumps(snapshot))
+            uma_hora_atras = time.time() - 3600
+            os.utime(encerrado, (uma_hora_atras, uma_hora_atras))
+
+            with override_settings(METRICS={'MULTIPROCESS_DIR': diretorio, 'MAX_AGE': 60}):
+                self.assertIn(linha, self.linhas_metricas())
+                self.assertIn(linha, self.linhas_metricas())
+
+            self.assertTrue(outro_host.exists())
+            self.assertFalse(encerrado.exists())
+            self.assertTrue(Path(diretorio, metrics.ARCHIVE_NAME).exists())
+            self.assertFalse(Path(diretorio, metrics.ARCHIVE_LOCK_NAME).exists())
+
+    def test_processo_arquivado_recomeca_contadores(self):
+        """Teste: processo parado além do MAX_AGE não soma de novo o que já foi para o arquivo"""
+        with tempfile.TemporaryDirectory() as diretorio:
+            metrics.record_cache_access('app_permissions', True)
+            metrics.flush(diretorio)
+            proprio = next(Path(diretorio).glob('metrics-*.json'))
+            uma_hora_atras = time.time() - 3600
+            os.utime(proprio, (uma_hora_atras, uma_hora_atras))
+            # Arquivado como se outro processo o visse parado (o próprio é preservado)
+            proprio.rename(Path(diretorio, 'metrics-1-parado.json'))
+            metrics.arquivar_antigos(diretorio, 60)
+
+            metrics.flush(diretorio)
+            with override_settings(METRICS={'MULTIPROCESS_DIR': diretorio, 'MAX_AGE': 60}):
+                linhas = self.linhas_metricas()
+
+        self.assertIn('permission_cache_requests_total{cache="app_permissions",result="hit"} 1', linhas)
+
+    def test_acesso_exige_staff_sem_token(self):
+        """Teste: por padrão /metrics só responde a staff (anônimo e usuário comum = 401)"""
+        self.client.credentials()
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+
+        usuario = Usuario.objects.create_user(
+            username='metrics_comum', email='metrics_comum@test.com', password='test123'
+        )
+        token = RefreshToken.for_user(usuario).access_token
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION=f'Bearer {token}').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer invalido').status_code, 401)
+
+    @override_settings(METRICS={'ALLOWED_IPS': ['10.0.0.0/8']})
+    def test_ip_liberado(self):
+        """Teste: IP dentro da rede liberada lê sem token; X-Forwarded-For não conta"""
+        self.client.credentials()
+        self.linhas_metricas(REMOTE_ADDR='10.1.2.3')
+        response = self.client.get('/metrics', REMOTE_ADDR='192.168.0.1', HTTP_X_FORWARDED_FOR='10.1.2.3')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS={'TOKEN': 'segredo'})
+    def test_token_obrigatorio(self):
+        """Teste: com TOKEN configurado o scrape exige Bearer"""
+        self.client.credentials()
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.linhas_metricas(HTTP_AUTHORIZATION='Bearer segredo')
+
+    def test_escape_de_labels(self):
+        """Teste: aspas e quebras de linha escapadas no formato texto"""
+        texto = metrics.render([{
+            'counters': [['http_requests_total', [['route', 'a"b\nc']], 1]],
+            'histograms': [],
+        }])
+        self.assertIn('http_requests_total{route="a\\"b\\nc"} 1', texto)
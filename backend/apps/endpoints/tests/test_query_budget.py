@@ -0,0 +1,261 @@
+import json
+import os
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldError
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.controle_acesso.audit import PermissionAuditLog
+from apps.controle_acesso.models import GrupoCustomizado, PermissaoCustomizada
+from core.query_budget import (
+    QueryBudgetExceeded,
+    QueryBudgetMiddleware,
+    query_budget,
+    resolve_view_budget,
+)
+
+Usuario = get_user_model()
+
+API_PREFIX = '/api/v1/'
+PARAM_REGEX = re.compile(r'<(?:\w+:)?(?P<nome>\w+)>|\(\?P<(?P<nome_regex>\w+)>[^)]*\)')
+
+BUDGET_SETTINGS = {'ENABLED': True, 'MODE': 'raise', 'DEFAULT': None, 'HEADERS': True}
+
+# Rotas legadas com bug conhecido, fora do escopo do orçamento: o teste exige
+# a exceção para que a entrada saia daqui quando a view for corrigida.
+# GrupoDetalheViewSet.retrieve filtra PermissaoCustomizada por 'groups',
+# campo que o model não tem.
+ROTAS_COM_BUG_CONHECIDO = {
+    'grupos-detalhe-detail': FieldError,
+}
+
+
+def iter_rotas(patterns, prefixo=''):
+    """Percorrer o URLconf gerando (rota, nome) das URLs finais"""
+    for pattern in patterns:
+        rota = prefixo + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_rotas(pattern.url_patterns, rota)
+        elif isinstance(pattern, URLPattern):
+            yield rota, pattern.name
+
+
+class TestQueryBudgetEndpoints(TestCase):
+    """Percorre todos os endpoints GET da API v1 e aplica o orçamento de queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.superuser = Usuario.objects.create_superuser(
+            username='budget_admin',
+            email='budget_admin@test.com',
+            password='test123'
+        )
+        token = RefreshToken.for_user(self.superuser).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        content_type = ContentType.objects.get_for_model(Usuario)
+        self.permissao = PermissaoCustomizada.objects.create(
+            nome='Visualizar budget',
+            modulo='accounts', acao='visualizar'
+        )
+        self.django_perm = Permission.objects.create(
+            codename='accounts_visualizar', name='Visualizar budget',
+            content_type=content_type
+        )
+        self.criar_grupos(3)
+        self.usuario = Usuario.objects.create_user(
+            username='budget_user', email='budget_user@test.com', password='test123'
+        )
+        self.usuario.groups.add(*Group.objects.all())
+        self.log = PermissionAuditLog.objects.first()
+
+    def criar_grupos(self, quantidade):
+        inicio = GrupoCustomizado.objects.count()
+        for i in range(inicio, inicio + quantidade):
+            grupo = Group.objects.create(name=f'Budget {i}')
+            grupo.permissions.add(self.django_perm)
+            GrupoCustomizado.objects.create(group=grupo, descricao=f'Grupo {i}')
+
+    def ids_por_parametro(self, rota, nome):
+        grupo_custom = GrupoCustomizado.objects.first()
+        if nome == 'pk':
+            recurso = rota.rsplit('/', 2)[0].rsplit('/', 1)[-1].lstrip('^')
+            return {
+                'usuarios': self.usuario.id,
+                'permissoes': self.permissao.id,
+                'grupos': grupo_custom.id,
+                'grupos-detalhe': grupo_custom.group_id,
+                'auditoria': self.log.id if self.log else 1,
+            }.get(recurso, 1)
+        return {
+            'usuario_id': self.usuario.id,
+            'grupo_id': grupo_custom.id,
+            'permissao_id': self.permissao.id,
+        }.get(nome, 1)
+
+    def montar_url(self, rota):
+        def substituir(match):
+            nome = match.group('nome') or match.group('nome_regex')
+            return str(self.ids_por_parametro(rota, nome))
+        caminho = PARAM_REGEX.sub(substituir, rota)
+        return API_PREFIX + caminho.replace('^', '').replace('$', '').replace('\\', '')
+
+    def rotas_api(self):
+        for rota, nome in iter_rotas(get_resolver('endpoints.v1.urls').url_patterns):
+            if ':format>' in rota or '(?P<format>' in rota:
+                continue
+            yield rota, nome
+
+    def assert_dentro_do_orcamento(self, url, metodo, response):
+        """Queries do request <= orçamento da view (None = view sem orçamento)"""
+        view_name, action, limite = resolve_view_budget(resolve(url).func, metodo)
+        queries = int(response['X-Query-Count'])
+        if limite is not None:
+            self.assertLessEqual(queries, limite, f'{view_name}.{action} ({metodo.upper()} {url})')
+        return queries, limite
+
+    @override_settings(QUERY_BUDGET=BUDGET_SETTINGS)
+    def test_endpoints_dentro_do_orcamento(self):
+        """Teste: nenhum endpoint GET estoura o orçamento declarado"""
+        relatorio = []
+        for rota, nome in self.rotas_api():
+            url = self.montar_url(rota)
+            with self.subTest(rota=rota):
+                if nome in ROTAS_COM_BUG_CONHECIDO:
+                    with self.assertRaises(ROTAS_COM_BUG_CONHECIDO[nome]):
+                        self.client.get(url)
+                    continue
+                response = self.client.get(url)
+                self.assertLess(response.status_code, 500, url)
+                queries, limite = self.assert_dentro_do_orcamento(url, 'get', response)
+                relatorio.append({
+                    'rota': rota,
+                    'nome': nome,
+                    'url': url,
+                    'status': response.status_code,
+                    'queries': queries,
+                    'limite': limite,
+                    'db_time_ms': float(response.get('X-Query-Time-Ms', 0)),
+                })
+
+        destino = os.environ.get('QUERY_BUDGET_REPORT')
+        if destino:
+            with open(destino, 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+    @override_settings(QUERY_BUDGET=BUDGET_SETTINGS)
+    def test_escritas_dentro_do_orcamento(self):
+        """Teste: create/update de usuários e grupos não estouram o orçamento"""
+        url_usuarios = f'{API_PREFIX}auth/usuarios/'
+        url_usuario = f'{url_usuarios}{self.usuario.id}/'
+        url_grupos = f'{API_PREFIX}controle-acesso/grupos/'
+        url_grupo = f'{url_grupos}{GrupoCustomizado.objects.first().id}/'
+        escritas = [
+            ('post', url_usuarios, {
+                'username': 'budget_novo',
+                'email': 'budget_novo@test.com',
+                'password': 'newpass123',
+                'password_confirm': 'newpass123',
+                'first_name': 'Budget',
+                'last_name': 'Novo',
+            }, 201),
+            ('put', url_usuario, {
+                'username': 'budget_user',
+                'email': 'budget_user@test.com',
+                'first_name': 'Budget',
+                'last_name': 'Atualizado',
+            }, 200),
+            ('patch', url_usuario, {'first_name': 'Parcial'}, 200),
+            ('post', url_grupos, {
+                'group_data': {'name': 'Budget novo'},
+                'descricao': 'Grupo novo',
+                'permissoes': [self.permissao.id],
+            }, 201),
+            ('put', url_grupo, {
+                'group_data': {'name': 'Budget renomeado'},
+                'descricao': 'Grupo renomeado',
+                'permissoes': [self.permissao.id],
+            }, 200),
+            ('patch', url_grupo, {'permissoes': []}, 200),
+        ]
+        for metodo, url, dados, esperado in escritas:
+            with self.subTest(metodo=metodo, url=url):
+                response = getattr(self.client, metodo)(url, dados, format='json')
+                self.assertEqual(response.status_code, esperado, response.content)
+                _, limite = self.assert_dentro_do_orcamento(url, metodo, response)
+                self.assertIsNotNone(limite)
+
+    @override_settings(QUERY_BUDGET=BUDGET_SETTINGS)
+    def test_listagem_de_grupos_sem_n_mais_1(self):
+        """Teste: número de queries da listagem de grupos não cresce com as linhas"""
+        url = f'{API_PREFIX}controle-acesso/grupos/'
+        antes = int(self.client.get(url)['X-Query-Count'])
+        self.criar_grupos(5)
+        depois = self.client.get(url)
+        self.assertEqual(int(depois['X-Query-Count']), antes)
+        self.assertEqual(depois.json()['results'][0]['total_permissoes'], 1)
+
+    @override_settings(QUERY_BUDGET=BUDGET_SETTINGS)
+    def test_grupos_do_usuario_sem_n_mais_1(self):
+        """Teste: grupos do usuário em número fixo de queries"""
+        url = f'{API_PREFIX}auth/usuarios/{self.usuario.id}/grupos/'
+        antes = int(self.client.get(url)['X-Query-Count'])
+        self.criar_grupos(4)
+        self.usuario.groups.add(*Group.objects.all())
+        depois = self.client.get(url)
+        self.assertEqual(int(depois['X-Query-Count']), antes)
+        self.assertEqual(depois.json()['total'], 7)
+
+
+class TestQueryBudgetMiddleware(TestCase):
+    """Testes do middleware e da resolução de orçamento"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def executar(self, view, queries):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            for _ in range(queries):
+                Usuario.objects.exists()
+            return HttpResponse('ok')
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(self.factory.get('/teste/'))
+
+    def test_resolucao_por_action_e_metodo(self):
+        """Teste: action tem prioridade sobre método e 'default'"""
+        @query_budget(default=9, list=2, post=4)
+        def view(request):
+            return None
+        view.actions = {'get': 'list', 'post': 'create'}
+
+        self.assertEqual(resolve_view_budget(view, 'GET')[1:], ('list', 2))
+        self.assertEqual(resolve_view_budget(view, 'POST')[1:], ('create', 4))
+        self.assertEqual(resolve_view_budget(view, 'DELETE')[1:], ('delete', 9))
+
+    @override_settings(QUERY_BUDGET={'MODE': 'raise', 'HEADERS': True})
+    def test_estouro_levanta_em_modo_raise(self):
+        """Teste: MODE='raise' levanta QueryBudgetExceeded"""
+        view = query_budget(2)(lambda request: None)
+        self.assertEqual(self.executar(view, 2)['X-Query-Count'], '2')
+        with self.assertRaises(QueryBudgetExceeded):
+            self.executar(view, 3)
+
+    @override_settings(QUERY_BUDGET={'MODE': 'warn'})
+    def test_estouro_registra_warning(self):
+        """Teste: MODE='warn' registra warning estruturado"""
+        view = query_budget(1)(lambda request: None)
+        with self.assertLogs('query_budget', level='WARNING') as logs:
+            response = self.executar(view, 2)
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(logs.records[0].getMessage())
+        self.assertEqual(payload['event'], 'query_budget_exceeded')
+        self.assertEqual((payload['queries'], payload['limit']), (2, 1))
+        self.assertNotIn('X-Query-Count', response)
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.accounts.models import Usuario
+from core.query_plans import analisar_plano
+
+
+class TestAnalisarPlano(SimpleTestCase):
+    """Testes da leitura do EXPLAIN de cada backend"""
+
+    def test_sqlite(self):
+        """Teste: SCAN sem índice é varredura; TEMP B-TREE é sort"""
+        plano = '4 0 0 SCAN sis_usuarios\n33 0 0 USE TEMP B-TREE FOR ORDER BY'
+        self.assertEqual(
+            analisar_plano(plano, 'sqlite'),
+            {'varreduras': ['sis_usuarios'], 'indices': [], 'ordenacao': True},
+        )
+
+        plano = '5 0 0 SEARCH sis_usuarios USING COVERING INDEX usuario_ativo_joined_idx (is_active=?)'
+        self.assertEqual(
+            analisar_plano(plano, 'sqlite'),
+            {'varreduras': [], 'indices': ['usuario_ativo_joined_idx'], 'ordenacao': False},
+        )
+
+    def test_postgresql(self):
+        """Teste: Seq Scan e nó Sort no plano JSON"""
+        plano = json.dumps([{'Plan': {
+            'Node Type': 'Limit',
+            'Plans': [{'Node Type': 'Sort', 'Plans': [{'Node Type': 'Seq Scan', 'Relation Name': 'sis_usuarios'}]}],
+        }}])
+        self.assertEqual(
+            analisar_plano(plano, 'postgresql'),
+            {'varreduras': ['sis_usuarios'], 'indices': [], 'ordenacao': True},
+        )
+
+    def test_mysql(self):
+        """Teste: access_type ALL e using_filesort no plano JSON"""
+        plano = json.dumps({'query_block': {'ordering_operation': {
+            'using_filesort': False,
+            'table': {'table_name': 'sis_usuarios', 'access_type': 'ref', 'key': 'usuario_ativo_username_idx'},
+        }}})
+        self.assertEqual(
+            analisar_plano(plano, 'mysql'),
+            {'varreduras': [], 'indices': ['usuario_ativo_username_idx'], 'ordenacao': False},
+        )
+
+
+class TestCheckQueryPlans(TestCase):
+    """Execução do check_query_plans contra o banco de teste"""
+
+    def test_listagem_sem_varredura_completa(self):
+        """Teste: toda combinação filtro/ordenação da listagem usa índice"""
+        Usuario.objects.bulk_create([
+            Usuario(username=f'plano{i}', email=f'plano{i}@example.com', password='!', is_active=i % 10 != 0)
+            for i in range(50)
+        ])
+        with tempfile.TemporaryDirectory() as pasta:
+            arquivo = os.path.join(pasta, 'planos.json')
+            call_command('check_query_plans', output=arquivo, stdout=StringIO())
+            with open(arquivo, encoding='utf-8') as f:
+                resultados = json.load(f)['resultados']
+
+        self.assertEqual(len(resultados), 32)
+        self.assertEqual([item['consulta'] for item in resultados if item['varreduras']], [])
+        padrao = next(item for item in resultados if item['consulta'] == 'ativos ordering=username')
+        self.assertEqual(padrao['indices'], ['usuario_ativo_username_idx'])
+        self.assertFalse(padrao['ordenacao'])
@@ -0,0 +1,112 @@
+import io
+import json
+import uuid
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Usuario
+from core.renderers import FastJSONParser, FastJSONRenderer
+
+
+class TestFastJSONRenderer(SimpleTestCase):
+    """Testes da saída do renderer orjson contra o JSONRenderer do DRF"""
+
+    def setUp(self):
+        agora = timezone.now()
+        self.dados = {
+            'id': uuid.uuid4(),
+            'criado': agora,
+            'data': agora.date(),
+            'hora': agora.time(),
+            'valor': Decimal('10.50'),
+            'rotulo': gettext_lazy('Usuários'),
+            'texto': 'linha separada ',
+            7: None,
+            'results': [{'id': i, 'updated_at': agora} for i in range(3)],
+        }
+
+    def test_mesma_saida_do_json_renderer(self):
+        """Teste: datetime, Decimal, UUID, lazy string e U+2028 iguais ao padrão"""
+        self.assertEqual(FastJSONRenderer().render(self.dados), JSONRenderer().render(self.dados))
+
+    def test_listas_grandes_em_pedacos(self):
+        """Teste: lista e "results" acima do limite são codificados em pedaços"""
+        agora = timezone.now()
+        itens = [{'id': i, 'updated_at': agora} for i in range(25)]
+        respostas = [itens, {'count': 25, 'results': itens, 'next': None}, {'results': itens}]
+        config = {'BACKEND': 'orjson', 'CHUNK_THRESHOLD': 10, 'CHUNK_SIZE': 4}
+        with override_settings(JSON_RENDERER=config):
+            for data in respostas:
+                pedacos = list(FastJSONRenderer().render_chunks(data))
+                self.assertGreater(len(pedacos), 5)
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_inteiro_grande_cai_no_json_padrao(self):
+        """Teste: valor fora do orjson (inteiro de 70 bits) usa o json da biblioteca padrão"""
+        data = [{'id': 2 ** 70}] * 30
+        with override_settings(JSON_RENDERER={'CHUNK_THRESHOLD': 10, 'CHUNK_SIZE': 4}):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indentacao_e_backend_json_usam_o_padrao(self):
+        """Teste: indent pedido ou JSON_BACKEND=json mantêm a saída do DRF"""
+        indentado = FastJSONRenderer().render(self.dados, 'application/json; indent=4')
+        self.assertEqual(indentado, JSONRenderer().render(self.dados, 'application/json; indent=4'))
+        self.assertIn(b'\n    ', indentado)
+        with override_settings(JSON_RENDERER={'BACKEND': 'json'}):
+            self.assertEqual(FastJSONRenderer().render({'a': 1.0}), b'{"a":1.0}')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class TestFastJSONParser(SimpleTestCase):
+    """Testes do parser orjson"""
+
+    def test_mesmo_resultado_do_json_parser(self):
+        """Teste: corpo UTF-8 e em outro charset lidos como no parser padrão"""
+        corpo = json.dumps({'nome': 'João', 'ids': [1, 2], 'ativo': True, 'valor': 1.5}).encode()
+        esperado = JSONParser().parse(io.BytesIO(corpo))
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(corpo)), esperado)
+
+        latin1 = '{"nome": "João"}'.encode('latin-1')
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(latin1), parser_context={'encoding': 'latin-1'}),
+            {'nome': 'João'},
+        )
+
+    def test_json_invalido_parse_error(self):
+        """Teste: JSON inválido, NaN e bytes inválidos = ParseError (400)"""
+        for corpo in (b'{"a": ', b'{"a": NaN}', b'\xff\xfe'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(corpo))
+
+
+class TestRendererNaApi(TestCase):
+    """Renderer e parser configurados no REST_FRAMEWORK"""
+
+    def test_resposta_e_request_json(self):
+        """Teste: listagem renderizada pelo orjson e corpo JSON aceito"""
+        admin = Usuario.objects.create_user(
+            username='render_admin', email='render_admin@example.com',
+            password='testpass123', is_superuser=True
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        response = client.get('/api/v1/auth/usuarios/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['results'][0]['username'], 'render_admin')
+
+        response = client.patch(
+            f'/api/v1/auth/usuarios/{admin.pk}/', '{"first_name": "Ren', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('JSON parse error', response.json()['detail'])
@@ -0,0 +1,94 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import yaml
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from api import schema as openapi_schema
+
+
+class TestSchemaCache(TestCase):
+    """Testes do schema OpenAPI pré-gerado em /api/schema/"""
+
+    url = '/api/schema/'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.arquivo = Path(self.tmpdir.name) / 'openapi-schema.json'
+        override = override_settings(OPENAPI_SCHEMA_CACHE={'ENABLED': True, 'FILE': self.arquivo})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.tmpdir.cleanup)
+        openapi_schema.clear_schema_cache()
+        self.addCleanup(openapi_schema.clear_schema_cache)
+
+    def test_gera_uma_vez_e_serve_da_memoria(self):
+        """Teste: requests seguintes não regeneram o schema"""
+        with mock.patch.object(openapi_schema, 'generate_schema', wraps=openapi_schema.generate_schema) as gerar:
+            primeiro = self.client.get(self.url)
+            segundo = self.client.get(self.url)
+        self.assertEqual(gerar.call_count, 1)
+        self.assertEqual(primeiro.status_code, 200)
+        self.assertEqual(primeiro.content, segundo.content)
+        self.assertIn('/api/v1/auth/login/', yaml.safe_load(primeiro.content)['paths'])
+
+    def test_etag_retorna_304(self):
+        """Teste: If-None-Match com o ETag atual retorna 304 sem corpo"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_gzip_e_formato_json(self):
+        """Teste: JSON comprimido quando o cliente aceita gzip"""
+        response = self.client.get(f'{self.url}?format=json', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        schema = json.loads(gzip.decompress(response.content))
+        self.assertEqual(schema['info']['title'], 'DX Suporte API')
+
+    def test_comando_de_build_evita_geracao_no_request(self):
+        """Teste: com o arquivo de build atualizado o request só lê o arquivo"""
+        out = StringIO()
+        call_command('build_openapi_schema', stdout=out)
+        self.assertTrue(self.arquivo.exists())
+        call_command('build_openapi_schema', '--check', stdout=out)
+
+        with mock.patch.object(openapi_schema, 'generate_schema') as gerar:
+            response = self.client.get(f'{self.url}?format=json')
+        gerar.assert_not_called()
+        self.assertIn('/api/v1/auth/login/', json.loads(response.content)['paths'])
+
+    def test_regenera_quando_urlconf_muda(self):
+        """Teste: impressão digital diferente descarta o arquivo e o cache"""
+        call_command('build_openapi_schema', stdout=StringIO())
+        etag = self.client.get(self.url)['ETag']
+
+        openapi_schema._cache['resolver'] = None  # novo URLconf carregado
+        with mock.patch.object(openapi_schema, 'urlconf_fingerprint', return_value='outro'), \
+                mock.patch.object(openapi_schema, 'generate_schema', return_value={'openapi': '3.0.3', 'paths': {}}) as gerar:
+            response = self.client.get(self.url)
+            with self.assertRaises(CommandError):
+                call_command('build_openapi_schema', '--check', stdout=StringIO(), stderr=StringIO())
+        gerar.assert_called_once()
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_fingerprint_inclui_codigo_dos_serializers(self):
+        """Teste: mudar o fonte de um serializer muda a impressão digital"""
+        fingerprint = openapi_schema.urlconf_fingerprint()
+        serializers = (Path(openapi_schema.settings.BASE_DIR) / 'apps' / 'accounts' / 'serializers.py').resolve()
+        read_bytes = Path.read_bytes
+
+        def fonte_alterada(arquivo):
+            conteudo = read_bytes(arquivo)
+            return conteudo + b'\n# campo novo' if arquivo == serializers else conteudo
+
+        with mock.patch.object(Path, 'read_bytes', fonte_alterada):
+            self.assertNotEqual(openapi_schema.urlconf_fingerprint(), fingerprint)
+        self.assertEqual(openapi_schema.urlconf_fingerprint(), fingerprint)
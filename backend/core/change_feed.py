@@ -0,0 +1,200 @@
+"""
+Feed de alterações para réplicas locais no frontend (action /changes/)
+
+    GET /api/v1/auth/usuarios/changes/                          # carga inicial
+    GET /api/v1/auth/usuarios/changes/?changed_since=2025-06-01T12:00:00Z
+    GET /api/v1/auth/usuarios/changes/?cursor=<next_cursor>
+
+Cada página traz as operações em ordem de (updated_at, id):
+
+    {"op": "upsert", "id": 7, "updated_at": "...", "data": {...serializer da listagem...}}
+    {"op": "delete", "id": 9, "updated_at": "..."}
+
+Remoções vêm de duas fontes: linhas em soft delete (ex: usuário com
+is_active=False, `change_feed_tombstone`) e lápides gravadas no
+post_delete (apps.controle_acesso.tombstones). Linhas e lápides são duas
+sequências ordenadas; o cursor guarda a posição em cada uma.
+
+O cliente repete com o next_cursor enquanto has_more=true e guarda o
+último next_cursor para a próxima sincronização.
+
+Alterações mais novas que SAFETY_LAG segundos ficam para a próxima
+chamada: uma transação mais lenta pode commitar um updated_at anterior
+ao de outra já lida, e ele ficaria para trás do cursor.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+DEFAULT_CONFIG = {
+    'PAGE_SIZE': 200,
+    'MAX_PAGE_SIZE': 1000,
+    'SAFETY_LAG': 1.0,  # segundos
+    'TOMBSTONE_RETENTION_DAYS': 90,
+}
+
+
+def get_change_feed_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'CHANGE_FEED', {}))
+    return config
+
+
+class CursorExpirado(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Cursor anterior à retenção das exclusões. Refaça a carga inicial.'
+    default_code = 'cursor_expirado'
+
+
+def encode_cursor(linhas, lapides):
+    """Token opaco com a posição (timestamp, id) de cada sequência"""
+    raw = json.dumps({
+        'l': [linhas[0].isoformat(), linhas[1]] if linhas else None,
+        'x': [lapides[0].isoformat(), lapides[1]] if lapides else None,
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(encoded):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode())
+        posicoes = []
+        for chave in ('l', 'x'):
+            if raw[chave] is None:
+                posicoes.append(None)
+                continue
+            valor, pk = raw[chave]
+            valor = parse_datetime(valor)
+            if valor is None:
+                raise ValueError
+            posicoes.append((valor, int(pk)))
+        return tuple(posicoes)
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError, AttributeError):
+        raise ValidationError({'cursor': 'Cursor inválido.'})
+
+
+def _apos(queryset, campo, posicao):
+    """(campo, id) > posicao, com o limite no índice (>=) e desempate por id"""
+    if posicao is None:
+        return queryset
+    valor, pk = posicao
+    return queryset.filter(**{f'{campo}__gte': valor}).filter(
+        Q(**{f'{campo}__gt': valor}) | Q(pk__gt=pk)
+    )
+
+
+class ChangeFeedMixin:
+    """Mixin de ViewSet com a action /changes/ (delta por updated_at)"""
+    change_feed_updated_field = 'updated_at'
+    # Linhas que valem como exclusão (soft delete): {campo: valor}
+    change_feed_tombstone = {}
+
+    def get_change_feed_queryset(self):
+        return self.get_queryset()
+
+    def _posicao_inicial(self, request, config):
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            posicoes = decode_cursor(cursor)
+        else:
+            changed_since = request.query_params.get('changed_since')
+            if not changed_since:
+                return None, None
+            valor = parse_datetime(changed_since)
+            if valor is None:
+                raise ValidationError({'changed_since': 'Data/hora inválida (use ISO 8601).'})
+            if timezone.is_naive(valor):
+                valor = timezone.make_aware(valor)
+            posicoes = ((valor, 0), (valor, 0))
+
+        retencao = timezone.now() - timedelta(days=config['TOMBSTONE_RETENTION_DAYS'])
+        if any(posicao and posicao[0] < retencao for posicao in posicoes):
+            raise CursorExpirado()
+        return posicoes
+
+    def _page_size(self, request, config):
+        try:
+            page_size = int(request.query_params.get('page_size', config['PAGE_SIZE']))
+        except (TypeError, ValueError):
+            return config['PAGE_SIZE']
+        if page_size <= 0:
+            return config['PAGE_SIZE']
+        return min(page_size, config['MAX_PAGE_SIZE'])
+
+    def _e_lapide(self, obj):
+        return bool(self.change_feed_tombstone) and all(
+            getattr(obj, campo) == valor for campo, valor in self.change_feed_tombstone.items()
+        )
+
+    @extend_schema(
+        summary="Feed de alterações",
+        description="Criados/alterados e excluídos desde changed_since ou do cursor, em ordem de (updated_at, id)",
+        parameters=[
+            OpenApiParameter('changed_since', OpenApiTypes.DATETIME, description='Início da sincronização'),
+            OpenApiParameter('cursor', str, description='next_cursor da chamada anterior'),
+            OpenApiParameter('page_size', int),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 410: OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Delta da coleção para manter uma réplica local"""
+        from apps.controle_acesso.tombstones import RegistroExcluido
+
+        config = get_change_feed_config()
+        page_size = self._page_size(request, config)
+        pos_linhas, pos_lapides = self._posicao_inicial(request, config)
+        limite = timezone.now() - timedelta(seconds=config['SAFETY_LAG'])
+        campo = self.change_feed_updated_field
+
+        queryset = self.get_change_feed_queryset()
+        linhas = queryset.filter(**{f'{campo}__lte': limite})
+        linhas = list(_apos(linhas, campo, pos_linhas).order_by(campo, 'pk')[:page_size + 1])
+        lapides = RegistroExcluido.objects.filter(modelo=queryset.model._meta.label_lower, deleted_at__lte=limite)
+        lapides = list(_apos(lapides, 'deleted_at', pos_lapides).order_by('deleted_at', 'pk')[:page_size + 1])
+
+        # Intercalar as duas sequências e cortar na página
+        itens = sorted(
+            [(getattr(obj, campo), 0, obj.pk, obj) for obj in linhas]
+            + [(lapide.deleted_at, 1, lapide.pk, lapide) for lapide in lapides]
+        )
+        has_more = len(itens) > page_size
+        itens = itens[:page_size]
+
+        vivos = [obj for _, tipo, _, obj in itens if tipo == 0 and not self._e_lapide(obj)]
+        dados = dict(zip((obj.pk for obj in vivos), self.get_serializer(vivos, many=True).data))
+
+        results = []
+        for momento, tipo, _, obj in itens:
+            if tipo == 0:
+                pos_linhas = (momento, obj.pk)
+                if obj.pk in dados:
+                    results.append({'op': 'upsert', 'id': obj.pk, 'updated_at': momento, 'data': dados[obj.pk]})
+                else:
+                    results.append({'op': 'delete', 'id': obj.pk, 'updated_at': momento})
+            else:
+                pos_lapides = (momento, obj.pk)
+                results.append({'op': 'delete', 'id': obj.objeto_id, 'updated_at': momento})
+
+        if not has_more:
+            # Tudo até o limite foi lido: o cursor avança mesmo sem alterações
+            # (réplica ociosa não cai na retenção das lápides)
+            pos_linhas = max(pos_linhas or (limite, 0), (limite, 0))
+            pos_lapides = max(pos_lapides or (limite, 0), (limite, 0))
+
+        return Response({
+            'results': results,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(pos_linhas, pos_lapides),
+        })
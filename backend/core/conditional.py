@@ -0,0 +1,127 @@
+"""
+GET condicional (ETag / Last-Modified) nas ViewSets
+
+Antes de serializar, uma única query agregada sobre o mesmo queryset
+filtrado da action:
+
+    SELECT MAX(updated_at), COUNT(*) ... WHERE <filtros da listagem>
+
+O ETag combina esse resultado com os parâmetros da URL (página, filtros,
+?fields=...) e, quando a resposta depende de vínculos grupo/permissão/
+usuário, com a acl_version (apps.controle_acesso.utils). Se o cliente
+manda If-None-Match igual (ou If-Modified-Since no detalhe), a resposta
+é 304 sem serializar nada.
+
+Last-Modified só no detalhe: na listagem um registro excluído não muda o
+MAX(updated_at) (o COUNT muda, e ele só entra no ETag).
+
+As respostas saem com Cache-Control "private, no-cache": o navegador
+guarda e sempre revalida.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+}
+
+
+def get_conditional_get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'CONDITIONAL_GET', {}))
+    return config
+
+
+class ConditionalGetMixin:
+    """Mixin de ViewSet com ETag/Last-Modified em list e retrieve"""
+    conditional_updated_field = 'updated_at'
+    # Resposta inclui dados de grupos/permissões/vínculos (acl_version no ETag)
+    conditional_acl = False
+    # Campos que variam com o relógio: {campo: segundos de validade}
+    conditional_volatile_fields = {}
+
+    def get_conditional_queryset(self):
+        """Queryset dos validadores (sobrescrever para tirar anotações caras)"""
+        return self.filter_queryset(self.get_queryset())
+
+    def _campo_na_resposta(self, nome):
+        if nome not in self.get_serializer_class()().fields:
+            return False
+        campo_solicitado = getattr(self, 'campo_solicitado', None)
+        return campo_solicitado is None or campo_solicitado(nome)
+
+    def validadores(self):
+        """(etag, last_modified) da action atual; None se não há registro"""
+        queryset = self.get_conditional_queryset()
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            except (TypeError, ValueError, ValidationError):
+                # Mesmo tratamento do get_object_or_404: o retrieve responde 404
+                return None
+
+        dados = queryset.order_by().aggregate(
+            ultima=Max(self.conditional_updated_field),
+            total=Count('pk'),
+        )
+        if not dados['total']:
+            return None
+
+        partes = [
+            queryset.model._meta.label,
+            self.action,
+            dados['ultima'].isoformat() if dados['ultima'] else '',
+            str(dados['total']),
+            self.request.get_full_path(),
+        ]
+        if self.conditional_acl:
+            from apps.controle_acesso.utils import get_acl_version
+            partes.append(str(get_acl_version()))
+        agora = time.time()
+        for nome, segundos in sorted(self.conditional_volatile_fields.items()):
+            if self._campo_na_resposta(nome):
+                partes.append(f'{nome}:{int(agora // segundos)}')
+
+        etag = 'W/' + quote_etag(hashlib.md5('|'.join(partes).encode()).hexdigest())
+        last_modified = None
+        if self.action == 'retrieve' and dados['ultima']:
+            # Resolução do HTTP-date é de segundos (o ETag guarda os microssegundos)
+            last_modified = int(dados['ultima'].timestamp())
+        return etag, last_modified
+
+    def _responder_condicional(self, request, metodo, *args, **kwargs):
+        if not get_conditional_get_config()['ENABLED']:
+            return metodo(request, *args, **kwargs)
+
+        validadores = self.validadores()
+        if validadores is None:
+            # Sem registro (detalhe inexistente, listagem vazia): fluxo normal
+            return metodo(request, *args, **kwargs)
+
+        etag, last_modified = validadores
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = metodo(request, *args, **kwargs)
+        elif not isinstance(response, HttpResponseNotModified):
+            return response
+
+        if 200 <= response.status_code < 400:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_condicional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_condicional(request, super().retrieve, *args, **kwargs)
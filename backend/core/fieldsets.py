@@ -0,0 +1,135 @@
+"""
+Sparse fieldsets: ?fields= e ?omit= nas actions de leitura das ViewSets
+
+    GET /api/v1/auth/usuarios/?fields=id,username
+    GET /api/v1/auth/usuarios/5/?omit=grupos_nomes,total_grupos
+
+Os campos fora da seleção saem do serializer antes da serialização
+(SerializerMethodField não pedido não é calculado) e o queryset é
+reduzido ao necessário: .only() nas colunas, select_related nas FKs e
+prefetch_related nas relações many. Campos calculados declaram do que
+dependem em `sparse_field_dependencies`; anotações caras ficam a cargo
+do get_queryset da view (`campo_solicitado`).
+
+Sem ?fields/?omit nada muda. Campo inexistente = 400.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _lista_param(valor):
+    return [nome.strip() for nome in (valor or '').split(',') if nome.strip()]
+
+
+def _resolver_caminho(model, caminho, only, select, prefetch):
+    """Classifica um caminho do ORM (ex: 'group__name') em only/select/prefetch"""
+    partes = caminho.split('__')
+    prefixo = []
+    for indice, parte in enumerate(partes):
+        try:
+            campo = model._meta.get_field(parte)
+        except FieldDoesNotExist:
+            # Property/anotação: sem coluna para restringir
+            return
+        prefixo.append(parte)
+        atual = '__'.join(prefixo)
+        if campo.many_to_many or campo.one_to_many:
+            prefetch.add(atual)
+            return
+        if not campo.is_relation:
+            only.add(atual)
+            return
+        select.add(atual)
+        if indice == len(partes) - 1:
+            # Objeto relacionado inteiro (ex: serializer aninhado)
+            only.add(atual)
+            return
+        model = campo.related_model
+
+
+class SparseFieldsetMixin:
+    """Mixin de ViewSet com ?fields= / ?omit= nas actions de leitura"""
+    sparse_fieldset_actions = ('list', 'retrieve')
+    # Campos calculados: {campo do serializer: [caminhos do ORM usados]}
+    sparse_field_dependencies = {}
+
+    def _campos_legiveis(self):
+        serializer = self.get_serializer_class()()
+        return {nome: campo for nome, campo in serializer.fields.items() if not campo.write_only}
+
+    def campos_esparsos(self):
+        """Campos pedidos na ordem do serializer (None = todos)"""
+        if hasattr(self, '_campos_esparsos'):
+            return self._campos_esparsos
+        self._campos_esparsos = None
+        request = getattr(self, 'request', None)
+        if request is None or self.action not in self.sparse_fieldset_actions:
+            return None
+
+        params = request.query_params
+        pedidos = _lista_param(params.get(FIELDS_PARAM))
+        omitidos = _lista_param(params.get(OMIT_PARAM))
+        if not pedidos and not omitidos:
+            return None
+
+        disponiveis = list(self._campos_legiveis())
+        for param, nomes in ((FIELDS_PARAM, pedidos), (OMIT_PARAM, omitidos)):
+            inexistentes = [nome for nome in nomes if nome not in disponiveis]
+            if inexistentes:
+                raise ValidationError({
+                    param: f"Campos inexistentes: {', '.join(inexistentes)}. Disponíveis: {', '.join(disponiveis)}."
+                })
+
+        campos = [
+            nome for nome in disponiveis
+            if (not pedidos or nome in pedidos) and nome not in omitidos
+        ]
+        if not campos:
+            raise ValidationError({OMIT_PARAM: 'Nenhum campo restante na resposta.'})
+        self._campos_esparsos = campos
+        return campos
+
+    def campo_solicitado(self, nome):
+        """True se o campo sai na resposta (para pular anotações caras)"""
+        campos = self.campos_esparsos()
+        return campos is None or nome in campos
+
+    def restringir_queryset(self, queryset):
+        """only/select_related/prefetch_related só com o que os campos pedidos usam"""
+        campos = self.campos_esparsos()
+        if campos is None:
+            return queryset
+
+        legiveis = self._campos_legiveis()
+        model = queryset.model
+        only, select, prefetch = {model._meta.pk.name}, set(), set()
+        for nome in campos:
+            if nome in self.sparse_field_dependencies:
+                caminhos = self.sparse_field_dependencies[nome]
+            elif legiveis[nome].source == '*':
+                caminhos = []
+            else:
+                caminhos = ['__'.join(legiveis[nome].source_attrs)]
+            for caminho in caminhos:
+                _resolver_caminho(model, caminho, only, select, prefetch)
+
+        # FK usada só de passagem (ex: group__name) precisa da coluna local
+        queryset = queryset.only(*sorted(only | select))
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_esparsos()
+        if campos is not None:
+            alvo = getattr(serializer, 'child', serializer)
+            for nome in [nome for nome, campo in alvo.fields.items() if not campo.write_only]:
+                if nome not in campos:
+                    alvo.fields.pop(nome)
+        return serializer
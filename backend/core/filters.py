@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db.models import Q, Value
 from rest_framework import filters
 from django_filters import rest_framework as django_filters
 
@@ -31,10 +31,16 @@ class GlobalSearchFilter(filters.SearchFilter):
         
         return queryset.filter(search_queries).distinct()
 
+def filtrar_booleano(queryset, name, value):
+    """Comparação explícita (= true/false) para o SQLite usar os índices compostos"""
+    if value is None:
+        return queryset
+    return queryset.filter(**{name: Value(value)})
+
 class UsuarioFilter(django_filters.FilterSet):
-    """Filtros específicos para usuários"""
-    is_online = django_filters.BooleanFilter(field_name='is_online')
-    is_active = django_filters.BooleanFilter(field_name='is_active')
+    """Filtros específicos para usuários (índices em Usuario.Meta.indexes)"""
+    is_online = django_filters.BooleanFilter(field_name='is_online', method=filtrar_booleano)
+    is_active = django_filters.BooleanFilter(field_name='is_active', method=filtrar_booleano)
     created_after = django_filters.DateFilter(field_name='date_joined', lookup_expr='gte')
     created_before = django_filters.DateFilter(field_name='date_joined', lookup_expr='lte')
     
@@ -51,4 +57,18 @@ class GrupoFilter(django_filters.FilterSet):
     
     class Meta:
         model = None  # Será definido na view
-        fields = ['ativo', 'created_after', 'created_before', 'nome']
\ No newline at end of file
+        fields = ['ativo', 'created_after', 'created_before', 'nome']
+
+class PermissionAuditLogFilter(django_filters.FilterSet):
+    """Filtros do log de auditoria (todos com índice em (campo, -timestamp))"""
+    user = django_filters.NumberFilter(field_name='user_id')
+    target_user = django_filters.NumberFilter(field_name='target_user_id')
+    group = django_filters.CharFilter(field_name='group_name')
+    permission = django_filters.CharFilter(field_name='permission_name')
+    action = django_filters.CharFilter(field_name='action')
+    since = django_filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='gte')
+    until = django_filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='lt')
+
+    class Meta:
+        model = None  # Será definido na view
+        fields = ['user', 'target_user', 'group', 'permission', 'action', 'since', 'until']
@@ -0,0 +1,479 @@
+"""
+Métricas por view em formato texto do Prometheus (GET /metrics)
+
+Coletadas pelo MetricsMiddleware para cada request:
+- http_requests_total{route, method, status}
+- http_request_duration_seconds{route, method} (histograma)
+- http_request_db_queries_total / http_request_db_duration_seconds_total
+  (contagem do QueryBudgetMiddleware, ver core.query_budget)
+- permission_cache_requests_total{cache, result} (hit/miss dos caches
+  de permissões em controle_acesso.utils)
+- token_blacklist_checks_total{result} (checagens da blacklist de refresh
+  tokens resolvidas pelo Bloom filter ou pelo banco, ver
+  accounts.token_blacklist)
+- token_refresh_total{result} (refreshes rotacionados ou coalescidos na
+  janela de graça, ver accounts.refresh)
+- login_async_total{result}, login_hash_queue_seconds e login_hash_seconds
+  (login sob ASGI com o hash em pool próprio, ver accounts.login_async)
+- login_throttle_total{scope} (tentativas recusadas pelo rate limit de
+  login/refresh, ver accounts.throttling)
+
+Agregação por processo sem lock no caminho do request: cada thread
+escreve no próprio shard; o endpoint soma os shards na leitura.
+
+Vários workers (gunicorn): com METRICS['MULTIPROCESS_DIR'] cada processo
+grava periodicamente um snapshot JSON no diretório compartilhado e o
+/metrics de qualquer worker soma todos os arquivos. Cada processo regrava
+o seu a cada FLUSH_INTERVAL (thread em segundo plano, mesmo sem
+requests); um snapshot sem gravação há mais de MAX_AGE é de um processo
+encerrado (em qualquer host que compartilhe o diretório) e é somado ao
+metrics-archive.json e apagado: o diretório não cresce a cada worker
+reciclado e os contadores não diminuem (sem falso reset no Prometheus).
+
+Acesso: /metrics exige METRICS['TOKEN'] (Authorization: Bearer), IP em
+METRICS['ALLOWED_IPS'] (REMOTE_ADDR, aceita rede CIDR) ou usuário staff
+autenticado pela API; sem nada disso configurado só staff lê as métricas.
+"""
+import atexit
+import bisect
+import hmac
+import ipaddress
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.query_budget import get_request_query_stats
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': '',  # diretório compartilhado entre workers ('' = só o processo atual)
+    'FLUSH_INTERVAL': 5,  # segundos entre gravações do snapshot do processo
+    'TOKEN': '',  # scrape com "Authorization: Bearer <token>"
+    'ALLOWED_IPS': (),  # IPs/redes (REMOTE_ADDR) liberados sem token, ex: ('10.0.0.0/8',)
+    'MAX_AGE': 300,  # segundos sem gravação para um snapshot ir ao arquivo (0 = nunca)
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS_HELP = {
+    'http_requests_total': ('counter', 'Total de requests por rota, método e status'),
+    'http_request_duration_seconds': ('histogram', 'Latência dos requests por rota e método'),
+    'http_request_db_queries_total': ('counter', 'Queries executadas por rota e método'),
+    'http_request_db_duration_seconds_total': ('counter', 'Tempo de banco por rota e método'),
+    'permission_cache_requests_total': ('counter', 'Acessos aos caches de permissões (hit/miss)'),
+    'token_blacklist_checks_total': ('counter', 'Checagens da blacklist de refresh tokens por resultado'),
+    'token_refresh_total': ('counter', 'Refreshes de token rotacionados ou coalescidos'),
+    'login_async_total': ('counter', 'Logins atendidos pela view assíncrona por resultado'),
+    'login_hash_queue_seconds': ('histogram', 'Espera do hash de senha na fila do pool de login'),
+    'login_hash_seconds': ('histogram', 'Duração do hash de senha no pool de login'),
+    'login_throttle_total': ('counter', 'Tentativas de login/refresh recusadas pelo rate limit por escopo'),
+}
+
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+ROUTE_GROUP_REGEX = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def get_metrics_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'METRICS', {}))
+    return config
+
+
+# ============================================================
+# Agregados por processo (um shard por thread)
+# ============================================================
+
+class _Shard:
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        # (nome, labels) -> [contagem por bucket (+Inf no fim), soma, total]
+        self.histograms = {}
+
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()  # só na criação do shard de cada thread
+_process_token = uuid.uuid4().hex[:8]
+_last_flush = 0.0
+_ultimo_destino = None
+_flush_thread_pid = None
+
+ARCHIVE_NAME = 'metrics-archive.json'
+ARCHIVE_LOCK_NAME = 'metrics-archive.lock'
+ARCHIVE_LOCK_STALE = 60  # segundos: lock de um processo que morreu no meio
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+        _local.shard = shard
+    return shard
+
+
+def inc(name, labels=(), value=1):
+    """Incrementar um contador (labels: tupla de pares (nome, valor))"""
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, value, labels=(), buckets=None):
+    """Registrar uma observação em um histograma"""
+    buckets = buckets or get_metrics_config()['BUCKETS']
+    histograms = _shard().histograms
+    key = (name, labels)
+    hist = histograms.get(key)
+    if hist is None:
+        hist = histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+    hist[0][bisect.bisect_left(buckets, value)] += 1
+    hist[1] += value
+    hist[2] += 1
+
+
+def record_cache_access(cache_name, hit):
+    """Contar hit/miss de um cache de permissões"""
+    inc('permission_cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+def reset():
+    """Zerar os agregados do processo (usado nos testes)"""
+    with _shards_lock:
+        for shard in _shards:
+            shard.counters.clear()
+            shard.histograms.clear()
+
+
+def snapshot():
+    """Somar os shards do processo em um dict serializável"""
+    counters = {}
+    histograms = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, value in dict(shard.counters).items():
+            counters[key] = counters.get(key, 0) + value
+        for key, (buckets, total, count) in dict(shard.histograms).items():
+            _merge_histogram(histograms, key, list(buckets), total, count)
+    return _serializar(counters, histograms)
+
+
+def _serializar(counters, histograms):
+    return {
+        'counters': [[name, [list(par) for par in labels], value] for (name, labels), value in counters.items()],
+        'histograms': [
+            [name, [list(par) for par in labels], buckets, total, count]
+            for (name, labels), (buckets, total, count) in histograms.items()
+        ],
+    }
+
+
+def _merge_histogram(histograms, key, buckets, total, count):
+    atual = histograms.get(key)
+    if atual is None:
+        histograms[key] = [buckets, total, count]
+        return
+    atual[0] = [a + b for a, b in zip(atual[0], buckets)]
+    atual[1] += total
+    atual[2] += count
+
+
+def merge_snapshots(snapshots):
+    """Somar snapshots (de vários processos) em {(nome, labels): valor}"""
+    counters = {}
+    histograms = {}
+    for snap in snapshots:
+        for name, labels, value in snap.get('counters', []):
+            key = (name, tuple(tuple(par) for par in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snap.get('histograms', []):
+            key = (name, tuple(tuple(par) for par in labels))
+            _merge_histogram(histograms, key, list(buckets), total, count)
+    return counters, histograms
+
+
+# ============================================================
+# Vários processos (diretório compartilhado)
+# ============================================================
+
+def _snapshot_path(directory):
+    return Path(directory) / f"metrics-{os.getpid()}-{_process_token}.json"
+
+
+def flush(directory=None):
+    """Gravar o snapshot do processo no diretório compartilhado (escrita atômica)"""
+    global _last_flush, _ultimo_destino
+    directory = directory or get_metrics_config()['MULTIPROCESS_DIR']
+    if not directory:
+        return
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    destino = _snapshot_path(directory)
+    if destino == _ultimo_destino and not destino.exists():
+        # Processo parado além do MAX_AGE: o snapshot já foi para o arquivo
+        reset()
+    temporario = destino.with_suffix(f'.{threading.get_ident()}.tmp')
+    temporario.write_text(json.dumps(snapshot()), encoding='utf-8')
+    os.replace(temporario, destino)
+    _last_flush = time.monotonic()
+    _ultimo_destino = destino
+
+
+def _flush_periodico():
+    while True:
+        config = get_metrics_config()
+        time.sleep(max(config['FLUSH_INTERVAL'], 1))
+        try:
+            flush(get_metrics_config()['MULTIPROCESS_DIR'])
+        except Exception:
+            pass  # diretório indisponível: tenta de novo no próximo ciclo
+
+
+def _iniciar_flush_periodico():
+    """Uma thread por processo (após o fork do gunicorn o pid muda)"""
+    global _flush_thread_pid
+    with _shards_lock:
+        if _flush_thread_pid == os.getpid():
+            return
+        _flush_thread_pid = os.getpid()
+    threading.Thread(target=_flush_periodico, name='metrics-flush', daemon=True).start()
+
+
+def maybe_flush(config):
+    if not config['MULTIPROCESS_DIR']:
+        return
+    if _flush_thread_pid != os.getpid():
+        _iniciar_flush_periodico()
+    if time.monotonic() - _last_flush >= config['FLUSH_INTERVAL']:
+        flush(config['MULTIPROCESS_DIR'])
+
+
+def _ler_snapshot(path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None  # arquivo sendo substituído ou corrompido
+
+
+def arquivar_antigos(directory, max_age):
+    """
+    Somar ao metrics-archive.json os snapshots sem gravação há mais de
+    max_age segundos e apagá-los. Um processo por vez (lock por O_EXCL);
+    quem não pega o lock só lê. Retorna os arquivos arquivados.
+    """
+    directory = Path(directory)
+    lock = directory / ARCHIVE_LOCK_NAME
+    try:
+        if time.time() - lock.stat().st_mtime > ARCHIVE_LOCK_STALE:
+            lock.unlink(missing_ok=True)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return []
+
+    try:
+        limite = time.time() - max_age
+        antigos = []
+        for path in directory.glob('metrics-*.json'):
+            if path.name in (ARCHIVE_NAME, _snapshot_path(directory).name):
+                continue
+            try:
+                if path.stat().st_mtime < limite:
+                    antigos.append(path)
+            except OSError:
+                continue
+        if not antigos:
+            return []
+
+        arquivo = directory / ARCHIVE_NAME
+        snapshots = [_ler_snapshot(arquivo) or {}] if arquivo.exists() else []
+        lidos = []
+        for path in antigos:
+            dados = _ler_snapshot(path)
+            if dados is not None:
+                snapshots.append(dados)
+                lidos.append(path)
+        temporario = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+        temporario.write_text(json.dumps(_serializar(*merge_snapshots(snapshots))), encoding='utf-8')
+        os.replace(temporario, arquivo)
+        for path in lidos:
+            path.unlink(missing_ok=True)
+        return lidos
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+def collect(config=None):
+    """Snapshots de todos os processos (o atual sempre com dados frescos)"""
+    config = config or get_metrics_config()
+    snapshots = [snapshot()]
+    directory = config['MULTIPROCESS_DIR']
+    if directory and Path(directory).is_dir():
+        if config['MAX_AGE']:
+            arquivar_antigos(directory, config['MAX_AGE'])
+        proprio = _snapshot_path(directory).name
+        for path in Path(directory).glob('metrics-*.json'):
+            if path.name == proprio:
+                continue
+            dados = _ler_snapshot(path)
+            if dados is not None:
+                snapshots.append(dados)
+    return snapshots
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        if settings.configured:
+            flush()
+    except Exception:
+        pass
+
+
+# ============================================================
+# Formato texto do Prometheus
+# ============================================================
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escape(valor)}"' for nome, valor in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshots, buckets=None):
+    """Texto no formato de exposição do Prometheus (0.0.4)"""
+    buckets = buckets or get_metrics_config()['BUCKETS']
+    counters, histograms = merge_snapshots(snapshots)
+    por_nome = {}
+    for (name, labels), value in counters.items():
+        por_nome.setdefault(name, []).append((labels, value))
+    for (name, labels), hist in histograms.items():
+        por_nome.setdefault(name, []).append((labels, hist))
+
+    linhas = []
+    for name in sorted(por_nome):
+        tipo, ajuda = METRICS_HELP.get(name, ('untyped', name))
+        linhas.append(f'# HELP {name} {ajuda}')
+        linhas.append(f'# TYPE {name} {tipo}')
+        for labels, valor in sorted(por_nome[name], key=lambda item: item[0]):
+            if tipo != 'histogram':
+                linhas.append(f'{name}{_format_labels(labels)} {_format_value(valor)}')
+                continue
+            contagens, total, count = valor
+            acumulado = 0
+            for limite, quantidade in zip(list(buckets) + ['+Inf'], contagens):
+                acumulado += quantidade
+                le = limite if limite == '+Inf' else _format_value(float(limite))
+                linhas.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {acumulado}')
+            linhas.append(f'{name}_sum{_format_labels(labels)} {_format_value(float(total))}')
+            linhas.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(linhas) + '\n'
+
+
+# ============================================================
+# Middleware e endpoint
+# ============================================================
+
+def route_label(request):
+    """Rota do URLconf (baixa cardinalidade) no lugar do path com ids"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.route:
+        return 'unmatched'
+    route = ROUTE_GROUP_REGEX.sub(r'<\1>', match.route)
+    return '/' + route.replace('^', '').replace('$', '').replace('\\', '')
+
+
+class MetricsMiddleware:
+    """Contadores e latência por rota/método; queries vêm do QueryBudgetMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_metrics_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duracao = time.perf_counter() - start
+
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        labels = (('route', route_label(request)), ('method', method))
+        inc('http_requests_total', labels + (('status', str(response.status_code)),))
+        observe('http_request_duration_seconds', duracao, labels, config['BUCKETS'])
+
+        stats = get_request_query_stats(request)
+        if stats is not None:
+            inc('http_request_db_queries_total', labels, stats.count)
+            inc('http_request_db_duration_seconds_total', labels, stats.time)
+
+        maybe_flush(config)
+        return response
+
+
+def _ip_permitido(ip, permitidos):
+    try:
+        endereco = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    for rede in permitidos:
+        try:
+            if endereco in ipaddress.ip_network(rede, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def _acesso_permitido(request, config):
+    """Token do scrape, IP liberado ou usuário staff (autenticação da API)"""
+    if config['TOKEN']:
+        esperado = f"Bearer {config['TOKEN']}"
+        recebido = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(recebido.encode(), esperado.encode()):
+            return True
+    if _ip_permitido(request.META.get('REMOTE_ADDR', ''), config['ALLOWED_IPS']):
+        return True
+    autenticadores = [classe() for classe in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        usuario = Request(request, authenticators=autenticadores).user
+    except APIException:
+        return False
+    return bool(usuario and usuario.is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """GET /metrics: agregados de todos os workers em texto Prometheus"""
+    config = get_metrics_config()
+    if not _acesso_permitido(request, config):
+        return HttpResponse('Não autorizado\n', status=401, content_type=CONTENT_TYPE)
+    return HttpResponse(render(collect(config), config['BUCKETS']), content_type=CONTENT_TYPE)
@@ -1,5 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class CustomPagination(PageNumberPagination):
     """Paginação customizada para o sistema"""
@@ -17,4 +24,92 @@ class CustomPagination(PageNumberPagination):
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
-        })
\ No newline at end of file
+        }) 
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por chave (keyset) em (keyset_field, id), ordem decrescente
+
+    Para tabelas grandes (ex: log de auditoria): cada página é um range
+    no índice a partir do último registro da página anterior, sem OFFSET
+    e sem COUNT(*) da tabela.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    keyset_field = 'timestamp'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.keyset_field)
+        raw = json.dumps([value.isoformat(), obj.pk])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode()
+            value, pk = json.loads(raw)
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return value, int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_atual = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{self.keyset_field}', '-pk')
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            value, pk = cursor
+            # Limite no índice (<=) + desempate por id: (campo, id) < (value, pk)
+            queryset = queryset.filter(**{f'{self.keyset_field}__lte': value}).filter(
+                Q(**{f'{self.keyset_field}__lt': value}) | Q(pk__lt=pk)
+            )
+
+        # Buscar um registro a mais apenas para saber se existe próxima página
+        rows = list(queryset[:self.page_size_atual + 1])
+        self.has_next = len(rows) > self.page_size_atual
+        rows = rows[:self.page_size_atual]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'page_size': self.page_size_atual,
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'page_size': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,167 @@
+"""
+Orçamento de queries por view/action
+
+Declaração na view (atributo de classe ou decorator):
+
+    class MinhaViewSet(viewsets.ModelViewSet):
+        query_budget = {'list': 4, 'retrieve': 3, 'default': 6}
+
+    @query_budget(get=2)
+    @api_view(['GET'])
+    def minha_view(request): ...
+
+As chaves podem ser actions do ViewSet ('list', 'exportar', ...) ou
+métodos HTTP em minúsculo ('get', 'post', ...); 'default' vale para o resto.
+
+O QueryBudgetMiddleware conta queries e tempo de banco de cada request.
+Ao estourar o orçamento: em testes (MODE='raise') levanta
+QueryBudgetExceeded; em produção (MODE='warn') registra um warning
+estruturado (JSON) no logger 'query_budget'.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('query_budget')
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'MODE': 'warn',  # 'warn' (log) ou 'raise' (testes)
+    'DEFAULT': None,  # orçamento para views sem declaração (None = sem limite)
+    'HEADERS': False,  # adicionar X-Query-Count / X-Query-Time-Ms na resposta
+}
+
+
+def get_query_budget_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'QUERY_BUDGET', {}))
+    return config
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Request executou mais queries que o orçamento da view"""
+
+
+def query_budget(default=None, **por_acao):
+    """Decorator para declarar o orçamento de queries em views (classe ou função)"""
+    def decorator(view):
+        if por_acao:
+            budget = dict(por_acao)
+            if default is not None:
+                budget['default'] = default
+        else:
+            budget = default
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def resolve_view_budget(view_func, method):
+    """Retorna (nome da view, action, limite) para o view_func resolvido pela URL"""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None and view_class is not None:
+        budget = getattr(view_class, 'query_budget', None)
+
+    method = method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method, method)
+
+    if isinstance(budget, dict):
+        limit = budget.get(action, budget.get(method, budget.get('default')))
+    else:
+        limit = budget
+
+    if limit is None:
+        limit = get_query_budget_config()['DEFAULT']
+
+    view_name = view_class.__name__ if view_class is not None else getattr(view_func, '__name__', str(view_func))
+    return view_name, action, limit
+
+
+class QueryStats:
+    """
+    Contador de queries/tempo usado como execute_wrapper.
+
+    Conta só as queries da thread que criou o contador: uma conexão
+    compartilhada entre threads (ex: SQLite em memória no LiveServerTestCase)
+    também executa os wrappers dos outros requests.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.thread_id = threading.get_ident()
+
+    def __call__(self, execute, sql, params, many, context):
+        if threading.get_ident() != self.thread_id:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - start
+
+
+def get_request_query_stats(request):
+    """QueryStats do request (ou None se o middleware não estiver ativo)"""
+    return getattr(request, '_query_stats', None)
+
+
+class QueryBudgetMiddleware:
+    """Conta queries e tempo por request e aplica o orçamento da view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_query_budget_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        request._query_stats = stats
+        request._query_budget = None
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        if config['HEADERS']:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time-Ms'] = f"{stats.time * 1000:.2f}"
+            response['X-Request-Time-Ms'] = f"{total_time * 1000:.2f}"
+
+        budget = request._query_budget
+        if budget and budget[2] is not None and stats.count > budget[2]:
+            view_name, action, limit = budget
+            payload = {
+                'event': 'query_budget_exceeded',
+                'method': request.method,
+                'path': request.path,
+                'view': view_name,
+                'action': action,
+                'queries': stats.count,
+                'limit': limit,
+                'db_time_ms': round(stats.time * 1000, 2),
+                'total_time_ms': round(total_time * 1000, 2),
+                'status': response.status_code,
+            }
+            if config['MODE'] == 'raise':
+                raise QueryBudgetExceeded(json.dumps(payload, ensure_ascii=False))
+            logger.warning(json.dumps(payload, ensure_ascii=False), extra={'query_budget': payload})
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, '_query_budget'):
+            request._query_budget = resolve_view_budget(view_func, request.method)
+        return None
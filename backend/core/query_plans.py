@@ -0,0 +1,99 @@
+"""
+Leitura de planos de execução (EXPLAIN) para conferir uso de índices
+(comando check_query_plans)
+
+Cada backend descreve o plano de um jeito; aqui todos viram o mesmo
+resumo:
+- varreduras: tabelas lidas por inteiro (SQLite "SCAN tabela" sem índice,
+  PostgreSQL "Seq Scan", MySQL access_type ALL);
+- ordenacao: ORDER BY resolvido com sort fora de índice (SQLite
+  "USE TEMP B-TREE FOR ORDER BY", PostgreSQL nó Sort, MySQL filesort);
+- indices: índices usados pelo plano.
+
+Em tabelas pequenas o planejador pode preferir varrer a tabela mesmo com
+índice disponível: rodar contra um banco com volume (seed_load_data).
+"""
+import json
+import re
+
+from django.db import connections
+
+SQLITE_SCAN_REGEX = re.compile(r'\bSCAN (\w+)(?: AS \w+)?(.*)$')
+SQLITE_INDEX_REGEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+
+def _analisar_sqlite(plano):
+    varreduras, indices, ordenacao = [], [], False
+    for linha in plano.splitlines():
+        if 'USE TEMP B-TREE FOR ORDER BY' in linha:
+            ordenacao = True
+            continue
+        scan = SQLITE_SCAN_REGEX.search(linha)
+        if scan and 'USING' not in scan.group(2):
+            varreduras.append(scan.group(1))
+        indice = SQLITE_INDEX_REGEX.search(linha)
+        if indice:
+            indices.append(indice.group(1))
+    return varreduras, indices, ordenacao
+
+
+def _nos(valor):
+    """Todos os dicts de um plano JSON (PostgreSQL/MySQL), em profundidade"""
+    if isinstance(valor, dict):
+        yield valor
+        for filho in valor.values():
+            yield from _nos(filho)
+    elif isinstance(valor, list):
+        for item in valor:
+            yield from _nos(item)
+
+
+def _analisar_postgresql(plano):
+    varreduras, indices, ordenacao = [], [], False
+    for no in _nos(json.loads(plano)):
+        tipo = no.get('Node Type')
+        if tipo == 'Seq Scan':
+            varreduras.append(no.get('Relation Name'))
+        elif tipo in ('Sort', 'Incremental Sort'):
+            ordenacao = True
+        if no.get('Index Name'):
+            indices.append(no['Index Name'])
+    return varreduras, indices, ordenacao
+
+
+def _analisar_mysql(plano):
+    varreduras, indices, ordenacao = [], [], False
+    for no in _nos(json.loads(plano)):
+        if no.get('access_type') == 'ALL':
+            varreduras.append(no.get('table_name'))
+        if no.get('using_filesort'):
+            ordenacao = True
+        if no.get('key'):
+            indices.append(no['key'])
+    return varreduras, indices, ordenacao
+
+
+ANALISADORES = {
+    'sqlite': _analisar_sqlite,
+    'postgresql': _analisar_postgresql,
+    'mysql': _analisar_mysql,
+}
+
+
+def analisar_plano(plano, vendor):
+    """Resumo {'varreduras', 'indices', 'ordenacao'} do texto do EXPLAIN"""
+    varreduras, indices, ordenacao = ANALISADORES[vendor](plano)
+    return {
+        'varreduras': sorted(set(varreduras)),
+        'indices': list(dict.fromkeys(indices)),
+        'ordenacao': ordenacao,
+    }
+
+
+def explicar(queryset):
+    """EXPLAIN do queryset (formato JSON onde existe) + resumo"""
+    vendor = connections[queryset.db].vendor
+    if vendor not in ANALISADORES:
+        raise ValueError(f'Backend sem suporte na análise de planos: {vendor}')
+    plano = queryset.explain(format='json') if vendor in ('postgresql', 'mysql') else queryset.explain()
+    return {'plano': plano, **analisar_plano(plano, vendor)}
@@ -0,0 +1,130 @@
+"""
+Renderer e parser JSON rápidos (orjson) no lugar dos padrões do DRF
+
+A saída segue a do JSONRenderer: os tipos que o orjson não serializa
+sozinho (Decimal, lazy strings, QuerySet...) e os datetimes passam pelo
+mesmo rest_framework.utils.encoders.JSONEncoder (datetime ISO 8601 com
+"Z", Decimal como número); UUID sai como string. Só diferem a
+grafia de alguns floats (1e16 em vez de 1e+16) e NaN/Infinity (null).
+
+Listas grandes (a lista ou o "results" da resposta paginada/feed) são
+codificadas em pedaços de CHUNK_SIZE itens e unidas no final: cada
+chamada ao orjson segura o GIL só pelo tempo de um pedaço, e um pedaço
+que o orjson recusa (ex: inteiro acima de 64 bits) cai no json da
+biblioteca padrão sem refazer a resposta inteira.
+
+Com BACKEND='json' (JSON_BACKEND no .env), sem o orjson instalado, com
+indentação pedida (Accept: application/json; indent=4, API navegável)
+ou COMPACT_JSON=False vale o comportamento padrão do DRF.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência listada no requirements
+    orjson = None
+
+DEFAULT_CONFIG = {
+    'BACKEND': 'orjson',  # 'orjson' | 'json'
+    'CHUNK_THRESHOLD': 500,  # itens a partir dos quais a lista é codificada em pedaços
+    'CHUNK_SIZE': 200,
+}
+
+SEPARADORES_JS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+
+def get_json_renderer_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'JSON_RENDERER', {}))
+    return config
+
+
+def orjson_ativo():
+    return orjson is not None and get_json_renderer_config()['BACKEND'] == 'orjson'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer com orjson e codificação das listas grandes em pedaços"""
+
+    # Datetimes pelo encoder do DRF (o orjson usaria +00:00 em vez de Z)
+    orjson_options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def _dumps(self, data, encoder):
+        try:
+            return orjson.dumps(data, default=encoder.default, option=self.orjson_options)
+        except orjson.JSONEncodeError:
+            # Fora do que o orjson aceita: mesma saída (ou erro) do renderer padrão
+            return super().render(data)
+
+    def render_chunks(self, data, encoder=None):
+        """Gera os bytes da resposta em pedaços (concatenados = JSON completo)"""
+        encoder = encoder or self.encoder_class()
+        config = get_json_renderer_config()
+        tamanho = max(int(config['CHUNK_SIZE']), 1)
+
+        if isinstance(data, list):
+            prefixo, itens, sufixo = b'', data, b''
+        elif isinstance(data, dict) and isinstance(data.get('results'), list):
+            # Resposta paginada/feed: "results" em pedaços, demais chaves na ordem original
+            chaves = list(data)
+            posicao = chaves.index('results')
+            antes = {chave: data[chave] for chave in chaves[:posicao]}
+            depois = {chave: data[chave] for chave in chaves[posicao + 1:]}
+            itens = data['results']
+            prefixo = self._dumps(antes, encoder)[:-1] + (b',' if antes else b'') + b'"results":'
+            sufixo = b',' + self._dumps(depois, encoder)[1:] if depois else b'}'
+        else:
+            yield self._dumps(data, encoder)
+            return
+
+        if len(itens) < config['CHUNK_THRESHOLD']:
+            yield prefixo + self._dumps(itens, encoder) + sufixo
+            return
+
+        yield prefixo + b'['
+        for inicio in range(0, len(itens), tamanho):
+            pedaco = self._dumps(itens[inicio:inicio + tamanho], encoder)
+            yield (b',' if inicio else b'') + pedaco[1:-1]
+        yield b']' + sufixo
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if not orjson_ativo() or indent is not None or not self.compact:
+            # orjson só gera JSON compacto (ou indentado com 2 espaços)
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = b''.join(self.render_chunks(data))
+        # Mesmo escape do JSONRenderer: saída é subconjunto estrito de javascript
+        for original, escapado in SEPARADORES_JS:
+            if original in ret:
+                ret = ret.replace(original, escapado)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser com orjson (mesmos erros 400 do parser padrão)"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not orjson_ativo():
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            conteudo = stream.read() if stream is not None else b''
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                conteudo = conteudo.decode(encoding)
+            return orjson.loads(conteudo)
+        except (ValueError, LookupError) as exc:
+            # JSONDecodeError e UnicodeDecodeError são ValueError
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,82 @@
+"""
+Exportação em streaming (CSV / NDJSON)
+
+As linhas são consumidas de um iterador (ex: queryset.values().iterator())
+e escritas em pedaços pelo StreamingHttpResponse, sem montar a resposta
+inteira em memória.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer escreve e recebemos a linha de volta"""
+
+    def write(self, value):
+        return value
+
+
+# Planilhas interpretam células iniciadas por estes caracteres como fórmula
+# (CSV injection): texto assim sai prefixado com aspas simples
+PREFIXOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _formatar_valor(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(PREFIXOS_FORMULA):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows, fields, batch_lines=500):
+    """Gerar o CSV (cabeçalho + linhas) agrupando várias linhas por pedaço"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([_formatar_valor(row[field]) for field in fields]))
+        if len(buffer) >= batch_lines:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(rows, batch_lines=500):
+    """Gerar NDJSON (um objeto JSON por linha)"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    buffer = []
+    for row in rows:
+        buffer.append(encoder.encode(row) + '\n')
+        if len(buffer) >= batch_lines:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def streaming_export_response(rows, fields, formato, nome_base):
+    """StreamingHttpResponse com o conteúdo exportado como anexo"""
+    if formato == 'csv':
+        content = iter_csv(rows, fields)
+    else:
+        content = iter_ndjson(rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[formato])
+    filename = f"{nome_base}-{timezone.now():%Y%m%d-%H%M%S}.{formato}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Evitar buffer de proxies (nginx) para começar a enviar imediatamente
+    response['X-Accel-Buffering'] = 'no'
+    return response